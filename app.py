@@ -6,6 +6,10 @@ import ast
 import pandas as pd
 from utils_app import global_context
 import database as db
+import db_connection
+import elo_engine
+import rating_formulas
+import seasons
 
 import os
 
@@ -22,18 +26,23 @@ def get_rank(elo):
     else:
         return "worthy"
 
+_icon_cache = {}
+
 def get_rank_icon_base64(rank):
-    """Get base64 encoded SVG icon for rank"""
+    """Get base64 encoded SVG icon for rank (read once per rank)"""
+    if rank in _icon_cache:
+        return _icon_cache[rank]
     import base64
     icon_path = f"assets/logos/{rank}.svg"
     try:
         with open(icon_path, 'rb') as f:
             svg_data = f.read()
             b64_data = base64.b64encode(svg_data).decode('utf-8')
-            return f"data:image/svg+xml;base64,{b64_data}"
+            _icon_cache[rank] = f"data:image/svg+xml;base64,{b64_data}"
     except Exception as e:
         print(f"Error loading icon for {rank}: {e}")
         return ""
+    return _icon_cache[rank]
 
 def format_name_with_rank(name, elo):
     """Return HTML for rank icon (used in separate Rank column)"""
@@ -47,34 +56,61 @@ def add_rank_icons_to_df(df):
     df_display.insert(0, "Rank", df_display.apply(lambda row: format_name_with_rank(row["Name"], row["ELO"]), axis=1))
     return df_display
 
-def render_database_table(df):
-    """Render an HTML table with rank icons for the full database"""
-    rows = []
-    for idx, row in df.iterrows():
-        rank = get_rank(row["ELO"])
-        icon_data = get_rank_icon_base64(rank)
-        rows.append(
-            f"""
+DB_PAGE_SIZE = 50
+# (column, decimals) for the numeric cells of the database table; None means int
+DB_TABLE_COLUMNS = [("ELO", None), ("Rating", 2), ("Matches", None), ("Wins", None), ("Losses", None),
+                    ("K/D", 2), ("KPM", 2), ("DPM", 2), ("APM", 2), ("ADR", 2)]
+# Name -> (row values, <tr> fragment); a fragment is rebuilt only when its values change
+_row_html_cache = {}
+
+def render_table_row(name, values):
+    """Cached <tr> for one player; values are the DB_TABLE_COLUMNS cells in order"""
+    cached = _row_html_cache.get(name)
+    if cached is not None and cached[0] == values:
+        return cached[1]
+    rank = get_rank(values[0])
+    cells = "".join(
+        f'<td style="padding:8px 10px; text-align:right;">{int(v) if decimals is None else f"{v:.{decimals}f}"}</td>'
+        for v, (_, decimals) in zip(values, DB_TABLE_COLUMNS)
+    )
+    html = f"""
             <tr style="border-bottom:1px solid #2d3748;">
                 <td style="padding:8px 10px; text-align:left;">
-                    {row['Name']}
-                    <img src="{icon_data}" alt="{rank}" style="width:15px;height:15px;display:inline-block;vertical-align:middle;margin-right:8px;">
-                    
+                    {name}
+                    <span class="rank-icon rank-{rank}" title="{rank}"></span>
                 </td>
-                <td style="padding:8px 10px; text-align:right;">{int(row['ELO'])}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['Rating']:.2f}</td>
-                <td style="padding:8px 10px; text-align:right;">{int(row['Matches'])}</td>
-                <td style="padding:8px 10px; text-align:right;">{int(row['Wins'])}</td>
-                <td style="padding:8px 10px; text-align:right;">{int(row['Losses'])}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['K/D']:.2f}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['KPM']:.2f}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['DPM']:.2f}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['APM']:.2f}</td>
-                <td style="padding:8px 10px; text-align:right;">{row['ADR']:.2f}</td>
-            </tr>
-            """
-        )
+                {cells}
+            </tr>"""
+    _row_html_cache[name] = (values, html)
+    return html
+
+def database_page_count(df):
+    return max(1, -(-len(df) // DB_PAGE_SIZE))
+
+def render_database_table(df, page=1):
+    """Render one page of the database as an HTML table with rank icons.
+
+    Rows come from the per-player fragment cache, and each rank icon is
+    embedded once per page as a CSS class instead of once per row.
+    """
+    n_pages = database_page_count(df)
+    page = min(max(int(page or 1), 1), n_pages)
+    df_page = df.iloc[(page - 1) * DB_PAGE_SIZE: page * DB_PAGE_SIZE]
+    columns = [c for c, _ in DB_TABLE_COLUMNS]
+    rows = []
+    ranks = set()
+    for name, *values in df_page[["Name"] + columns].itertuples(index=False, name=None):
+        values = tuple(values)
+        ranks.add(get_rank(values[0]))
+        rows.append(render_table_row(name, values))
+    icon_css = "".join(
+        f'.rank-{rank}{{background-image:url("{get_rank_icon_base64(rank)}");}}' for rank in sorted(ranks)
+    )
     table = f"""
+    <style>
+        .rank-icon {{ width:15px; height:15px; display:inline-block; vertical-align:middle; margin-right:8px; background-size:contain; background-repeat:no-repeat; }}
+        {icon_css}
+    </style>
     <div style="overflow:auto; max-height:640px; border:1px solid #1f2937; border-radius:10px; background: #0b1020;">
         <table style="border-collapse:collapse; width:100%; min-width:1200px; color:#e5e7eb;">
             <thead style="position:sticky; top:0; z-index:10;">
@@ -97,9 +133,14 @@ def render_database_table(df):
             </tbody>
         </table>
     </div>
+    <div style="padding:6px 4px; color:#9ca3af; font-size:12px;">Page {page} of {n_pages} &middot; {len(df)} players</div>
     """
     return table
 
+def render_database_page(page):
+    """Re-render the database table at another page without recomputing stats"""
+    return render_database_table(global_context["database"], page)
+
 # Load custom CSS
 def load_css():
     try:
@@ -120,13 +161,12 @@ def init_database(df):
     df["APM"] = (df["TAssists"] / df["Matches"]).round(2)
     df["K/D"] = (df["TKills"] / df["TDeaths"]).round(2)
     df["ADR"] = (df["TADR"] / df["Matches"]).round(2)
-    df["Rating"] = 0.28 * df["K/D"] + 0.02 * df["KPM"] + 0.006 * df["APM"] + 0.0058 * df["ADR"]
-    df["Rating"] = df["Rating"].round(2)
+    df["Rating"] = rating_formulas.season_ratings(df)
     df = df.fillna(0)
     df.sort_values('Rating', ascending=False)
     return df
 
-def update_database():
+def update_database(page=1):
     # Use the dataframe from global_context
     df_source = global_context["database"]
     df_new = df_source.round(2)
@@ -136,7 +176,7 @@ def update_database():
     df_new["APM"] = (df_source["TAssists"] / df_new["Matches"]).round(2)
     df_new["K/D"] = (df_source["TKills"] / df_source["TDeaths"]).round(2)
     df_new["ADR"] = (df_source["TADR"] / df_new["Matches"]).round(2)
-    df_new["Rating"] = (0.28 * df_new["K/D"] + 0.02 * df_new["KPM"] + 0.006 * df_new["APM"] + 0.0058 * df_new["ADR"]).round(2)
+    df_new["Rating"] = rating_formulas.season_ratings(df_new)
     # df_new = df_new.round(2)
     df_new = df_new.fillna(0)
     df_new = df_new.sort_values('ELO', ascending=False)
@@ -152,8 +192,8 @@ def update_database():
     online_df = get_random_players(df_new)
     online_list = gr.Textbox(value=online_df["Name"].to_list(), label="Online Players", interactive=True)
     
-    # Generate HTML table from SQL database
-    db_html = render_database_table(df_new)
+    # Generate HTML table from SQL database (only rows whose stats changed are re-rendered)
+    db_html = render_database_table(df_new, page)
     
     # # OLD: DataFrame display (commented out)
     # # Add rank icons to the display dataframe
@@ -210,7 +250,7 @@ def init_game(t1p1, t1p2, t1p3, t1p4, t1p5, t2p1, t2p2, t2p3, t2p4, t2p5):
 
 
 def get_rating(kd, kpm, apm, dpm, adr):
-    return round(0.65*kd + 0.024*kpm + 0.016*apm - 0.025*dpm + 0.0035*adr,2)
+    return elo_engine.get_rating(kd, kpm, apm, dpm, adr)
 
 def get_online(df):
     return df[df["Online"] == 1]
@@ -245,14 +285,13 @@ def save_database_csv():
 #     return True
 
 def save_match_history(team_1_result, team_2_result):
-    os.makedirs('./match_history', exist_ok=True)
-    match_num = len(os.listdir('./match_history'))
-    os.makedirs(f'./match_history/match_{match_num+1}', exist_ok=True)
-    team_1_result.to_csv(f'./match_history/match_{match_num+1}/t1.csv', index=False)
-    team_2_result.to_csv(f'./match_history/match_{match_num+1}/t2.csv', index=False)
+    match_path = seasons.match_dir(seasons.next_match_num())
+    os.makedirs(match_path, exist_ok=True)
+    team_1_result.to_csv(f'{match_path}/t1.csv', index=False)
+    team_2_result.to_csv(f'{match_path}/t2.csv', index=False)
 
 
-def submit_match(result_1, result_2, t1_gain, t2_gain, win_team):
+def submit_match(result_1, result_2, t1_gain, t2_gain, win_team, page=1):
     players_1 = result_1["Name"].to_list()
     players_2 = result_2["Name"].to_list()
     average_elo = (df.loc[df["Name"].isin(players_1)]["ELO"].sum() + df.loc[df["Name"].isin(players_2)]["ELO"].sum())//10
@@ -304,7 +343,7 @@ def submit_match(result_1, result_2, t1_gain, t2_gain, win_team):
     global_context["database"] = df
     # Sync to SQL database
     db.bulk_update_from_dataframe(df)
-    db_html, top_1, top_2, top_3, _ = update_database()
+    db_html, top_1, top_2, top_3, _ = update_database(page)
     return db_html, top_1, top_2, top_3, online_list
 
 def get_init_match(online_list, database):
@@ -371,6 +410,7 @@ if __name__ == '__main__':
     # Initialize SQL database from CSV if not exists
     if not db.database_exists():
         db.init_database_from_csv('./vct_ss4.csv')
+    db_connection.configure(db.DB_PATH)
     
     with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as app:
         df = global_context["database"]
@@ -394,6 +434,8 @@ if __name__ == '__main__':
             
             # NEW: HTML table display from SQL database
             db_html = gr.HTML(render_database_table(df), label="Database")
+            with gr.Row():
+                db_page = gr.Number(value=1, label=f"Page ({DB_PAGE_SIZE} players per page)", precision=0, minimum=1, scale=0)
             
             # # OLD: DataFrame display (commented out)
             # # Add rank icons to the display dataframe
@@ -410,7 +452,8 @@ if __name__ == '__main__':
             # )
         
         save_button.click(save_database_csv, None, None)
-        update_button.click(update_database, None, [db_html, top_1, top_2, top_3, online_list])
+        update_button.click(update_database, [db_page], [db_html, top_1, top_2, top_3, online_list])
+        db_page.change(render_database_page, db_page, db_html)
 
         with gr.Tab("Live game"):
             with gr.Row():
@@ -471,7 +514,7 @@ if __name__ == '__main__':
             # gr.BarPlot(df, x="Matches", y="Wins", y_aggregate="sum", x_bin=1)
         # create_button.click(init_game, [t1p1, t1p2, t1p3, t1p4, t1p5, t2p1, t2p2, t2p3, t2p4, t2p5], [team_1, team_2, elo_diff, t1_gain, t2_gain, win_team])
         create_button.click(get_init_match, [online_list, db_html], [team_1, team_2, map, elo_diff, t1_gain, t2_gain, win_team, command])
-        submit_button.click(submit_match, [team_1_result, team_2_result, t1_gain, t2_gain, win_team], [db_html, top_1, top_2, top_3])
+        submit_button.click(submit_match, [team_1_result, team_2_result, t1_gain, t2_gain, win_team, db_page], [db_html, top_1, top_2, top_3])
         save_button.click(save_match_history, [team_1_result, team_2_result], None)
         
 
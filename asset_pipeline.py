@@ -0,0 +1,172 @@
+"""Fingerprinted, pre-compressed static assets for /assets.
+
+build() walks the assets folder and writes into assets/build/:
+    <name>.<hash>.<ext>          content-hashed copy of every asset
+    <name>.<hash>.<ext>.gz       gzip variant of text assets (SVG, CSS, JS, JSON)
+    <name>.<hash>.w<W>.webp      resized WebP thumbnails of the map images
+plus manifest.json mapping each source path ("maps/inferno.jpg") to its
+outputs. Outputs are named by content, so unchanged assets are skipped on the
+next build and every built file can be served with an immutable
+Cache-Control header.
+
+Usage:
+    python asset_pipeline.py            # build (incremental)
+    python asset_pipeline.py --clean    # rebuild everything
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+ASSETS_DIR = 'assets'
+BUILD_DIRNAME = 'build'
+MANIFEST_FILENAME = 'manifest.json'
+THUMBNAIL_DIRS = ('maps',)
+THUMBNAIL_WIDTHS = (480,)
+WEBP_QUALITY = 80
+GZIP_EXTENSIONS = {'.svg', '.css', '.js', '.json', '.txt'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def build_dir(assets_dir=ASSETS_DIR):
+    return os.path.join(assets_dir, BUILD_DIRNAME)
+
+
+def fingerprint(path, length=12):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+def iter_sources(assets_dir=ASSETS_DIR):
+    """Relative paths of the source assets (the build folder and dotfiles excluded)"""
+    for root, dirs, files in os.walk(assets_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.')
+                         and os.path.join(root, d) != build_dir(assets_dir))
+        for filename in sorted(files):
+            if not filename.startswith('.'):
+                yield os.path.relpath(os.path.join(root, filename), assets_dir).replace(os.sep, '/')
+
+
+def _write_gzip(path):
+    with open(path, 'rb') as src:
+        data = gzip.compress(src.read(), compresslevel=9, mtime=0)
+    with open(path + '.gz.tmp', 'wb') as dst:
+        dst.write(data)
+    os.replace(path + '.gz.tmp', path + '.gz')
+
+
+def _write_thumbnails(src_path, out_base, widths):
+    """WebP thumbnails no wider than each width; returns {width: output path}"""
+    from PIL import Image
+
+    outputs = {}
+    with Image.open(src_path) as image:
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for width in widths:
+            out_path = f"{out_base}.w{width}.webp"
+            if not os.path.exists(out_path):
+                thumb = image.copy()
+                thumb.thumbnail((width, width * 4))
+                tmp_path = out_path + '.tmp'
+                thumb.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+                os.replace(tmp_path, out_path)
+            outputs[width] = out_path
+    return outputs
+
+
+def build(assets_dir=ASSETS_DIR, clean=False):
+    """Build fingerprinted copies, gzip variants and thumbnails; returns the manifest"""
+    out_dir = build_dir(assets_dir)
+    if clean:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {}
+    for rel in iter_sources(assets_dir):
+        src_path = os.path.join(assets_dir, rel)
+        stem, ext = os.path.splitext(rel)
+        digest = fingerprint(src_path)
+        hashed = f"{stem}.{digest}{ext.lower()}"
+        out_path = os.path.join(out_dir, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if not os.path.exists(out_path):
+            shutil.copyfile(src_path, out_path + '.tmp')
+            os.replace(out_path + '.tmp', out_path)
+        entry = {"path": hashed}
+
+        if ext.lower() in GZIP_EXTENSIONS:
+            if not os.path.exists(out_path + '.gz'):
+                _write_gzip(out_path)
+            entry["gzip"] = True
+
+        if rel.split('/', 1)[0] in THUMBNAIL_DIRS and ext.lower() in ('.jpg', '.jpeg', '.png', '.webp'):
+            try:
+                thumbs = _write_thumbnails(src_path, os.path.join(out_dir, f"{stem}.{digest}"), THUMBNAIL_WIDTHS)
+                entry["thumbnails"] = {str(w): os.path.relpath(p, out_dir).replace(os.sep, '/')
+                                       for w, p in thumbs.items()}
+            except Exception as e:
+                print(f"Warning: could not create thumbnails for {rel}: {e}")
+        manifest[rel] = entry
+
+    _prune(out_dir, manifest)
+    tmp_path = os.path.join(out_dir, MANIFEST_FILENAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_FILENAME))
+    return manifest
+
+
+def _prune(out_dir, manifest):
+    """Remove built files that no longer belong to any source asset"""
+    keep = {MANIFEST_FILENAME}
+    for entry in manifest.values():
+        keep.add(entry["path"])
+        if entry.get("gzip"):
+            keep.add(entry["path"] + '.gz')
+        keep.update(entry.get("thumbnails", {}).values())
+    for root, _, files in os.walk(out_dir):
+        for filename in files:
+            rel = os.path.relpath(os.path.join(root, filename), out_dir).replace(os.sep, '/')
+            if rel not in keep:
+                os.remove(os.path.join(root, filename))
+
+
+def load_manifest(assets_dir=ASSETS_DIR):
+    try:
+        with open(os.path.join(build_dir(assets_dir), MANIFEST_FILENAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_urls(manifest, prefix='/assets/build/'):
+    """Source path -> URL of its fingerprinted file, and of its smallest thumbnail when it has one"""
+    urls = {}
+    for rel, entry in manifest.items():
+        thumbs = entry.get("thumbnails") or {}
+        urls[rel] = {
+            "url": prefix + entry["path"],
+            "thumbnail": prefix + thumbs[min(thumbs, key=int)] if thumbs else None,
+        }
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, compressed and resized static assets")
+    parser.add_argument("--assets", default=ASSETS_DIR)
+    parser.add_argument("--clean", action="store_true", help="Delete the build folder first")
+    args = parser.parse_args()
+    manifest = build(args.assets, clean=args.clean)
+    total = sum(os.path.getsize(os.path.join(build_dir(args.assets), e["path"])) for e in manifest.values())
+    thumbs = sum(os.path.getsize(os.path.join(build_dir(args.assets), p))
+                 for e in manifest.values() for p in e.get("thumbnails", {}).values())
+    print(f"Built {len(manifest)} assets ({total / 1024:.0f} KB originals, {thumbs / 1024:.0f} KB thumbnails)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""Endpoint latency/allocation benchmarks on synthetic leagues.
+
+For every league size in the grid a fresh league is generated in a temporary
+directory (see synthetic_league.py), web_app is imported against it in a
+child process and each route is driven through Flask's test client:
+
+    GET  /api/database
+    POST /api/create-match
+    POST /api/submit-match
+    GET  /api/records
+    GET  /api/player-stats/<name>
+
+Latency percentiles come from untraced calls; allocations (peak and net
+bytes per call, via tracemalloc) from a separate traced pass so tracing does
+not distort the timings. Results are compared against a JSON baseline and
+any route whose p95 or peak allocation grew beyond --tolerance is flagged.
+
+    python benchmarks/bench_endpoints.py --grid 50x100,500x10000
+    python benchmarks/bench_endpoints.py --update-baseline
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_GRID = "50x100,50x10000,500x100,500x10000,5000x100,5000x10000"
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline_endpoints.json')
+ROUTES = ["database", "create-match", "submit-match", "records", "player-stats"]
+
+
+def percentiles(samples):
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def _random_line(rng, name, won):
+    k = rng.randint(8, 30) + (3 if won else 0)
+    return {"Name": name, "K": k, "D": rng.randint(8, 28), "A": rng.randint(0, 12),
+            "ADR": rng.randint(40, 140), "MVP": 0}
+
+
+class RouteDriver:
+    """One call per route against the Flask test client"""
+
+    def __init__(self, client, names, seed=0):
+        self.client = client
+        self.names = names
+        self.rng = random.Random(seed)
+
+    def _check(self, response, route):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{route} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response
+
+    def database(self):
+        self._check(self.client.get('/api/database'), 'database')
+
+    def create_match(self):
+        online = self.rng.sample(self.names, min(len(self.names), 20))
+        response = self._check(self.client.post('/api/create-match', json={"online_players": online}), 'create-match')
+        return response.get_json()
+
+    def submit_match(self):
+        lobby = self.create_match()
+        t1_won = self.rng.random() < 0.5
+        team_1 = [_random_line(self.rng, p["name"], t1_won) for p in lobby["team_1"]]
+        team_2 = [_random_line(self.rng, p["name"], not t1_won) for p in lobby["team_2"]]
+        winners = team_1 if t1_won else team_2
+        max(winners, key=lambda line: line["K"])["MVP"] = 1
+        payload = {
+            "team_1_result": team_1, "team_2_result": team_2,
+            "t1_gain": lobby["t1_gain"], "t2_gain": lobby["t2_gain"],
+            "win_team": "Team 1" if t1_won else "Team 2",
+            "team1_score": 16 if t1_won else 11, "team2_score": 11 if t1_won else 16,
+            "map": lobby["map"],
+        }
+        self._check(self.client.post('/api/submit-match', json=payload), 'submit-match')
+
+    def records(self):
+        self._check(self.client.get('/api/records'), 'records')
+
+    def player_stats(self):
+        name = self.rng.choice(self.names)
+        self._check(self.client.get(f'/api/player-stats/{name}'), 'player-stats')
+
+    def call(self, route):
+        getattr(self, route.replace('-', '_'))()
+
+
+def measure_route(driver, route, repeat, traced_repeat):
+    # submit-match times a full cycle: lobby draw plus submission
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        driver.call(route)
+        timings.append(time.perf_counter() - started)
+
+    peaks, nets = [], []
+    tracemalloc.start()
+    for _ in range(traced_repeat):
+        tracemalloc.clear_traces()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        driver.call(route)
+        after, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        nets.append(after - before)
+    tracemalloc.stop()
+
+    result = percentiles(timings)
+    result["alloc_peak_kb"] = round(float(np.median(peaks)) / 1024, 1) if peaks else None
+    result["alloc_net_kb"] = round(float(np.median(nets)) / 1024, 1) if nets else None
+    result["calls"] = repeat
+    return result
+
+
+def run_worker(n_players, n_matches, repeat, traced_repeat, seed, out_path):
+    """Build one league and benchmark it (runs in its own process: web_app initializes on import)"""
+    with tempfile.TemporaryDirectory(prefix='league_') as league_dir:
+        sys.path.insert(0, REPO_ROOT)
+        os.chdir(league_dir)
+        os.symlink(os.path.join(REPO_ROOT, 'assets'), os.path.join(league_dir, 'assets'))
+
+        import database as db
+        db.DB_PATH = os.path.join(league_dir, os.path.basename(db.DB_PATH))
+        sys.path.insert(0, BENCH_DIR)
+        import synthetic_league
+
+        started = time.perf_counter()
+        log = synthetic_league.build_league(league_dir, n_players, n_matches, seed=seed)
+        generated = time.perf_counter() - started
+
+        started = time.perf_counter()
+        import web_app
+        startup = time.perf_counter() - started
+
+        driver = RouteDriver(web_app.app.test_client(), [str(n) for n in log["names"]], seed=seed)
+        for route in ROUTES:
+            driver.call(route)  # warm caches (icons, win model) before measuring
+
+        report = {
+            "players": n_players,
+            "matches": n_matches,
+            "generate_s": round(generated, 2),
+            "startup_s": round(startup, 2),
+            "routes": {route: measure_route(driver, route, repeat, traced_repeat) for route in ROUTES},
+        }
+        os.chdir(REPO_ROOT)
+    with open(out_path, 'w') as f:
+        json.dump(report, f)
+
+
+def parse_grid(text):
+    sizes = []
+    for item in text.split(','):
+        players, _, matches = item.strip().lower().partition('x')
+        sizes.append((int(players), int(matches)))
+    return sizes
+
+
+def find_regressions(results, baseline, tolerance):
+    """Routes whose p95 latency or peak allocation exceeds the baseline by more than tolerance"""
+    flagged = []
+    for key, report in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for route, current in report["routes"].items():
+            previous = base["routes"].get(route)
+            if not previous:
+                continue
+            for metric in ("p95_ms", "alloc_peak_kb"):
+                old, new = previous.get(metric), current.get(metric)
+                if old and new and new > old * (1 + tolerance):
+                    flagged.append(f"{key} {route} {metric}: {old} -> {new} (+{(new / old - 1):.0%})")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the league API on synthetic leagues")
+    parser.add_argument("--grid", default=DEFAULT_GRID, help="Comma-separated <players>x<matches> sizes")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed calls per route")
+    parser.add_argument("--traced-repeat", type=int, default=5, help="Calls per route under tracemalloc")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth before flagging")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    parser.add_argument("--worker", nargs=2, type=int, metavar=("PLAYERS", "MATCHES"), help=argparse.SUPPRESS)
+    parser.add_argument("--worker-out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.repeat, args.traced_repeat, args.seed, args.worker_out)
+        return
+
+    results = {}
+    for n_players, n_matches in parse_grid(args.grid):
+        key = f"{n_players}x{n_matches}"
+        print(f"[{key}] generating league and benchmarking...", flush=True)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            out_path = tmp.name
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__),
+                            "--worker", str(n_players), str(n_matches),
+                            "--worker-out", out_path, "--repeat", str(args.repeat),
+                            "--traced-repeat", str(args.traced_repeat), "--seed", str(args.seed)],
+                           check=True)
+            with open(out_path) as f:
+                results[key] = json.load(f)
+        finally:
+            os.remove(out_path)
+
+        report = results[key]
+        print(f"  generated in {report['generate_s']}s, app startup {report['startup_s']}s")
+        for route, r in report["routes"].items():
+            print(f"  {route:<14} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  "
+                  f"p99 {r['p99_ms']:>9.2f}ms  peak {r['alloc_peak_kb']:>10.1f}KB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions" if baseline else "No baseline yet, run with --update-baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Accuracy vs latency of the OCR preprocessing profiles.
+
+Scoreboards come from --samples (image files with a sidecar
+<image>.json {"players": [{"name", "k", "d", "a", "adr", "mvp"}]}) or, by
+default, are rendered synthetically at 1080p: ten rows of names and stats
+over a noisy dark background, JPEG-compressed like a screenshot.
+
+For every profile this reports per-stage preprocessing time and, when
+EasyOCR is installed, cell accuracy: the share of expected name and stat
+cells that appear verbatim among the OCR tokens, plus OCR time.
+
+    python benchmarks/bench_ocr.py --synthetic 6
+    python benchmarks/bench_ocr.py --samples ./scoreboards --profiles quality,fast
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import ocr_pipeline  # noqa: E402
+import synthetic_league  # noqa: E402
+
+
+def render_scoreboard(rng, names, width=1920, height=1080, jpeg_quality=70):
+    """(encoded image bytes, expected players) for one synthetic scoreboard"""
+    img = np.full((height, width, 3), (32, 24, 20), dtype=np.uint8)
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 12, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    columns = [("Name", 140), ("K", 900), ("D", 1020), ("A", 1140), ("ADR", 1260), ("MVP", 1420)]
+    for label, x in columns:
+        cv2.putText(img, label, (x, 180), font, 1.0, (180, 200, 220), 2, cv2.LINE_AA)
+    players = []
+    for row, name in enumerate(rng.sample(names, 10)):
+        y = 250 + row * 72 + (30 if row >= 5 else 0)
+        shade = (70, 52, 40) if row % 2 else (52, 40, 32)
+        cv2.rectangle(img, (120, y - 45), (1560, y + 20), shade, -1)
+        player = {"name": name, "k": rng.randint(3, 32), "d": rng.randint(5, 25), "a": rng.randint(0, 12),
+                  "adr": round(rng.uniform(35, 160), 1), "mvp": rng.randint(0, 6)}
+        cells = [player["name"], player["k"], player["d"], player["a"], player["adr"], player["mvp"]]
+        for (_, x), value in zip(columns, cells):
+            cv2.putText(img, str(value), (x, y), font, 1.0, (235, 235, 235), 2, cv2.LINE_AA)
+        players.append(player)
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    return encoded.tobytes(), players
+
+
+def load_samples(folder):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(folder, '*'))):
+        if path.endswith('.json') or not os.path.exists(path + '.json'):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path + '.json') as f:
+            samples.append((data, json.load(f)["players"]))
+    return samples
+
+
+def expected_cells(players):
+    cells = []
+    for p in players:
+        cells.append(str(p["name"]).lower())
+        cells += [str(p[c]) for c in ("k", "d", "a", "mvp")]
+        cells.append(f'{float(p["adr"]):g}')
+    return cells
+
+
+def cell_accuracy(results, players):
+    """Share of expected cells found among OCR tokens (each token counts once)"""
+    tokens = []
+    for _, text, _ in results:
+        tokens.append(text.strip().lower())
+        tokens += text.strip().lower().split()
+    remaining = {}
+    for token in tokens:
+        remaining[token] = remaining.get(token, 0) + 1
+    found = 0
+    cells = expected_cells(players)
+    for cell in cells:
+        if remaining.get(cell, 0) > 0:
+            remaining[cell] -= 1
+            found += 1
+    return found / max(len(cells), 1)
+
+
+def bench_profile(profile, samples, reader, repeat):
+    stage_times = {}
+    total_times, ocr_times, accuracies = [], [], []
+    for data, players in samples:
+        per_sample = []
+        for _ in range(repeat):
+            timings = {}
+            started = time.perf_counter()
+            processed = ocr_pipeline.preprocess(data, profile, timings)
+            per_sample.append(time.perf_counter() - started)
+            for stage, seconds in timings.items():
+                stage_times.setdefault(stage, []).append(seconds)
+        total_times.append(float(np.median(per_sample)))
+        if reader is not None:
+            started = time.perf_counter()
+            results = reader.readtext(processed)
+            ocr_times.append(time.perf_counter() - started)
+            accuracies.append(cell_accuracy(results, players))
+    return {
+        "profile": profile,
+        "preprocess_ms": round(float(np.median(total_times)) * 1000, 2),
+        "stages_ms": {stage: round(float(np.median(t)) * 1000, 2) for stage, t in stage_times.items()},
+        "ocr_ms": round(float(np.median(ocr_times)) * 1000, 2) if ocr_times else None,
+        "accuracy": round(float(np.mean(accuracies)), 4) if accuracies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR preprocessing profiles for accuracy and latency")
+    parser.add_argument("--profiles", default=",".join(ocr_pipeline.PROFILES))
+    parser.add_argument("--samples", default=None, help="Folder of scoreboard images with <image>.json ground truth")
+    parser.add_argument("--synthetic", type=int, default=4, help="Synthetic scoreboards when --samples is not given")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-ocr", action="store_true", help="Only time preprocessing")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.samples:
+        samples = load_samples(args.samples)
+    else:
+        rng = random.Random(args.seed)
+        names = synthetic_league.player_names(50)
+        samples = [render_scoreboard(rng, names) for _ in range(args.synthetic)]
+    if not samples:
+        sys.exit("No samples found")
+
+    reader = None
+    if not args.no_ocr:
+        try:
+            import easyocr
+            reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+        except Exception as e:
+            print(f"EasyOCR not available ({e}); reporting preprocessing latency only", file=sys.stderr)
+
+    rows = [bench_profile(p, samples, reader, args.repeat) for p in args.profiles.split(",")]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{len(samples)} scoreboards")
+    for r in rows:
+        accuracy = f"{r['accuracy'] * 100:5.1f}%" if r["accuracy"] is not None else "  n/a"
+        ocr = f"{r['ocr_ms']:8.1f}" if r["ocr_ms"] is not None else "     n/a"
+        print(f"  {r['profile']:<9} preprocess {r['preprocess_ms']:8.2f} ms   ocr {ocr} ms   accuracy {accuracy}")
+        print("            " + "  ".join(f"{s} {ms:.2f}" for s, ms in r["stages_ms"].items()))
+
+
+if __name__ == '__main__':
+    main()
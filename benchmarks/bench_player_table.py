@@ -0,0 +1,171 @@
+"""PlayerTable vs DataFrame on the request hot paths.
+
+Compares memory and latency for the three paths PlayerTable replaced:
+leaderboard rows (/api/database), lineup lookups and ELO sums
+(/api/create-match, 10 candidate splits) and the per-player stat update of
+/api/submit-match, and checks that both submit paths produce the same table.
+
+    python benchmarks/bench_player_table.py --players 50,500,5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import elo_replay  # noqa: E402
+import synthetic_league  # noqa: E402
+from player_table import PlayerTable  # noqa: E402
+
+LEADERBOARD_FIELDS = {
+    "name": ("Name", None), "elo": ("ELO", None), "rating": ("Rating", 2), "matches": ("Matches", None),
+    "wins": ("Wins", None), "losses": ("Losses", None), "kd": ("K/D", 2), "kpr": ("KPR", 3),
+    "dpr": ("DPR", 3), "apr": ("APR", 3), "adr": ("ADR", 2),
+}
+
+
+def league_table(n_players, n_matches, seed=0):
+    log = synthetic_league.generate_log(n_players, n_matches, seed=seed)
+    df = elo_replay.replay_log(log, log["names"].tolist())["table"]
+    return df.sort_values("ELO", ascending=False).reset_index(drop=True)
+
+
+def leaderboard_pandas(df):
+    players = []
+    for i, (_, row) in enumerate(df.iterrows()):
+        players.append({
+            "name": row["Name"], "elo": int(row["ELO"]), "elo_rank": int(i + 1),
+            "rating": round(row["Rating"], 2), "matches": int(row["Matches"]),
+            "wins": int(row["Wins"]), "losses": int(row["Losses"]), "kd": round(row["K/D"], 2),
+            "kpr": round(row.get("KPR", 0.0), 3), "dpr": round(row.get("DPR", 0.0), 3),
+            "apr": round(row.get("APR", 0.0), 3), "adr": round(row["ADR"], 2),
+        })
+    return players
+
+
+def leaderboard_table(table):
+    players = table.json_rows(LEADERBOARD_FIELDS)
+    for i, player in enumerate(players):
+        player["elo_rank"] = i + 1
+    return players
+
+
+def lobby_pandas(df, online, rng):
+    sums = []
+    for _ in range(10):
+        team_1 = rng.sample(online, 5)
+        team_2 = rng.sample([p for p in online if p not in team_1], 5)
+        sums.append((df.loc[df["Name"].isin(team_1)]["ELO"].sum(), df.loc[df["Name"].isin(team_2)]["ELO"].sum()))
+    return sums
+
+
+def lobby_table(table, online, rng):
+    elo = table["ELO"]
+    sums = []
+    for _ in range(10):
+        team_1 = rng.sample(online, 5)
+        team_2 = rng.sample([p for p in online if p not in team_1], 5)
+        sums.append((int(elo[table.indices(team_1)].sum()), int(elo[table.indices(team_2)].sum())))
+    return sums
+
+
+def submit_pandas(df, lines, won, deltas, total_rounds, label):
+    """The per-player .loc update submit_match used before PlayerTable"""
+    for line, w, delta in zip(lines, won, deltas):
+        player = line["Name"]
+        k, d, a, adr, mvp = line["K"], line["D"], line["A"], line["ADR"], line["MVP"]
+        kpr = round(k / total_rounds, 3)
+        dpr = round(d / total_rounds, 3)
+        apr = round(a / total_rounds, 3)
+        df.loc[df["Name"] == player, "Matches"] += 1
+        df.loc[df["Name"] == player, "Wins" if w else "Losses"] += 1
+        df.loc[df["Name"] == player, "TKills"] += k
+        df.loc[df["Name"] == player, "TDeaths"] += d
+        df.loc[df["Name"] == player, "TAssists"] += a
+        df.loc[df["Name"] == player, "TADR"] += adr
+        if w:
+            df.loc[df["Name"] == player, "MVP"] += mvp
+        m = df.loc[df["Name"] == player, "Matches"].values[0]
+        for col, value in (("KPR", kpr), ("DPR", dpr), ("APR", apr)):
+            old = df.loc[df["Name"] == player, col].values[0]
+            df.loc[df["Name"] == player, col] = round((old * (m - 1) + value) / m, 3) if m > 1 else value
+        history = str(df.loc[df["Name"] == player, "MatchHistory"].values[0])
+        df.loc[df["Name"] == player, "MatchHistory"] = f"{history},{label}" if history else label
+        df.loc[df["Name"] == player, "ELO"] += delta
+    return df
+
+
+def submit_table(df, lines, won, deltas, total_rounds, label):
+    table = PlayerTable.from_dataframe(df)
+    table.apply_match([line["Name"] for line in lines], *([line[c] for line in lines] for c in ("K", "D", "A", "ADR", "MVP")),
+                      won, deltas, total_rounds, label)
+    return table.to_dataframe()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples)) * 1000
+
+
+def run(n_players, n_matches, repeat, seed):
+    df = league_table(n_players, n_matches, seed)
+    table = PlayerTable.from_dataframe(df)
+    rng = random.Random(seed)
+    names = df["Name"].tolist()
+    online = rng.sample(names, min(len(names), 20))
+
+    lineup = rng.sample(names, 10)
+    won = [True] * 5 + [False] * 5
+    lines = [{"Name": n, "K": rng.randint(5, 30), "D": rng.randint(5, 25), "A": rng.randint(0, 10),
+              "ADR": rng.randint(40, 140), "MVP": int(i == 0)} for i, n in enumerate(lineup)]
+    deltas = [rng.randint(-30, 40) for _ in lineup]
+
+    expected = submit_pandas(df.copy(), lines, won, deltas, 28, "match_x").set_index("Name")
+    actual = submit_table(df, lines, won, deltas, 28, "match_x").set_index("Name")
+    cols = ["ELO", "Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "Matches", "KPR", "DPR", "APR", "MatchHistory"]
+    same = all((expected.loc[lineup, c].values == actual.loc[lineup, c].values).all() for c in cols)
+
+    return {
+        "players": n_players,
+        "memory_kb": {"dataframe": round(df.memory_usage(deep=True).sum() / 1024, 1),
+                      "player_table": round(table.nbytes() / 1024, 1)},
+        "leaderboard_ms": {"dataframe": timed(lambda: leaderboard_pandas(df), repeat),
+                           "player_table": timed(lambda: leaderboard_table(PlayerTable.from_dataframe(df)), repeat)},
+        "lobby_ms": {"dataframe": timed(lambda: lobby_pandas(df, online, rng), repeat),
+                     "player_table": timed(lambda: lobby_table(table, online, rng), repeat)},
+        "submit_ms": {"dataframe": timed(lambda: submit_pandas(df.copy(), lines, won, deltas, 28, "m"), repeat),
+                      "player_table": timed(lambda: submit_table(df, lines, won, deltas, 28, "m"), repeat)},
+        "submit_equal": same,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PlayerTable with the DataFrame hot paths")
+    parser.add_argument("--players", default="50,500,5000")
+    parser.add_argument("--matches-per-player", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for n_players in (int(p) for p in args.players.split(",")):
+        r = run(n_players, n_players * args.matches_per_player, args.repeat, args.seed)
+        print(f"[{n_players} players] submit results identical: {r['submit_equal']}")
+        for metric in ("memory_kb", "leaderboard_ms", "lobby_ms", "submit_ms"):
+            old, new = r[metric]["dataframe"], r[metric]["player_table"]
+            print(f"  {metric:<15} DataFrame {old:>10.2f}   PlayerTable {new:>10.2f}   ({old / max(new, 1e-9):.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""SQLite cost of the submit and read routes, before and after the connection pool.
+
+Replays the database calls web_app makes per request against a temporary
+on-disk database, each request on a new thread as Flask's threaded server
+runs them:
+
+    submit  db.create_match_record, db.update_map_stats,
+            map_stats.record_match, db.bulk_update_from_dataframe (all
+            players) and db.upsert_daily_elo_snapshots (the lineup)
+    read    db.get_all_players (/api/database) and map_stats.player_maps
+            (/api/player-stats)
+
+The database module is not part of this tree, so its helpers are emulated
+the way it works: each opens, commits and closes its own connection. Only
+the map_stats calls differ between the two modes:
+
+    before  rollback-journal database file, map_stats connecting per call
+            (the tree before db_connection)
+    after   db_connection.configure() has switched the file to WAL (which
+            the database module's own connections then use, with their
+            default synchronous=FULL); map_stats uses the real module and
+            its pooled connections
+
+    python benchmarks/bench_sqlite.py --players 60 --requests 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+import db_connection  # noqa: E402
+import map_stats  # noqa: E402
+
+PLAYER_COLUMNS = ["Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "Matches",
+                  "KPM", "DPM", "APM", "K/D", "ADR", "Rating", "ELO", "KPR", "DPR", "APR"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (Name TEXT PRIMARY KEY, %s, MatchHistory TEXT DEFAULT '');
+CREATE TABLE IF NOT EXISTS matches (match_num INTEGER PRIMARY KEY, team1 TEXT, team2 TEXT, team1_score INTEGER,
+    team2_score INTEGER, winning_team TEXT, map_name TEXT, total_rounds INTEGER);
+CREATE TABLE IF NOT EXISTS map_stats (map_name TEXT PRIMARY KEY, num_games INTEGER, total_rounds INTEGER);
+CREATE TABLE IF NOT EXISTS elo_history (Name TEXT, day TEXT, elo INTEGER, PRIMARY KEY (Name, day));
+""" % ", ".join(f'"{c}" REAL DEFAULT 0' for c in PLAYER_COLUMNS)
+
+
+def create_database(path, n_players):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA + map_stats.SCHEMA)
+    names = [f"player{i:04d}" for i in range(n_players)]
+    with conn:
+        conn.executemany('INSERT INTO players (Name, ELO) VALUES (?, 1000)', [(n,) for n in names])
+    conn.close()
+    return names
+
+
+def helper(path, statements):
+    """One database-module helper: its own connection, one commit"""
+    conn = sqlite3.connect(path)
+    try:
+        results = [conn.executemany(sql, params) if many else conn.execute(sql, params).fetchall()
+                   for sql, params, many in statements]
+        conn.commit()
+        return results
+    finally:
+        conn.close()
+
+
+class Before:
+    """map_stats as it was: a fresh connection per call"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def record_match(self, map_name, lines, rounds):
+        rows = [("S1", n, map_name, int(won), int(not won), k, d, a, adr, rounds) for n, won, k, d, a, adr in lines]
+        helper(self.path, [(map_stats._UPSERT, rows, True),
+                           ('INSERT INTO player_map_stats_meta (season, matches) VALUES (?, 1) '
+                            'ON CONFLICT (season) DO UPDATE SET matches = matches + 1', ("S1",), False)])
+
+    def player_maps(self, name):
+        return helper(self.path, [(f'SELECT map_name, {", ".join(map_stats.STAT_COLUMNS)} FROM player_map_stats '
+                                   'WHERE season = ? AND Name = ? ORDER BY wins + losses DESC, map_name',
+                                   ("S1", name), False)])
+
+
+class After:
+    """The real map_stats module on pooled WAL connections"""
+
+    def __init__(self, path):
+        self.path = path
+        db_connection.configure(path)
+
+    def record_match(self, map_name, lines, rounds):
+        map_stats.record_match(map_name, lines, rounds, season="S1", db_path=self.path)
+
+    def player_maps(self, name):
+        return map_stats.player_maps(name, season="S1", db_path=self.path)
+
+
+def submit_request(backend, rng, names, match_num):
+    path = backend.path
+    lineup = rng.sample(names, 10)
+    map_name = rng.choice(["inferno", "mirage", "nuke", "ancient"])
+    rounds = rng.randint(16, 30)
+    helper(path, [('INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                   (match_num, ",".join(lineup[:5]), ",".join(lineup[5:]), 13, rounds - 13, "Team 1", map_name, rounds),
+                   False)])
+    helper(path, [('INSERT INTO map_stats VALUES (?, 1, ?) ON CONFLICT (map_name) DO UPDATE SET '
+                   'num_games = num_games + 1, total_rounds = total_rounds + excluded.total_rounds',
+                   (map_name, rounds), False)])
+    backend.record_match(map_name, [(n, i < 5, 20, 15, 4, 80) for i, n in enumerate(lineup)], rounds)
+    assignments = ", ".join(f'"{c}" = ?' for c in PLAYER_COLUMNS)
+    helper(path, [(f'UPDATE players SET {assignments} WHERE Name = ?',
+                   [tuple(rng.random() for _ in PLAYER_COLUMNS) + (n,) for n in names], True)])
+    helper(path, [('INSERT OR REPLACE INTO elo_history VALUES (?, ?, ?)',
+                   [(n, "2026-10-18", rng.randint(900, 1100)) for n in lineup], True)])
+
+
+def read_request(backend, rng, names):
+    helper(backend.path, [('SELECT * FROM players ORDER BY ELO DESC', (), False)])
+    backend.player_maps(rng.choice(names))
+
+
+def on_new_thread(fn, *args):
+    """Run one request on a fresh thread and return its wall time in ms"""
+    elapsed = []
+
+    def run():
+        started = time.perf_counter()
+        fn(*args)
+        elapsed.append((time.perf_counter() - started) * 1000)
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return elapsed[0]
+
+
+def bench(backend_cls, n_players, n_requests, seed):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "league.db")
+        names = create_database(path, n_players)
+        backend = backend_cls(path)
+        rng = random.Random(seed)
+        submit_ms, read_ms = [], []
+        for match_num in range(1, n_requests + 1):
+            submit_ms.append(on_new_thread(submit_request, backend, rng, names, match_num))
+            read_ms.append(on_new_thread(read_request, backend, rng, names))
+        db_connection.close_all()
+    return {"submit_ms": statistics.median(submit_ms), "read_ms": statistics.median(read_ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite cost of submit/read before and after the connection pool")
+    parser.add_argument("--players", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = {name: bench(cls, args.players, args.requests, args.seed)
+               for name, cls in (("before", Before), ("after", After))}
+    print(f"{args.requests} requests, {args.players} players (median ms per request, one thread per request)")
+    for name, r in results.items():
+        print(f"  {name:<8} submit {r['submit_ms']:8.3f}   read {r['read_ms']:7.3f}")
+    print(f"  speedup  submit {results['before']['submit_ms'] / results['after']['submit_ms']:7.2f}x  "
+          f"read {results['before']['read_ms'] / results['after']['read_ms']:6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""Load test replaying a match-night traffic mix against a running web_app.py.
+
+Virtual users (asyncio tasks) loop over weighted actions with a think time:
+
+    leaderboard    GET  /api/database
+    player-stats   GET  /api/player-stats/<name>
+    records        GET  /api/records
+    matches        GET  /api/all-matches
+    create         POST /api/create-match
+    submit         POST /api/submit-match (writes a match!) after a create-match
+                   call for the lobby, which is reported under "create"
+    upload         POST /api/upload-screenshot with assets/demo.png
+
+Requests go over plain asyncio streams (HTTP/1.1, one connection per
+request), so no client library is needed. The report gives throughput,
+p50/p95/p99 latency and error rate per action and overall.
+
+Submits write to the league, so point this at a copy or a synthetic league:
+
+    python benchmarks/synthetic_league.py --players 500 --matches 2000 --out /tmp/league
+    python benchmarks/load_test.py --start --app-dir /tmp/league --users 50 --duration 60
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --weight submit=0 --weight upload=0
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_endpoints import _random_line, percentiles  # noqa: E402
+
+DEFAULT_WEIGHTS = {
+    "leaderboard": 45,
+    "player-stats": 30,
+    "records": 8,
+    "matches": 5,
+    "create": 6,
+    "submit": 4,
+    "upload": 2,
+}
+SCREENSHOT_PATH = os.path.join(REPO_ROOT, 'assets', 'demo.png')
+
+
+class HttpError(Exception):
+    pass
+
+
+async def http_request(host, port, method, path, body=b"", content_type=None, timeout=60.0):
+    """Minimal HTTP/1.1 request; returns (status, body bytes)"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close",
+                   f"Content-Length: {len(body)}"]
+        if content_type:
+            headers.append(f"Content-Type: {content_type}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    try:
+        status = int(head.split(b" ", 2)[1])
+    except (IndexError, ValueError):
+        raise HttpError(f"Malformed response to {method} {path}")
+    if b"transfer-encoding: chunked" in head.lower():
+        payload = _dechunk(payload)
+    return status, payload
+
+
+def _dechunk(data):
+    out = bytearray()
+    while data:
+        size_line, _, rest = data.partition(b"\r\n")
+        size = int(size_line.split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        out += rest[:size]
+        data = rest[size + 2:]
+    return bytes(out)
+
+
+def multipart(field, filename, content, mime="image/png"):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {mime}\r\n\r\n").encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class LoadTest:
+    def __init__(self, url, users, duration, warmup, think_ms, weights, seed=0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.users = users
+        self.duration = duration
+        self.warmup = warmup
+        self.think = think_ms / 1000.0
+        self.actions = [a for a, w in weights.items() if w > 0]
+        self.weights = [weights[a] for a in self.actions]
+        self.rng = random.Random(seed)
+        self.names = []
+        self.screenshot = open(SCREENSHOT_PATH, 'rb').read() if os.path.exists(SCREENSHOT_PATH) else None
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.measuring = False
+
+    async def call(self, action, method, path, payload=None, raw=None, content_type=None):
+        if payload is not None:
+            raw, content_type = json.dumps(payload).encode(), "application/json"
+        started = time.perf_counter()
+        try:
+            status, body = await http_request(self.host, self.port, method, path, raw or b"", content_type)
+            ok = status < 400
+        except (OSError, asyncio.TimeoutError, HttpError):
+            status, body, ok = None, b"", False
+        elapsed = time.perf_counter() - started
+        if self.measuring:
+            self.latencies[action].append(elapsed)
+            if not ok:
+                self.errors[action] += 1
+        return json.loads(body) if ok and body else None
+
+    async def create(self, action="create"):
+        online = self.rng.sample(self.names, min(len(self.names), 20))
+        return await self.call(action, "POST", "/api/create-match", {"online_players": online})
+
+    async def submit(self):
+        # The lobby comes from a real create-match call, measured as "create"
+        lobby = await self.create()
+        if not lobby:
+            return
+        t1_won = self.rng.random() < 0.5
+        team_1 = [_random_line(self.rng, p["name"], t1_won) for p in lobby["team_1"]]
+        team_2 = [_random_line(self.rng, p["name"], not t1_won) for p in lobby["team_2"]]
+        max(team_1 if t1_won else team_2, key=lambda line: line["K"])["MVP"] = 1
+        await self.call("submit", "POST", "/api/submit-match", {
+            "team_1_result": team_1, "team_2_result": team_2,
+            "t1_gain": lobby["t1_gain"], "t2_gain": lobby["t2_gain"],
+            "win_team": "Team 1" if t1_won else "Team 2",
+            "team1_score": 16 if t1_won else 12, "team2_score": 12 if t1_won else 16,
+            "map": lobby["map"],
+        })
+
+    async def run_action(self, action):
+        if action == "leaderboard":
+            await self.call(action, "GET", "/api/database")
+        elif action == "player-stats":
+            await self.call(action, "GET", f"/api/player-stats/{quote(self.rng.choice(self.names))}")
+        elif action == "records":
+            await self.call(action, "GET", "/api/records")
+        elif action == "matches":
+            await self.call(action, "GET", "/api/all-matches")
+        elif action == "create":
+            await self.create()
+        elif action == "submit":
+            await self.submit()
+        elif action == "upload" and self.screenshot:
+            body, content_type = multipart("file", "scoreboard.png", self.screenshot)
+            await self.call(action, "POST", "/api/upload-screenshot", raw=body, content_type=content_type)
+
+    async def user(self, deadline):
+        while time.perf_counter() < deadline:
+            await self.run_action(self.rng.choices(self.actions, self.weights)[0])
+            if self.think:
+                await asyncio.sleep(self.rng.expovariate(1.0 / self.think))
+
+    async def run(self):
+        status, body = await http_request(self.host, self.port, "GET", "/api/database")
+        if status >= 400:
+            raise HttpError(f"/api/database returned {status}")
+        self.names = [p["name"] for p in json.loads(body)]
+        if len(self.names) < 10:
+            raise HttpError("The league needs at least 10 players")
+
+        started = time.perf_counter()
+        deadline = started + self.warmup + self.duration
+        users = [asyncio.create_task(self.user(deadline)) for _ in range(self.users)]
+        await asyncio.sleep(self.warmup)
+        self.measuring = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*users)
+        return self.report(time.perf_counter() - measured_from)
+
+    def report(self, elapsed):
+        actions = {}
+        all_latencies, all_errors = [], 0
+        for action, samples in sorted(self.latencies.items()):
+            all_latencies += samples
+            all_errors += self.errors[action]
+            actions[action] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "error_rate": round(self.errors[action] / len(samples), 4),
+                **percentiles(samples),
+            }
+        total = {"requests": len(all_latencies), "rps": round(len(all_latencies) / elapsed, 2),
+                 "error_rate": round(all_errors / len(all_latencies), 4) if all_latencies else 0.0}
+        if all_latencies:
+            total.update(percentiles(all_latencies))
+        return {"users": self.users, "duration_s": round(elapsed, 1), "total": total, "actions": actions}
+
+
+def start_server(app_dir, port):
+    """Run web_app (threaded, no reloader) from app_dir, waiting until it accepts connections"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, os.environ.get("PYTHONPATH", "")]))
+    if app_dir != REPO_ROOT and not os.path.exists(os.path.join(app_dir, 'assets')):
+        os.symlink(os.path.join(REPO_ROOT, 'assets'), os.path.join(app_dir, 'assets'))
+    code = (f"import database as db, os; db.DB_PATH = os.path.join(os.getcwd(), os.path.basename(db.DB_PATH)); "
+            f"import web_app; web_app.app.run(host='127.0.0.1', port={port}, threaded=True)")
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=app_dir, env=env)
+    for _ in range(600):
+        try:
+            asyncio.run(http_request("127.0.0.1", port, "GET", "/metrics", timeout=1.0))
+            return process
+        except (OSError, asyncio.TimeoutError, HttpError):
+            if process.poll() is not None:
+                raise RuntimeError("web_app exited during startup")
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("web_app did not start listening")
+
+
+def _parse_weight(text):
+    action, _, value = text.partition("=")
+    if action not in DEFAULT_WEIGHTS or not value:
+        raise argparse.ArgumentTypeError(f"Expected <action>=<weight> with action in {', '.join(DEFAULT_WEIGHTS)}")
+    return action, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay match-night traffic against web_app.py")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    parser.add_argument("--think-ms", type=float, default=500, help="Mean think time between a user's actions")
+    parser.add_argument("--weight", action="append", type=_parse_weight, default=[],
+                        help="Override an action weight, e.g. upload=0 (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", action="store_true", help="Start web_app.py locally for the run")
+    parser.add_argument("--app-dir", default=REPO_ROOT, help="Working directory (league) for --start")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    weights = dict(DEFAULT_WEIGHTS, **dict(args.weight))
+    server = start_server(os.path.abspath(args.app_dir), urlsplit(args.url).port or 80) if args.start else None
+    try:
+        test = LoadTest(args.url, args.users, args.duration, args.warmup, args.think_ms, weights, args.seed)
+        report = asyncio.run(test.run())
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    total = report["total"]
+    print(f"{report['users']} users for {report['duration_s']}s: {total['requests']} requests, "
+          f"{total['rps']} req/s, {total['error_rate']:.2%} errors")
+    if total["requests"]:
+        print(f"  overall        p50 {total['p50_ms']:>9.2f}ms  p95 {total['p95_ms']:>9.2f}ms  p99 {total['p99_ms']:>9.2f}ms")
+    for action, r in report["actions"].items():
+        print(f"  {action:<14} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  p99 {r['p99_ms']:>9.2f}ms  "
+              f"{r['rps']:>7.2f} req/s  {r['error_rate']:.2%} errors")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Synthetic league generator for benchmarks.
+
+Builds a self-contained league directory: roster CSV, SQLite database (via
+the database module) and match_history/<season>/match_<n> folders whose
+player table is consistent with the match log (rebuilt with elo_replay).
+
+    python benchmarks/synthetic_league.py --players 500 --matches 10000 --out /tmp/league
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import elo_replay  # noqa: E402
+import seasons  # noqa: E402
+
+MAPS = ['Dust2', 'Inferno', 'Mirage', 'Vertigo', 'Anubis', 'Ancient', 'Train', 'Nuke']
+TAGS = ['SEN', '100T', 'FNC', 'C9', 'TL', 'EDG', 'GEN', 'DSG', 'TLN', 'NRG']
+ROSTER_COLUMNS = ["Name", "Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "ELO"]
+
+
+def player_names(n_players):
+    return [f"{TAGS[i % len(TAGS)]} bot{i:05d}" for i in range(n_players)]
+
+
+def generate_log(n_players, n_matches, seed=0, season='S4'):
+    """Columnar match log (same layout as seasons.pack_live_season) with skill-driven results"""
+    rng = np.random.default_rng(seed)
+    names = player_names(n_players)
+    skill = rng.normal(0, 1, n_players)
+    lineups = np.argsort(rng.random((n_matches, n_players)), axis=1)[:, :10] if n_players <= 1000 else \
+        np.array([rng.choice(n_players, 10, replace=False) for _ in range(n_matches)])
+    edge = skill[lineups[:, :5]].mean(axis=1) - skill[lineups[:, 5:]].mean(axis=1)
+    winner = np.where(rng.random(n_matches) < 1 / (1 + np.exp(-1.5 * edge)), 1, 2).astype(np.int8)
+    loser_score = rng.integers(3, 15, n_matches)
+    t1_score = np.where(winner == 1, 16, loser_score).astype(np.int16)
+    t2_score = np.where(winner == 2, 16, loser_score).astype(np.int16)
+
+    player = lineups.ravel()
+    team = np.tile([1] * 5 + [2] * 5, n_matches).astype(np.int8)
+    won = np.repeat(winner, 10) == team
+    rounds = np.repeat(t1_score + t2_score, 10)
+    form = skill[player] + rng.normal(0, 0.25, len(player))
+    k = rng.poisson(rounds * 0.68 * np.exp(0.35 * form + 0.1 * won))
+    d = rng.poisson(rounds * 0.68 * np.exp(-0.25 * form - 0.1 * won))
+    a = rng.poisson(rounds * 0.18 * np.exp(0.15 * form))
+    adr = np.maximum(0, (k * 95 + a * 25) / rounds + rng.normal(0, 8, len(player))).round(1)
+    mvp = np.zeros(len(player), dtype=np.int16)
+    winner_k = np.where(won, k, -1).reshape(n_matches, 10)
+    mvp[np.arange(n_matches) * 10 + winner_k.argmax(axis=1)] = 1
+
+    start = datetime(2026, 9, 1)
+    days = [(start + timedelta(days=int(i * 60 / max(n_matches, 1)))).date().isoformat() for i in range(n_matches)]
+    return {
+        "season": np.array(season),
+        "names": np.array(names, dtype=str),
+        "maps": np.array(MAPS, dtype=str),
+        "m_num": np.arange(1, n_matches + 1, dtype=np.int32),
+        "m_winner": winner,
+        "m_t1_score": t1_score,
+        "m_t2_score": t2_score,
+        "m_map": rng.integers(0, len(MAPS), n_matches).astype(np.int16),
+        "m_t1_gain": np.full(n_matches, -1, dtype=np.int16),
+        "m_t2_gain": np.full(n_matches, -1, dtype=np.int16),
+        "m_day": np.array(days, dtype=str),
+        "m_line_start": np.arange(0, 10 * n_matches + 1, 10, dtype=np.int32),
+        "l_match": np.repeat(np.arange(1, n_matches + 1, dtype=np.int32), 10),
+        "l_player": player.astype(np.int32),
+        "l_team": team,
+        "l_k": k.astype(np.int16),
+        "l_d": d.astype(np.int16),
+        "l_a": a.astype(np.int16),
+        "l_adr": adr.astype(np.float32),
+        "l_mvp": mvp,
+    }
+
+
+def write_match_folders(log, root):
+    """match_history/<season>/match_<n>/{t1.csv, t2.csv, metadata.json}"""
+    season = str(log["season"])
+    names = log["names"]
+    for i, match_num in enumerate(log["m_num"]):
+        path = os.path.join(root, 'match_history', season, f'match_{int(match_num)}')
+        os.makedirs(path, exist_ok=True)
+        s, e = log["m_line_start"][i], log["m_line_start"][i + 1]
+        lines = pd.DataFrame({
+            "Name": names[log["l_player"][s:e]],
+            "K": log["l_k"][s:e], "D": log["l_d"][s:e], "A": log["l_a"][s:e],
+            "ADR": log["l_adr"][s:e], "MVP": log["l_mvp"][s:e],
+        })
+        team = log["l_team"][s:e]
+        lines[team == 1].to_csv(os.path.join(path, 't1.csv'), index=False)
+        lines[team == 2].to_csv(os.path.join(path, 't2.csv'), index=False)
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump({
+                "winning_team": f'Team {int(log["m_winner"][i])}',
+                "team1_score": int(log["m_t1_score"][i]),
+                "team2_score": int(log["m_t2_score"][i]),
+                "match_num": int(match_num),
+                "map": str(log["maps"][log["m_map"][i]]),
+                "season": season,
+                "created_at": f'{log["m_day"][i]}T20:00:00',
+            }, f)
+
+
+def build_league(root, n_players, n_matches, seed=0, season='S4'):
+    """Create the whole league under root; the database module must already point at root's DB"""
+    import database as db
+
+    os.makedirs(root, exist_ok=True)
+    log = generate_log(n_players, n_matches, seed=seed, season=season)
+    write_match_folders(log, root)
+
+    roster_path = os.path.join(root, 'vct_ss4.csv')
+    roster = pd.DataFrame({"Name": log["names"]})
+    for col in ROSTER_COLUMNS[1:]:
+        roster[col] = 1000 if col == "ELO" else 0
+    roster.to_csv(roster_path, index=False)
+    db.init_database_from_csv(roster_path)
+
+    table = elo_replay.replay_log(log, log["names"].tolist())["table"]
+    db.bulk_update_from_dataframe(table)
+    for i, match_num in enumerate(log["m_num"]):
+        s, e = log["m_line_start"][i], log["m_line_start"][i + 1]
+        team = log["l_team"][s:e]
+        lineup = log["names"][log["l_player"][s:e]]
+        map_name = str(log["maps"][log["m_map"][i]])
+        total_rounds = int(log["m_t1_score"][i]) + int(log["m_t2_score"][i])
+        db.create_match_record(
+            match_num=int(match_num),
+            team1_players=lineup[team == 1].tolist(),
+            team2_players=lineup[team == 2].tolist(),
+            team1_score=int(log["m_t1_score"][i]),
+            team2_score=int(log["m_t2_score"][i]),
+            winning_team=f'Team {int(log["m_winner"][i])}',
+            map_name=map_name,
+            total_rounds=total_rounds,
+        )
+        db.update_map_stats(map_name, total_rounds, int(match_num))
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic league")
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--matches", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Directory to create the league in")
+    args = parser.parse_args()
+
+    import database as db
+    os.makedirs(args.out, exist_ok=True)
+    db.DB_PATH = os.path.join(args.out, os.path.basename(db.DB_PATH))
+    build_league(args.out, args.players, args.matches, seed=args.seed, season=seasons.DEFAULT_SEASON)
+    print(f"League with {args.players} players and {args.matches} matches written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""Bulk import of finished matches (back-filling bot games from spreadsheets).
+
+Accepted inputs:
+    JSONL  one match per line:
+           {"team_1": [{"Name", "K", "D", "A", "ADR", "MVP"}, ...], "team_2": [...],
+            "team1_score": 16, "team2_score": 12, "map": "Mirage",
+            "win_team": "Team 1", "created_at": "2026-10-17T21:05:00",
+            "t1_gain": 25, "t2_gain": 25}
+           (team_1_result/team_2_result, as posted to /api/submit-match, work too;
+            win_team defaults to the higher score, gains to the create-match formula)
+    CSV    one row per player line with columns
+           match_id, team (1/2), Name, K, D, A, ADR, MVP, team1_score, team2_score, map
+           and optional win_team, created_at, t1_gain, t2_gain.
+
+Everything is validated before anything is written. Matches are then applied
+in chronological order to an in-memory copy of the player table with the
+same rules as submit_match (elo_engine), the match folders and match records
+are written, and the player table is committed in a single transaction.
+
+Usage:
+    python bulk_import.py weekend.jsonl --dry-run
+    python bulk_import.py weekend.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import elo_engine
+import elo_replay
+import seasons
+
+TEAM_SIZE = 5
+LINE_FIELDS = ["Name", "K", "D", "A", "ADR", "MVP"]
+
+
+class ImportValidationError(ValueError):
+    """Validation failed; .errors lists every problem found"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} validation error(s): " + "; ".join(errors[:5]))
+        self.errors = errors
+
+
+def parse_jsonl(text):
+    records = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            records.append({"_source": f"line {line_no}", "_error": f"invalid JSON ({e.msg})"})
+            continue
+        record["_source"] = f"line {line_no}"
+        records.append(record)
+    return records
+
+
+def parse_csv(text):
+    """Group per-player CSV rows into match records, keeping first-appearance order"""
+    records = {}
+    for row_no, row in enumerate(csv.DictReader(io.StringIO(text)), 2):
+        match_id = (row.get("match_id") or "").strip()
+        record = records.get(match_id)
+        if record is None:
+            record = records[match_id] = {
+                "_source": f"match_id {match_id or '?'} (row {row_no})",
+                "team_1": [], "team_2": [],
+            }
+            for key in ("team1_score", "team2_score", "map", "win_team", "created_at", "t1_gain", "t2_gain"):
+                if row.get(key) not in (None, ""):
+                    record[key] = row[key]
+        team = (row.get("team") or "").strip()
+        line = {field: row.get(field) for field in LINE_FIELDS}
+        if team in ("1", "Team 1"):
+            record["team_1"].append(line)
+        elif team in ("2", "Team 2"):
+            record["team_2"].append(line)
+        else:
+            record.setdefault("_row_errors", []).append(f"row {row_no}: team must be 1 or 2")
+    return list(records.values())
+
+
+def load_records(path=None, text=None, fmt=None):
+    """Raw match records from a .jsonl/.json/.csv file or text"""
+    if text is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    fmt = fmt or os.path.splitext(path or "")[1].lstrip(".").lower() or "jsonl"
+    if fmt == "csv":
+        return parse_csv(text)
+    if fmt == "json":
+        return records_from_json(json.loads(text))
+    return parse_jsonl(text)
+
+
+def records_from_json(data):
+    """Records from a JSON list of matches or a {"matches": [...]} object"""
+    records = data.get("matches", []) if isinstance(data, dict) else data
+    for i, record in enumerate(records, 1):
+        record["_source"] = f"match {i}"
+    return records
+
+
+def _number(value, field, errors, where):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = float("nan")
+    if not number >= 0:
+        errors.append(f"{where}: {field} must be a number >= 0 ({value!r})")
+        return 0.0
+    return number
+
+
+def _int(value, field, errors, where):
+    number = _number(value, field, errors, where)
+    if number != int(number):
+        errors.append(f"{where}: {field} must be a whole number ({value!r})")
+    return int(number)
+
+
+def validate_records(records, known_names):
+    """Normalized matches sorted chronologically, or ImportValidationError listing every problem"""
+    known = set(str(n) for n in known_names)
+    errors = []
+    matches = []
+    for position, record in enumerate(records):
+        where = record.get("_source", f"match {position + 1}")
+        if "_error" in record:
+            errors.append(f"{where}: {record['_error']}")
+            continue
+        errors.extend(f"{where}: {e}" for e in record.get("_row_errors", []))
+
+        teams = []
+        for key in ("team_1", "team_2"):
+            lines = record.get(key, record.get(f"{key}_result")) or []
+            if len(lines) != TEAM_SIZE:
+                errors.append(f"{where}: {key} has {len(lines)} players, expected {TEAM_SIZE}")
+            team = []
+            for line in lines:
+                name = str(line.get("Name") or "").strip()
+                if name not in known:
+                    errors.append(f"{where}: unknown player {name!r}")
+                team.append({
+                    "Name": name,
+                    "K": _int(line.get("K"), "K", errors, where),
+                    "D": _int(line.get("D"), "D", errors, where),
+                    "A": _int(line.get("A"), "A", errors, where),
+                    # submit_match stores int(ADR)
+                    "ADR": int(_number(line.get("ADR"), "ADR", errors, where)),
+                    "MVP": _int(line.get("MVP") or 0, "MVP", errors, where),
+                })
+            teams.append(team)
+
+        names = [line["Name"] for team in teams for line in team]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            errors.append(f"{where}: players listed twice: {', '.join(duplicates)}")
+
+        score_1 = _int(record.get("team1_score"), "team1_score", errors, where)
+        score_2 = _int(record.get("team2_score"), "team2_score", errors, where)
+        win_team = record.get("win_team")
+        if win_team in (None, ""):
+            if score_1 == score_2:
+                errors.append(f"{where}: scores are tied and no win_team is given")
+            win_team = "Team 1" if score_1 > score_2 else "Team 2"
+        elif win_team in (1, "1", "Team 1"):
+            win_team = "Team 1"
+        elif win_team in (2, "2", "Team 2"):
+            win_team = "Team 2"
+        else:
+            errors.append(f"{where}: win_team must be 'Team 1' or 'Team 2' ({win_team!r})")
+        if score_1 != score_2 and (score_1 > score_2) != (win_team == "Team 1"):
+            errors.append(f"{where}: win_team {win_team} does not match the score {score_1}-{score_2}")
+
+        created_at = record.get("created_at")
+        if created_at:
+            try:
+                created_at = datetime.fromisoformat(str(created_at)).isoformat(timespec="seconds")
+            except ValueError:
+                errors.append(f"{where}: created_at is not an ISO date/time ({created_at!r})")
+                created_at = None
+
+        gains = None
+        if record.get("t1_gain") not in (None, "") or record.get("t2_gain") not in (None, ""):
+            gains = (_int(record.get("t1_gain"), "t1_gain", errors, where),
+                     _int(record.get("t2_gain"), "t2_gain", errors, where))
+
+        matches.append({
+            "source": where,
+            "order": position,
+            "team_1": teams[0],
+            "team_2": teams[1],
+            "team1_score": score_1,
+            "team2_score": score_2,
+            "win_team": win_team,
+            "map": str(record.get("map") or "Unknown"),
+            "created_at": created_at,
+            "gains": gains,
+        })
+
+    if errors:
+        raise ImportValidationError(errors)
+    # Chronological when every match is timestamped, otherwise file order
+    if all(m["created_at"] for m in matches):
+        matches.sort(key=lambda m: (m["created_at"], m["order"]))
+    return matches
+
+
+def apply_matches(df_players, matches, first_match_num, params=None):
+    """Apply matches in order to a copy of the player table.
+
+    Returns (table, results, snapshots): the updated table with derived
+    columns, one result per match (match_num, gains, ELO changes) and the
+    end-of-day ELO of every player who played that day.
+    """
+    p = elo_engine.resolve_params(params)
+    table = df_players.copy().reset_index(drop=True)
+    for col in elo_replay.TOTAL_COLUMNS + elo_replay.ROUND_COLUMNS + ["ELO"]:
+        if col not in table.columns:
+            table[col] = 0
+    if "MatchHistory" not in table.columns:
+        table["MatchHistory"] = ""
+    names = table["Name"].astype(str).tolist()
+    index = {name: i for i, name in enumerate(names)}
+
+    elo = table["ELO"].fillna(p["start_elo"]).round().astype(np.int64).to_numpy().copy()
+    totals = {col: table[col].fillna(0).astype(np.int64).to_numpy().copy() for col in elo_replay.TOTAL_COLUMNS}
+    totals["Matches"] = totals["Wins"] + totals["Losses"]
+    per_round = table[elo_replay.ROUND_COLUMNS].fillna(0).astype(np.float64).to_numpy().copy()
+    history = [[h for h in str(v).split(",") if h] if v and str(v) not in ("0", "nan") else []
+               for v in table["MatchHistory"]]
+
+    results = []
+    snapshots = {}
+    for offset, match in enumerate(matches):
+        match_num = first_match_num + offset
+        lines = match["team_1"] + match["team_2"]
+        lineup = np.array([index[line["Name"]] for line in lines], dtype=np.int64)
+        on_team_1 = np.arange(len(lines)) < len(match["team_1"])
+        won = on_team_1 if match["win_team"] == "Team 1" else ~on_team_1
+        k, d, a, adr, mvp = (np.array([line[f] for line in lines], dtype=np.int64) for f in ("K", "D", "A", "ADR", "MVP"))
+        mvp = np.where(won, mvp, 0)  # submit_match only credits the winners' MVP
+
+        t1_gain, t2_gain = match["gains"] or elo_engine.team_gains(elo[lineup[on_team_1]].sum(),
+                                                                     elo[lineup[~on_team_1]].sum(), p)
+        win_gain, loss_gain = (t1_gain, t2_gain) if match["win_team"] == "Team 1" else (t2_gain, t1_gain)
+        deltas = elo_engine.elo_changes(elo[lineup], k, d, a, adr, mvp, won, win_gain, loss_gain, p)
+
+        rounds = match["team1_score"] + match["team2_score"]
+        totals["Wins"][lineup] += won
+        totals["Losses"][lineup] += ~won
+        totals["Matches"][lineup] += 1
+        totals["TKills"][lineup] += k
+        totals["TDeaths"][lineup] += d
+        totals["TAssists"][lineup] += a
+        totals["TADR"][lineup] += adr
+        totals["MVP"][lineup] += mvp
+        values = elo_engine.round_like_python(np.stack([k, d, a], axis=1) / max(rounds, 1), 3) if rounds > 0 \
+            else np.zeros((len(lines), 3))
+        per_round[lineup] = elo_engine.step_round_stats(per_round[lineup], totals["Matches"][lineup][:, None], values)
+        elo[lineup] += deltas
+        for i in lineup:
+            history[i].append(f"match_{match_num}")
+
+        day = (match["created_at"] or datetime.now().isoformat())[:10]
+        snapshots.setdefault(day, {}).update({names[i]: int(elo[i]) for i in lineup})
+        results.append({
+            "match_num": match_num,
+            "t1_gain": int(t1_gain),
+            "t2_gain": int(t2_gain),
+            "elo_changes": {line["Name"]: int(change) for line, change in zip(lines, deltas.tolist())},
+        })
+
+    for col in elo_replay.TOTAL_COLUMNS:
+        table[col] = totals[col]
+    table[elo_replay.ROUND_COLUMNS] = per_round
+    table["ELO"] = elo
+    table["MatchHistory"] = [",".join(h) for h in history]
+    table = elo_replay.derive_season_columns(table)
+    return table.sort_values("ELO", ascending=False), results, snapshots
+
+
+def write_match_files(matches, results, season=None):
+    """Match folders and match/map records for the imported matches"""
+    import database as db
+
+    season = season or seasons.get_current_season()
+    for match, result in zip(matches, results):
+        match_num = result["match_num"]
+        path = seasons.match_dir(match_num, season)
+        os.makedirs(path, exist_ok=True)
+        pd.DataFrame(match["team_1"], columns=LINE_FIELDS).to_csv(os.path.join(path, 't1.csv'), index=False)
+        pd.DataFrame(match["team_2"], columns=LINE_FIELDS).to_csv(os.path.join(path, 't2.csv'), index=False)
+        metadata = {
+            "winning_team": match["win_team"],
+            "team1_score": match["team1_score"],
+            "team2_score": match["team2_score"],
+            "match_num": match_num,
+            "map": match["map"],
+            "season": season,
+            "t1_gain": result["t1_gain"],
+            "t2_gain": result["t2_gain"],
+            "created_at": match["created_at"] or datetime.now().isoformat(timespec="seconds"),
+            "elo_changes": result["elo_changes"],
+            "imported": True,
+        }
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+        total_rounds = match["team1_score"] + match["team2_score"]
+        db.create_match_record(
+            match_num=match_num,
+            team1_players=[line["Name"] for line in match["team_1"]],
+            team2_players=[line["Name"] for line in match["team_2"]],
+            team1_score=match["team1_score"],
+            team2_score=match["team2_score"],
+            winning_team=match["win_team"],
+            map_name=match["map"],
+            total_rounds=total_rounds
+        )
+        db.update_map_stats(match["map"], total_rounds, match_num)
+
+
+def plan_import(records, df_players, season=None, params=None):
+    """Validate and apply a batch of match records without writing anything; write_import() persists the plan"""
+    started = time.perf_counter()
+    matches = validate_records(records, df_players["Name"].astype(str).tolist())
+    season = season or seasons.get_current_season()
+    first_match_num = seasons.next_match_num(season)
+    table, results, snapshots = apply_matches(df_players, matches, first_match_num, params)
+    return {"matches": matches, "results": results, "table": table, "snapshots": snapshots, "season": season,
+            "first_match_num": first_match_num, "df_players": df_players, "started": started,
+            "applied": time.perf_counter()}
+
+
+def write_import(plan):
+    """Match folders and records, then the player table and ELO snapshots in one transaction"""
+    if plan["matches"]:
+        write_match_files(plan["matches"], plan["results"], plan["season"])
+        elo_replay.write_replay(plan["table"], plan["snapshots"])
+
+
+def import_summary(plan, dry_run=False):
+    n = len(plan["matches"])
+    first_match_num = plan["first_match_num"]
+    before = plan["df_players"].set_index("Name")["ELO"]
+    after = plan["table"].set_index("Name")["ELO"]
+    diff = (after - before.reindex(after.index)).fillna(0).astype(int)
+    moved = diff[diff != 0].sort_values(key=np.abs, ascending=False)
+    return {
+        "matches": n,
+        "first_match_num": first_match_num if n else None,
+        "last_match_num": first_match_num + n - 1 if n else None,
+        "season": plan["season"],
+        "dry_run": dry_run,
+        "players_changed": int(len(moved)),
+        "largest_changes": [{"name": str(name), "diff": int(v)} for name, v in moved.head(10).items()],
+        "apply_ms": round((plan["applied"] - plan["started"]) * 1000, 2),
+        "elapsed_ms": round((time.perf_counter() - plan["started"]) * 1000, 2),
+    }
+
+
+def import_matches(records, df_players, season=None, params=None, dry_run=False):
+    """Validate, apply and (unless dry_run) persist a batch of match records; returns a summary"""
+    plan = plan_import(records, df_players, season, params)
+    if not dry_run:
+        write_import(plan)
+    return import_summary(plan, dry_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import finished matches from JSONL/CSV")
+    parser.add_argument("path", help="Matches file (.jsonl, .json or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "json", "csv"], default=None)
+    parser.add_argument("--season", default=None, help="Season key (default: current season)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and compute without writing")
+    args = parser.parse_args()
+
+    import database as db
+    records = load_records(args.path, fmt=args.format)
+    try:
+        summary = import_matches(records, db.get_all_players(), season=args.season, dry_run=args.dry_run)
+    except ImportValidationError as e:
+        print(f"Import rejected, nothing was written ({len(e.errors)} errors):")
+        for error in e.errors:
+            print(f"  {error}")
+        raise SystemExit(1)
+    verb = "Validated" if args.dry_run else "Imported"
+    print(f"{verb} {summary['matches']} matches (match_{summary['first_match_num']}..match_{summary['last_match_num']}) "
+          f"in {summary['elapsed_ms']} ms; {summary['players_changed']} players changed ELO")
+    for change in summary["largest_changes"]:
+        print(f"  {change['name']}: {change['diff']:+d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Pooled SQLite connections with WAL and tuned pragmas.
+
+connection() and transaction() check a connection out of a process-wide
+pool for one database file and put it back afterwards, so requests reuse
+open connections instead of paying a connect (and the PRAGMAs) per helper.
+The pool is shared by all threads (connections are opened with
+check_same_thread=False and used by one thread at a time), which matters
+because Flask's threaded server runs every request on a new thread. Each
+connection gets PRAGMAS on open:
+
+    journal_mode=WAL     readers never block the writer; commits append to the WAL
+    synchronous=NORMAL   no fsync per commit; the WAL is synced at checkpoints
+    cache_size/mmap_size larger page cache and memory-mapped reads
+    busy_timeout         wait for a concurrent writer instead of failing
+
+With synchronous=NORMAL a power loss can drop the last commits before a
+checkpoint. Journaled match, revert and reset events are replayed on the
+next start; bulk rewrites through the pool (ELO replay, formula backfill)
+are not, so elo_replay.write_replay() calls checkpoint() after its commit.
+
+sqlite3 keeps up to CACHED_STATEMENTS prepared statements per connection,
+so repeated parameterized queries skip re-parsing. WAL mode is persistent
+in the database file, so connections the database module opens itself
+use it too once configure() has run.
+
+Usage:
+    with db_connection.connection(path) as conn:     # reads
+        conn.execute(...)
+    with db_connection.transaction(path) as conn:    # one commit, rollback on error
+        conn.execute(...)
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+CACHED_STATEMENTS = 256
+MAX_IDLE = 8
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),       # KiB, i.e. ~16 MB
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),       # ms
+)
+
+_pools = {}
+_schemas = set()
+_lock = threading.Lock()
+
+
+def _default_path():
+    import database as db
+    return db.DB_PATH
+
+
+def _open(db_path):
+    conn = sqlite3.connect(db_path, cached_statements=CACHED_STATEMENTS, check_same_thread=False)
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def _pool(db_path):
+    with _lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = queue.LifoQueue()
+        return pool
+
+
+@contextmanager
+def connection(db_path=None, schema=None):
+    """A pooled connection to db_path for the duration of the block; schema (a SQL script) runs once per file"""
+    db_path = db_path or _default_path()
+    pool = _pool(db_path)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open(db_path)
+    try:
+        if schema is not None and (db_path, schema) not in _schemas:
+            conn.executescript(schema)
+            with _lock:
+                _schemas.add((db_path, schema))
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        if pool.qsize() < MAX_IDLE:
+            pool.put(conn)
+        else:
+            conn.close()
+
+
+@contextmanager
+def transaction(db_path=None, schema=None):
+    """One transaction on a pooled connection: committed on success, rolled back on error"""
+    with connection(db_path, schema) as conn:
+        with conn:
+            yield conn
+
+
+def configure(db_path=None):
+    """Open a pooled connection now, switching the database file to WAL; returns the journal mode"""
+    with connection(db_path) as conn:
+        return conn.execute('PRAGMA journal_mode').fetchone()[0]
+
+
+def checkpoint(db_path=None):
+    """Copy the WAL into the database file with fsyncs, making every commit so far durable"""
+    with connection(db_path) as conn:
+        return conn.execute('PRAGMA wal_checkpoint(FULL)').fetchone()
+
+
+def close_all():
+    """Close the idle pooled connections"""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _schemas.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
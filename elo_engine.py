@@ -0,0 +1,144 @@
+"""ELO update rules shared by live submissions, replays and simulations.
+
+Every constant of the season's ELO formula lives in DEFAULT_ELO_PARAMS so it
+can be overridden per call (replays with tuned constants, simulator sweeps)
+without editing the route code. All functions operate on NumPy arrays holding
+the players of one match, so a whole match is scored in a handful of vector ops.
+"""
+import numpy as np
+
+import rating_formulas
+
+DEFAULT_ELO_PARAMS = {
+    "start_elo": 1000,
+    # create-match gain: gain_base -/+ min(gain_cap, (ELO_1 - ELO_2) // gain_step)
+    "gain_base": 25,
+    "gain_cap": 25,
+    "gain_step": 50,
+    # pull towards the lobby average: int((ELO - avg) * avg_elo_coeff)
+    "avg_elo_coeff": 0.03,
+    # winners: + min(win_rating_cap, int(rating * win_rating_mult)) + MVP * mvp_bonus
+    "win_rating_mult": 5,
+    "win_rating_cap": 15,
+    "mvp_bonus": 10,
+    # losers: - max(0, loss_rating_base - int(rating * loss_rating_mult))
+    "loss_rating_base": 10,
+    "loss_rating_mult": 10,
+}
+
+# The players table keeps KPR/DPR/APR at this precision between matches
+# (DataFrame.round(2) in the baseline, PlayerTable.derive now)
+ROUND_STAT_DECIMALS = 2
+
+def resolve_params(params=None):
+    """DEFAULT_ELO_PARAMS overlaid with the given overrides (complete parameter sets pass through)"""
+    if params is not None and params.keys() == DEFAULT_ELO_PARAMS.keys():
+        return params
+    merged = dict(DEFAULT_ELO_PARAMS)
+    if params:
+        unknown = set(params) - set(DEFAULT_ELO_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown ELO parameters: {', '.join(sorted(unknown))}")
+        merged.update(params)
+    return merged
+
+
+def round_like_python(values, decimals):
+    """Element-wise round() with Python's exact decimal semantics.
+
+    np.round scales by 10**decimals first and can land on the other side of a
+    half-way point; the ELO formula truncates right after rounding, so replays
+    must round exactly like the scalar code did.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, decimals)
+    # Only values sitting (almost) exactly on a half-way point can disagree
+    scaled = values * 10.0 ** decimals
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(v, decimals) for v in values[near_half].tolist()]
+    return rounded
+
+
+def get_rating(kd, kpm, apm, dpm, adr):
+    """Active single-match rating formula for one line with its K/D already computed"""
+    features = {"kd": kd, "kd_smooth": kd, "kpm": kpm, "apm": apm, "dpm": dpm, "adr": adr}
+    return float(rating_formulas.active("match").evaluate(features))
+
+
+def match_ratings(k, d, a, adr, formula=None):
+    """Single-match rating (active formula unless given) for per-match lines (KPM == K, DPM == D, APM == A)"""
+    return rating_formulas.match_ratings(k, d, a, adr, formula)
+
+
+def team_gains(elo_1, elo_2, params=None):
+    """ELO gain for team 1 and team 2 winning, from the teams' summed ELO"""
+    p = resolve_params(params)
+    step = min(p["gain_cap"], (int(elo_1) - int(elo_2)) // p["gain_step"])
+    return p["gain_base"] - step, p["gain_base"] + step
+
+
+def probability_gains(p1, params=None):
+    """Gains from team 1's expected win probability: the favourite wins less, the underdog more.
+
+    Symmetric around p1 = 0.5 (gain_base each) and bounded to [0, 2 * gain_base].
+    """
+    p = resolve_params(params)
+    total = 2 * p["gain_base"]
+    t1_gain = min(total, max(0, int(round(total * (1.0 - float(p1))))))
+    return t1_gain, total - t1_gain
+
+
+def performance_terms(rating, mvp, won, params=None):
+    """ELO-independent part of each player's change.
+
+    Winners: + min(win_rating_cap, int(rating * win_rating_mult)) + MVP * mvp_bonus
+    Losers:  - max(0, loss_rating_base - int(rating * loss_rating_mult))
+    Works on any number of lines at once, so replays compute it for the whole log up front.
+    """
+    p = resolve_params(params)
+    rating = np.asarray(rating, dtype=np.float64)
+    mvp = np.asarray(mvp, dtype=np.int64)
+    win = np.minimum(p["win_rating_cap"], np.trunc(rating * p["win_rating_mult"])) + mvp * p["mvp_bonus"]
+    loss = np.maximum(0, p["loss_rating_base"] - np.trunc(rating * p["loss_rating_mult"]))
+    return np.where(np.asarray(won, dtype=bool), win, -loss).astype(np.int64)
+
+
+def apply_terms(elo, terms, won, win_gain, loss_gain, params=None):
+    """Signed ELO change of one match's players from their precomputed performance terms"""
+    p = resolve_params(params)
+    average_elo = int(elo.sum()) // len(elo)
+    drift = np.trunc((elo - average_elo) * p["avg_elo_coeff"]).astype(np.int64)
+    gain = np.where(won, int(win_gain), -int(loss_gain))
+    return gain + terms - drift
+
+
+def elo_changes(elo, k, d, a, adr, mvp, won, win_gain, loss_gain, params=None):
+    """Signed ELO change for every player of one match.
+
+    elo/k/d/a/adr/mvp/won are aligned arrays over the match's players (both
+    teams). win_gain is the winning team's gain and loss_gain the losing
+    team's own gain, exactly as submit_match applies them.
+    """
+    p = resolve_params(params)
+    won = np.asarray(won, dtype=bool)
+    terms = performance_terms(match_ratings(k, d, a, adr), mvp, won, p)
+    return apply_terms(np.asarray(elo, dtype=np.int64), terms, won, win_gain, loss_gain, p)
+
+
+def running_average(old, matches, value, decimals=3):
+    """Per-round average after a new match: (old * (m - 1) + value) / m, rounded like submit_match.
+
+    submit_match reads the old average from the DataFrame as np.float64, so
+    round() there dispatches to np.round; the same rounding is used here.
+    """
+    old = np.asarray(old, dtype=np.float64)
+    matches = np.asarray(matches, dtype=np.float64)
+    value = np.asarray(value, dtype=np.float64)
+    updated = np.round((old * (matches - 1) + value) / np.maximum(matches, 1), decimals)
+    return np.where(matches > 1, updated, value)
+
+
+def step_round_stats(old, matches, value):
+    """Per-round averages after one match as the live table stores them: running_average, then its 2-decimal rounding"""
+    return np.round(running_average(old, matches, value), ROUND_STAT_DECIMALS)
@@ -0,0 +1,305 @@
+"""Deterministic ELO replay over a season's ordered match log.
+
+Rebuilds every player's ELO, cumulative stats, per-round averages and match
+history from scratch, using the same update rules as submit_match
+(elo_engine). Order-independent totals are summed in one vectorized pass;
+only ELO and the running per-round averages are stepped match by match.
+
+Usage:
+    python elo_replay.py                          # dry run against the live season
+    python elo_replay.py --param avg_elo_coeff=0.02 --param mvp_bonus=5
+    python elo_replay.py --recorded-gains --write  # rebuild and persist
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import db_connection
+import elo_engine
+import rating_formulas
+import seasons
+
+TOTAL_COLUMNS = ["Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "Matches"]
+DERIVED_COLUMNS = ["KPM", "DPM", "APM", "K/D", "ADR", "Rating"]
+ROUND_COLUMNS = ["KPR", "DPR", "APR"]
+# The database module's daily snapshot row (database.upsert_daily_elo_snapshots), written
+# here on the players' transaction so a rebuild never leaves half of the snapshots old
+SNAPSHOT_UPSERT = ('INSERT INTO elo_history (Name, day, elo) VALUES (?, ?, ?) '
+                   'ON CONFLICT (Name, day) DO UPDATE SET elo = excluded.elo')
+
+
+def roster_index(log, roster=()):
+    """(names, name -> index): the roster first, then players that only appear in the log"""
+    names = [str(n) for n in roster]
+    index = {n: i for i, n in enumerate(names)}
+    for n in log["names"]:
+        n = str(n)
+        if n not in index:
+            index[n] = len(names)
+            names.append(n)
+    return names, index
+
+
+def line_columns(log, roster_index):
+    """Per-line arrays of the log remapped onto the roster's player indices"""
+    starts = log["m_line_start"].astype(np.int64)
+    n_matches = len(log["m_num"])
+    line_match_pos = np.repeat(np.arange(n_matches), np.diff(starts))
+    log_to_roster = np.array([roster_index[str(n)] for n in log["names"]], dtype=np.int64)
+    player = log_to_roster[log["l_player"]] if len(log["l_player"]) else np.zeros(0, dtype=np.int64)
+    team = log["l_team"].astype(np.int64)
+    won = log["m_winner"][line_match_pos].astype(np.int64) == team
+    rounds = (log["m_t1_score"].astype(np.int64) + log["m_t2_score"].astype(np.int64))[line_match_pos]
+    k = log["l_k"].astype(np.int64)
+    d = log["l_d"].astype(np.int64)
+    a = log["l_a"].astype(np.int64)
+    safe_rounds = np.maximum(rounds, 1)
+    per_round = np.where(
+        (rounds > 0)[:, None],
+        elo_engine.round_like_python(np.stack([k, d, a], axis=1) / safe_rounds[:, None], 3),
+        0.0,
+    )
+    return {
+        "starts": starts,
+        "player": player,
+        "team": team,
+        "won": won,
+        "k": k,
+        "d": d,
+        "a": a,
+        # submit_match stores int(ADR)
+        "adr": np.trunc(log["l_adr"].astype(np.float64)).astype(np.int64),
+        "mvp": log["l_mvp"].astype(np.int64),
+        "per_round": per_round,
+    }
+
+
+def derive_season_columns(df):
+    """Per-match averages and the season Rating, computed the way refresh_database_from_db does"""
+    matches = df["Matches"].replace(0, 1)
+    df["KPM"] = (df["TKills"] / matches).round(2)
+    df["DPM"] = (df["TDeaths"] / matches).round(2)
+    df["APM"] = (df["TAssists"] / matches).round(2)
+    df["K/D"] = (df["TKills"] / df["TDeaths"].replace(0, 1)).round(2)
+    df["ADR"] = (df["TADR"] / matches).round(2)
+    df["Rating"] = rating_formulas.season_ratings(df)
+    return df
+
+
+def _replay_per_round_averages(player, line_values, n_players):
+    """Running KPR/DPR/APR averages, rounded after every match as the live table is (elo_engine.step_round_stats).
+
+    Each player's averages only depend on their own lines, so instead of
+    stepping through matches this steps through "n-th match of the player",
+    updating every player with at least n matches in one vector op.
+    """
+    per_round = np.zeros((n_players, line_values.shape[1]), dtype=np.float64)
+    if len(player) == 0:
+        return per_round
+    order = np.argsort(player, kind="stable")
+    counts = np.bincount(player, minlength=n_players)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    # rank of every line within its player's history (0-based), then group lines by rank
+    nth = np.arange(len(player)) - offsets[player[order]]
+    by_step = order[np.argsort(nth, kind="stable")]
+    step_offsets = np.concatenate(([0], np.cumsum(np.bincount(nth))))
+    for step in range(len(step_offsets) - 1):
+        lines = by_step[step_offsets[step]:step_offsets[step + 1]]
+        players = player[lines]
+        per_round[players] = elo_engine.step_round_stats(per_round[players], step + 1, line_values[lines])
+    return per_round
+
+
+def replay_log(log, roster=(), params=None, initial_elo=None, use_recorded_gains=False, formula=None):
+    """Recompute standings from a columnar match log (see seasons.pack_live_season).
+
+    roster: player names that exist even without matches. initial_elo maps
+    names to their season-start ELO (default params["start_elo"]). With
+    use_recorded_gains the t1/t2 gains stored at submit time are used when
+    present; otherwise gains are re-derived from the replayed team ELOs.
+    formula overrides the active match rating formula.
+
+    Returns {"table": DataFrame, "snapshots": {day: {name: elo}}, "team_elo":
+    pre-match (team 1, team 2) ELO sums per match, "elapsed": seconds}.
+    """
+    started = time.perf_counter()
+    p = elo_engine.resolve_params(params)
+
+    names, index = roster_index(log, roster)
+    n_players = len(names)
+
+    elo = np.full(n_players, int(p["start_elo"]), dtype=np.int64)
+    if initial_elo:
+        for name, value in initial_elo.items():
+            if name in index:
+                elo[index[name]] = int(value)
+
+    cols = line_columns(log, index)
+    player, won = cols["player"], cols["won"]
+    terms = elo_engine.performance_terms(
+        elo_engine.match_ratings(cols["k"], cols["d"], cols["a"], cols["adr"], formula), cols["mvp"], won, p)
+
+    # Order-independent totals in one pass. Like submit_match, only winners' MVPs count.
+    totals = {
+        "Wins": np.bincount(player, weights=won, minlength=n_players),
+        "Losses": np.bincount(player, weights=~won, minlength=n_players),
+        "TKills": np.bincount(player, weights=cols["k"], minlength=n_players),
+        "TDeaths": np.bincount(player, weights=cols["d"], minlength=n_players),
+        "TAssists": np.bincount(player, weights=cols["a"], minlength=n_players),
+        "TADR": np.bincount(player, weights=cols["adr"], minlength=n_players),
+        "MVP": np.bincount(player, weights=cols["mvp"] * won, minlength=n_players),
+        "Matches": np.bincount(player, minlength=n_players),
+    }
+
+    per_round = _replay_per_round_averages(player, cols["per_round"], n_players)
+
+    # Sequential part: ELO, stepped match by match
+    starts = cols["starts"]
+    winners = log["m_winner"]
+    recorded_t1 = log.get("m_t1_gain")
+    recorded_t2 = log.get("m_t2_gain")
+    days = log.get("m_day")
+    team_elo = np.zeros((len(log["m_num"]), 2), dtype=np.int64)
+    snapshots = {}
+    touched_today = set()
+    current_day = None
+
+    for i in range(len(log["m_num"])):
+        s, e = starts[i], starts[i + 1]
+        if s == e:
+            continue
+        pl = player[s:e]
+        team = cols["team"][s:e]
+        elo_before = elo[pl]
+        team_elo[i] = elo_before[team == 1].sum(), elo_before[team == 2].sum()
+
+        if use_recorded_gains and recorded_t1 is not None and recorded_t1[i] >= 0 and recorded_t2[i] >= 0:
+            t1_gain, t2_gain = int(recorded_t1[i]), int(recorded_t2[i])
+        else:
+            t1_gain, t2_gain = elo_engine.team_gains(team_elo[i, 0], team_elo[i, 1], p)
+        if winners[i] == 1:
+            win_gain, loss_gain = t1_gain, t2_gain
+        else:
+            win_gain, loss_gain = t2_gain, t1_gain
+
+        elo[pl] = elo_before + elo_engine.apply_terms(elo_before, terms[s:e], won[s:e], win_gain, loss_gain, p)
+
+        if days is not None and days[i]:
+            day = str(days[i])
+            if current_day is not None and day != current_day and touched_today:
+                snapshots[current_day] = {names[j]: int(elo[j]) for j in touched_today}
+                touched_today = set()
+            current_day = day
+            touched_today.update(pl.tolist())
+    if current_day is not None and touched_today:
+        snapshots[current_day] = {names[j]: int(elo[j]) for j in touched_today}
+
+    # Match history strings ("match_3,match_7,...") in match order
+    history = [[] for _ in range(n_players)]
+    for line, j in zip(log["l_match"], player):
+        history[j].append(f"match_{int(line)}")
+
+    table = build_table(names, totals, elo, per_round, history)
+    return {"table": table, "snapshots": snapshots, "team_elo": team_elo,
+            "elapsed": time.perf_counter() - started}
+
+
+def build_table(names, totals, elo, per_round, history):
+    """Players DataFrame (sorted by ELO) from totals, ELO, per-round averages and match-label lists"""
+    table = pd.DataFrame({"Name": names})
+    for col in TOTAL_COLUMNS:
+        table[col] = np.asarray(totals[col]).astype(np.int64)
+    table = derive_season_columns(table)
+    table["ELO"] = elo
+    table["KPR"] = per_round[:, 0]
+    table["DPR"] = per_round[:, 1]
+    table["APR"] = per_round[:, 2]
+    table["MatchHistory"] = [",".join(h) for h in history]
+    return table.sort_values("ELO", ascending=False).reset_index(drop=True)
+
+
+def compare_tables(current_df, rebuilt_df, limit=10):
+    """Summarize ELO differences between the live table and a rebuilt one"""
+    merged = current_df[["Name", "ELO"]].merge(
+        rebuilt_df[["Name", "ELO"]], on="Name", how="outer", suffixes=("_current", "_rebuilt"))
+    merged = merged.fillna(0)
+    merged["diff"] = (merged["ELO_rebuilt"] - merged["ELO_current"]).astype(int)
+    changed = merged[merged["diff"] != 0]
+    top = changed.reindex(changed["diff"].abs().sort_values(ascending=False).index).head(limit)
+    return {
+        "players": int(len(merged)),
+        "players_changed": int(len(changed)),
+        "max_abs_elo_diff": int(changed["diff"].abs().max()) if not changed.empty else 0,
+        "mean_elo_current": round(float(merged["ELO_current"].mean()), 2) if not merged.empty else 0.0,
+        "mean_elo_rebuilt": round(float(merged["ELO_rebuilt"].mean()), 2) if not merged.empty else 0.0,
+        "largest_changes": [
+            {"name": r["Name"], "current": int(r["ELO_current"]), "rebuilt": int(r["ELO_rebuilt"]), "diff": int(r["diff"])}
+            for _, r in top.iterrows()
+        ],
+    }
+
+
+def write_replay(table, snapshots, db_path=None):
+    """Persist a rebuilt player table and its daily ELO snapshots in one SQLite transaction"""
+    columns = TOTAL_COLUMNS + DERIVED_COLUMNS + ["ELO"] + ROUND_COLUMNS + ["MatchHistory"]
+    assignments = ", ".join(f'"{c}" = ?' for c in columns)
+    rows = [
+        tuple(r[c].item() if hasattr(r[c], "item") else r[c] for c in columns) + (r["Name"],)
+        for _, r in table.iterrows()
+    ]
+    snapshot_rows = [(str(name), day, int(elo)) for day in sorted(snapshots) for name, elo in snapshots[day].items()]
+    with db_connection.transaction(db_path) as conn:
+        conn.executemany(f'UPDATE players SET {assignments} WHERE Name = ?', rows)
+        conn.executemany(SNAPSHOT_UPSERT, snapshot_rows)
+    # Rebuilds are not replayable from the journal, so make the commit durable now
+    db_connection.checkpoint(db_path)
+
+
+def replay_season(season=None, params=None, use_recorded_gains=False, roster_df=None, formula=None):
+    """Replay a season against the current roster; returns the replay result plus a diff summary"""
+    if roster_df is None:
+        import database as db
+        roster_df = db.get_all_players()
+    log = seasons.load_match_log(season)
+    if log is None:
+        raise ValueError(f"No match log found for season {season or seasons.get_current_season()}")
+    result = replay_log(log, roster_df["Name"].astype(str).tolist(), params=params,
+                        use_recorded_gains=use_recorded_gains, formula=formula)
+    result["summary"] = compare_tables(roster_df, result["table"])
+    result["summary"]["matches"] = int(len(log["m_num"]))
+    result["summary"]["elapsed_ms"] = round(result["elapsed"] * 1000, 2)
+    return result
+
+
+def _parse_param(text):
+    key, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {text!r}")
+    return key, float(value) if "." in value else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild ELO and stats from the match log")
+    parser.add_argument("--season", default=None, help="Season key (default: current season)")
+    parser.add_argument("--param", action="append", type=_parse_param, default=[],
+                        help="Override an ELO constant, e.g. avg_elo_coeff=0.02 (repeatable)")
+    parser.add_argument("--recorded-gains", action="store_true", help="Use t1/t2 gains stored with each match")
+    parser.add_argument("--write", action="store_true", help="Persist the rebuilt table (default: dry run)")
+    args = parser.parse_args()
+
+    result = replay_season(args.season, params=dict(args.param), use_recorded_gains=args.recorded_gains)
+    summary = result["summary"]
+    print(f"Replayed {summary['matches']} matches in {summary['elapsed_ms']} ms")
+    print(f"Players changed: {summary['players_changed']}/{summary['players']} "
+          f"(max |ELO diff| {summary['max_abs_elo_diff']})")
+    for change in summary["largest_changes"]:
+        print(f"  {change['name']}: {change['current']} -> {change['rebuilt']} ({change['diff']:+d})")
+    if args.write:
+        write_replay(result["table"], result["snapshots"])
+        print("Rebuilt table written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Batched writer for the daily ELO snapshots behind the ELO history charts.
+
+The writer remembers the last ELO it wrote per player for the current day,
+so repeated calls (every submit and every hourly refresh) only upsert the
+players whose ELO changed. The cache is per day: the first call of a new
+day writes every player once, so each day that has any snapshot has all
+of them and no reader has to carry values across days.
+"""
+import threading
+from datetime import date
+
+import metrics
+
+
+class EloSnapshotWriter:
+    """Upserts {name: elo} snapshots for a day through the given callables.
+
+    upsert(snapshots, day_str=...) writes the rows; ensure_baseline() (optional)
+    runs once before the first write.
+    """
+
+    def __init__(self, upsert, ensure_baseline=None):
+        self._upsert = upsert
+        self._ensure_baseline = ensure_baseline
+        self._last_written = {}
+        self._day = None
+        self._lock = threading.Lock()
+
+    def _check_baseline(self):
+        # Ensure baseline exists before we start recording real snapshots (once per process)
+        if self._ensure_baseline is None:
+            return
+        try:
+            self._ensure_baseline()
+        except Exception:
+            pass
+        self._ensure_baseline = None
+
+    def invalidate(self, names=None):
+        """Forget cached ELOs so the next call rewrites them (all players if names is None)."""
+        with self._lock:
+            if names is None:
+                self._last_written.clear()
+            else:
+                for name in names:
+                    self._last_written.pop(str(name), None)
+
+    def record(self, df_current, day_str=None):
+        """Upsert the day's snapshot for every player whose ELO changed that day; returns rows written."""
+        if df_current is None or df_current.empty:
+            return 0
+        day_str = day_str or date.today().isoformat()
+        with self._lock:
+            self._check_baseline()
+            if day_str != self._day:
+                self._last_written.clear()
+                self._day = day_str
+            names = df_current["Name"].astype(str).tolist()
+            elos = df_current["ELO"].astype(int).tolist()
+            changed = {
+                name: elo for name, elo in zip(names, elos)
+                if self._last_written.get(name) != elo
+            }
+            if not changed:
+                return 0
+            self._upsert(changed, day_str=day_str)
+            metrics.inc("db_rows_written_total", len(changed))
+            self._last_written.update(changed)
+            return len(changed)
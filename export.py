@@ -0,0 +1,175 @@
+"""Streaming export of players, matches and per-player match lines.
+
+Every export is a generator of text chunks: players are read through a
+SQLite cursor in fetchmany() batches, matches and lines one match folder (or
+one archived match) at a time, so memory stays flat however large the
+season is. Chunks are sized for chunked HTTP responses.
+
+Kinds and columns:
+    players  every column of the players table
+    matches  MATCH_COLUMNS, one row per match
+    lines    LINE_COLUMNS, one row per player per match
+
+`since` exports only matches (and their lines) with a number above it, for
+incremental exports.
+
+Usage:
+    python export.py players --format csv -o players.csv
+    python export.py lines --format jsonl --since 120 --season S4
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+
+import numpy as np
+
+import db_connection
+import seasons
+
+KINDS = ("players", "matches", "lines")
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+MATCH_COLUMNS = ["season", "match_num", "created_at", "map", "winning_team", "team1_score", "team2_score",
+                 "t1_gain", "t2_gain", "team1", "team2"]
+LINE_COLUMNS = ["season", "match_num", "team", "won", "Name", "K", "D", "A", "ADR", "MVP"]
+CHUNK_SIZE = 64 * 1024
+FETCH_SIZE = 500
+
+
+def iter_player_rows(db_path=None):
+    """(columns, row generator) over the players table via a server-side cursor"""
+    with db_connection.connection(db_path) as conn:
+        columns = [c[1] for c in conn.execute('PRAGMA table_info(players)')]
+
+    def rows():
+        # Checked out while the response streams, returned to the pool when the generator closes
+        with db_connection.connection(db_path) as conn:
+            cursor = conn.execute('SELECT * FROM players ORDER BY ELO DESC')
+            try:
+                while True:
+                    batch = cursor.fetchmany(FETCH_SIZE)
+                    if not batch:
+                        break
+                    yield from batch
+            finally:
+                cursor.close()
+    return columns, rows()
+
+
+def iter_season_matches(season=None, since=None):
+    """Matches of a season in order as {"match_num", "metadata", "team1", "team2"}, one at a time"""
+    season = season or seasons.get_current_season()
+    since = int(since or 0)
+    nums = [n for n in seasons.list_match_nums(season) if n > since]
+    if nums or season == seasons.get_current_season() or seasons.load_archive(season) is None:
+        for match_num in nums:
+            match = seasons.read_live_match(match_num, season)
+            if match is not None:
+                yield match
+        return
+
+    archive = seasons.load_archive(season)
+    first = int(np.searchsorted(archive["m_num"], since, side="right"))
+    for i in range(first, len(archive["m_num"])):
+        summary = seasons._match_summary(archive, i)
+        start, end = archive["m_line_start"][i], archive["m_line_start"][i + 1]
+        teams = {1: [], 2: []}
+        for j in range(start, end):
+            teams[int(archive["l_team"][j])].append(seasons._line(archive, j))
+        gains = (int(archive["m_t1_gain"][i]), int(archive["m_t2_gain"][i]))
+        yield {
+            "match_num": summary["match_num"],
+            "metadata": {
+                "winning_team": summary["winning_team"],
+                "team1_score": summary["team1_score"],
+                "team2_score": summary["team2_score"],
+                "map": summary["map_name"],
+                "created_at": str(archive["m_day"][i]) or None,
+                "t1_gain": gains[0] if gains[0] >= 0 else None,
+                "t2_gain": gains[1] if gains[1] >= 0 else None,
+            },
+            "team1": teams[1],
+            "team2": teams[2],
+        }
+
+
+def iter_match_rows(season=None, since=None):
+    season = season or seasons.get_current_season()
+    for match in iter_season_matches(season, since):
+        meta = match["metadata"]
+        yield [
+            season, match["match_num"], meta.get("created_at"), meta.get("map"), meta.get("winning_team"),
+            meta.get("team1_score"), meta.get("team2_score"), meta.get("t1_gain"), meta.get("t2_gain"),
+            ";".join(str(line.get("Name", "")) for line in match["team1"]),
+            ";".join(str(line.get("Name", "")) for line in match["team2"]),
+        ]
+
+
+def iter_line_rows(season=None, since=None):
+    season = season or seasons.get_current_season()
+    for match in iter_season_matches(season, since):
+        winner = match["metadata"].get("winning_team")
+        for team, key in ((1, "team1"), (2, "team2")):
+            for line in match[key]:
+                yield [season, match["match_num"], team, winner == f"Team {team}", line.get("Name"),
+                       seasons._num(line.get("K")), seasons._num(line.get("D")), seasons._num(line.get("A")),
+                       seasons._num(line.get("ADR"), float), seasons._num(line.get("MVP"))]
+
+
+def encode(columns, rows, fmt="csv"):
+    """Text chunks of about CHUNK_SIZE characters for rows in CSV (with header) or JSONL"""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+            buffer.write("\n")
+    for row in rows:
+        write(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(kind, fmt="csv", season=None, since=None, db_path=None):
+    """Generator of text chunks for one export"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown export {kind!r}, expected one of {', '.join(KINDS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if kind == "players":
+        columns, rows = iter_player_rows(db_path)
+    elif kind == "matches":
+        columns, rows = MATCH_COLUMNS, iter_match_rows(season, since)
+    else:
+        columns, rows = LINE_COLUMNS, iter_line_rows(season, since)
+    return encode(columns, rows, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export players, matches or per-player lines")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--season", default=None, help="Season key (default: current season)")
+    parser.add_argument("--since", type=int, default=None, help="Only matches with a higher match number")
+    parser.add_argument("-o", "--output", default=None, help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for chunk in stream_export(args.kind, args.format, args.season, args.since):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
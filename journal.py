@@ -0,0 +1,339 @@
+"""Append-only journal of league state changes, with player-table snapshots.
+
+Every match submission and admin action is appended as one record before
+anything else is written:
+    <u32 payload length> <u32 CRC-32 of payload> <payload>
+The payload is JSON {"seq", "type", "ts", "data"}. append() writes one
+record and fsyncs once, so a match costs a single fsync. A torn or corrupt
+tail (crash mid-write) fails the length/CRC check and is truncated on open.
+
+The log is split into segments, events_<first seq>.log. Snapshots are
+compressed .npz copies of the player table tagged with the seq of the last
+event they include and the segment/byte offset just past it. Saving a
+snapshot starts a new segment, and segments no kept snapshot needs are
+deleted, so the log stays short. open() reads from the newest snapshot's
+offset only (the tail), and recover() replays that tail onto the snapshot.
+
+Event types:
+    match    one submitted match: team rows, metadata and per-player deltas
+    revert   undo of the latest match (same delta payload)
+    reset    all players back to zero stats and the starting ELO
+    rebuild  bulk rewrite (ELO replay, import); not replayable, so the
+             writer takes a snapshot right after it
+"""
+import glob
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import player_table
+
+JOURNAL_DIR = os.environ.get('FPS_JOURNAL_DIR', './journal')
+LEGACY_FILENAME = 'events.log'
+SNAPSHOT_EVERY = 50
+KEEP_SNAPSHOTS = 2
+START_ELO = 1000
+
+_HEADER = struct.Struct('<II')
+_SNAPSHOT_RE = re.compile(r'snapshot_(\d+)\.npz$')
+_SEGMENT_RE = re.compile(r'events_(\d+)\.log$')
+
+
+def read_records(path, offset=0):
+    """Yield (end offset, record) for every intact record from offset on; stops at the first torn or corrupt one"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, crc = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            try:
+                record = json.loads(payload)
+            except ValueError:
+                return
+            offset += _HEADER.size + length
+            yield offset, record
+
+
+def apply_event(table, event):
+    """Apply one journaled event to a PlayerTable; False when the event cannot be replayed"""
+    kind, data = event["type"], event["data"]
+    if kind in ("match", "revert"):
+        delta = data["delta"] if kind == "match" else data
+        lines = delta["players"]
+        names = [line["name"] for line in lines]
+        stats = [[line[c] for line in lines] for c in ("K", "D", "A", "ADR", "MVP")]
+        won = [bool(line["won"]) for line in lines]
+        elo = [line["elo_change"] for line in lines]
+        label = f'match_{delta["match_num"]}'
+        if kind == "match":
+            table.apply_match(names, *stats, won, elo, delta["total_rounds"], label)
+        else:
+            table.revert_match(names, *stats, won, elo, [line["prev_round_stats"] for line in lines], label)
+        return True
+    if kind == "reset":
+        for col, values in table.columns.items():
+            values[:] = START_ELO if col == "ELO" else 0
+        table.history[:] = [""] * len(table)
+        return True
+    return False
+
+
+def touched_names(event):
+    """Players an event changes (None means every player)"""
+    if event["type"] == "match":
+        return {line["name"] for line in event["data"]["delta"]["players"]}
+    if event["type"] == "revert":
+        return {line["name"] for line in event["data"]["players"]}
+    return None
+
+
+class Journal:
+    """Journal segments plus snapshots in one folder"""
+
+    def __init__(self, directory=JOURNAL_DIR, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.last_seq = 0
+        self.since_snapshot = 0
+        self.path = None
+        self._ends = {}
+        self._tail = None
+        self._tail_seq = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _segment_path(self, first_seq):
+        return os.path.join(self.directory, f'events_{first_seq:010d}.log')
+
+    def _segments(self):
+        """(first seq, path) of the log segments, oldest first"""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, 'events_*.log')):
+            m = _SEGMENT_RE.search(path)
+            if m:
+                found.append((int(m.group(1)), path))
+        return sorted(found)
+
+    def _read_from(self, position, after_seq=0):
+        """Yield (path, end offset, record) from a snapshot's (segment, offset) position on.
+
+        Without a position, or when its segment is gone, every segment is
+        read; callers filter by seq.
+        """
+        segment, offset = position if position else (None, 0)
+        started = segment is None
+        for _, path in self._segments():
+            if not started:
+                if os.path.basename(path) != segment:
+                    continue
+                started = True
+            else:
+                offset = 0
+            for end, record in read_records(path, offset):
+                yield path, end, record
+        if not started:
+            yield from self._read_from(None)
+
+    def open(self):
+        """Read the tail after the newest snapshot, truncate a torn end and open the last segment for appending"""
+        os.makedirs(self.directory, exist_ok=True)
+        legacy = os.path.join(self.directory, LEGACY_FILENAME)
+        if os.path.exists(legacy):
+            os.replace(legacy, self._segment_path(1))
+        snapshot_seq, position = self._newest_snapshot_position()
+        segments = self._segments()
+        if not segments:
+            segments = [(snapshot_seq + 1, self._segment_path(snapshot_seq + 1))]
+        first_seq, self.path = segments[-1]
+        self.last_seq = max(snapshot_seq, first_seq - 1)
+        self._ends = {}
+        self._tail = []
+        end = 0
+        for path, record_end, record in self._read_from(position):
+            if path == self.path:
+                end = record_end
+                self._ends[record["seq"]] = record_end
+            if record["seq"] > snapshot_seq:
+                self._tail.append(record)
+                self.last_seq = max(self.last_seq, record["seq"])
+        if position and position[0] == os.path.basename(self.path):
+            end = max(end, position[1])
+        if os.path.exists(self.path) and os.path.getsize(self.path) > end:
+            print(f"Journal: truncating {os.path.getsize(self.path) - end} bytes of torn tail")
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+        self._tail_seq = snapshot_seq
+        self.since_snapshot = self.last_seq - snapshot_seq
+        self._file = open(self.path, 'ab')
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, kind, data):
+        """Durably append one event; returns its seq"""
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Journal is not open; refusing to apply an unjournaled change")
+            seq = self.last_seq + 1
+            payload = json.dumps({"seq": seq, "type": kind, "ts": time.time(), "data": data},
+                                 separators=(',', ':'), default=str).encode('utf-8')
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.last_seq = seq
+            self._ends[seq] = self._file.tell()
+            self.since_snapshot += 1
+            self._tail = None
+        return seq
+
+    def events(self, after_seq=0, position=None):
+        """Events after after_seq, read from a snapshot's (segment, offset) position when given"""
+        for _, _, record in self._read_from(position):
+            if record["seq"] > after_seq:
+                yield record
+
+    def snapshot_due(self):
+        return self.since_snapshot >= self.snapshot_every
+
+    def _snapshot_paths(self):
+        """(seq, path) of the snapshot files, newest first"""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, 'snapshot_*.npz')):
+            m = _SNAPSHOT_RE.search(path)
+            if m:
+                found.append((int(m.group(1)), path))
+        return sorted(found, reverse=True)
+
+    def latest_snapshot_seq(self):
+        paths = self._snapshot_paths()
+        return paths[0][0] if paths else 0
+
+    @staticmethod
+    def _position(meta):
+        return (meta["segment"], int(meta["offset"])) if meta.get("segment") else None
+
+    def _newest_snapshot_position(self):
+        """(seq, (segment, offset)) of the newest readable snapshot, or (0, None)"""
+        for seq, path in self._snapshot_paths():
+            try:
+                with np.load(path) as data:
+                    return seq, self._position(json.loads(str(data["meta"])))
+            except Exception:
+                continue
+        return 0, None
+
+    def save_snapshot(self, df, seq=None):
+        """Write the players DataFrame as the snapshot at seq (default: the last event).
+
+        The snapshot records where event seq ends in the log; the log then
+        moves on to a new segment and segments older than every kept
+        snapshot are deleted.
+        """
+        with self._lock:
+            seq = self.last_seq if seq is None else seq
+            offset = self._ends.get(seq, self._file.tell() if self._file is not None and seq == self.last_seq else None)
+            segment = os.path.basename(self.path) if self.path and offset is not None else None
+        table = player_table.PlayerTable.from_dataframe(df)
+        managed = set(player_table.INT_COLUMNS) | set(player_table.FLOAT_COLUMNS) | {"Name", "MatchHistory"}
+        column_names = list(table.columns)
+        meta = {
+            "seq": seq,
+            "segment": segment,
+            "offset": offset,
+            "columns": column_names,
+            "column_order": list(df.columns) + [c for c in ["Name", "MatchHistory"] + column_names if c not in df.columns],
+            "extra": {col: df[col].tolist() for col in df.columns if col not in managed},
+        }
+        path = os.path.join(self.directory, f'snapshot_{seq:010d}.npz')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                names=np.array(table.names, dtype=str),
+                history=np.array(table.history, dtype=str),
+                meta=np.array(json.dumps(meta, default=str)),
+                **{f'col_{i}': table.columns[col] for i, col in enumerate(column_names)},
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.since_snapshot = self.last_seq - seq
+            self._rotate()
+        kept = self._snapshot_paths()
+        for _, old_path in kept[KEEP_SNAPSHOTS:]:
+            os.remove(old_path)
+        self._prune_segments(min(s for s, _ in kept[:KEEP_SNAPSHOTS]))
+        return path
+
+    def _rotate(self):
+        """Start a new segment after the last event (caller holds the lock)"""
+        if self._file is None or self._file.tell() == 0:
+            return
+        self._file.close()
+        self.path = self._segment_path(self.last_seq + 1)
+        self._file = open(self.path, 'ab')
+        self._ends = {}
+
+    def _prune_segments(self, covered_seq):
+        """Delete segments whose events are all at or before covered_seq (never the active one)"""
+        segments = self._segments()
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= covered_seq and path != self.path:
+                os.remove(path)
+
+    def load_snapshot(self):
+        """(seq, PlayerTable, log position) of the newest readable snapshot, or (0, None, None)"""
+        for seq, path in self._snapshot_paths():
+            try:
+                with np.load(path) as data:
+                    meta = json.loads(str(data["meta"]))
+                    columns = {col: data[f'col_{i}'].copy() for i, col in enumerate(meta["columns"])}
+                    table = player_table.PlayerTable(
+                        data["names"].tolist(), columns, data["history"].tolist(),
+                        meta["extra"], meta["column_order"])
+                return seq, table, self._position(meta)
+            except Exception as e:
+                print(f"Journal: skipping unreadable snapshot {path}: {e}")
+        return 0, None, None
+
+    def recover(self, normalize=None):
+        """Newest snapshot with the journal tail replayed onto it.
+
+        The tail read by open() is reused, so startup parses it once.
+        normalize(table) -> table runs after every event, for the rounding
+        the live path applies between matches. Returns (table, tail events);
+        table is None when there is no snapshot or the tail holds an event
+        that cannot be replayed.
+        """
+        seq, table, position = self.load_snapshot()
+        if self._tail is not None and seq == self._tail_seq:
+            tail = self._tail
+        else:
+            tail = list(self.events(seq, position))
+        self._tail = None
+        if table is None:
+            return None, tail
+        for event in tail:
+            if not apply_event(table, event):
+                return None, tail
+            if normalize is not None:
+                table = normalize(table)
+        return table, tail
@@ -0,0 +1,193 @@
+"""Monte Carlo league simulator for tuning the ELO constants.
+
+Each simulated season draws a latent skill per bot, matchmakes lobbies the
+way /api/create-match does (best-balanced of 10 random splits), decides the
+winner and scoreboard from skill, and updates ELO with elo_engine, i.e. the
+exact code submit_match uses. Seasons run in parallel over a process pool.
+
+Reported per parameter set:
+    spearman     rank correlation between final ELO and true skill
+    inflation    mean ELO drift from the starting ELO
+    elo_std      spread of the final ELO distribution
+    convergence  matches until the rank correlation first reaches --target
+
+Usage:
+    python league_sim.py --seasons 2000 --matches 600
+    python league_sim.py --param mvp_bonus=5 --param win_rating_cap=10
+    python league_sim.py --skills bots.csv   # Name,Skill columns from the bot profiles
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import elo_engine
+
+TEAM_SIZE = 5
+CANDIDATE_SPLITS = 10
+TOP_SPLITS = 5
+
+
+def spearman(x, y):
+    """Spearman rank correlation (ties broken by position, which is fine for continuous skill)"""
+    rx = np.empty(len(x))
+    ry = np.empty(len(y))
+    rx[np.argsort(x, kind="stable")] = np.arange(len(x))
+    ry[np.argsort(y, kind="stable")] = np.arange(len(y))
+    if rx.std() == 0 or ry.std() == 0:
+        return 0.0
+    return float(np.corrcoef(rx, ry)[0, 1])
+
+
+def _pick_teams(rng, online, elo):
+    """create_match logic: 10 random splits, keep the 5 most balanced, pick one at random"""
+    lobbies = online[np.argsort(rng.random((CANDIDATE_SPLITS, len(online))), axis=1)[:, :2 * TEAM_SIZE]]
+    team_elo = elo[lobbies].reshape(CANDIDATE_SPLITS, 2, TEAM_SIZE).sum(axis=2)
+    diffs = np.abs(team_elo[:, 0] - team_elo[:, 1])
+    best = np.argsort(diffs, kind="stable")[:TOP_SPLITS]
+    lobby = lobbies[best[rng.integers(len(best))]]
+    return lobby[:TEAM_SIZE], lobby[TEAM_SIZE:]
+
+
+def _scoreboard(rng, skill, team_1, team_2, team_1_won, skill_scale):
+    """Synthetic K/D/A/ADR/MVP lines for both teams, better players frag more"""
+    lineup = np.concatenate([team_1, team_2])
+    won = np.array([team_1_won] * TEAM_SIZE + [not team_1_won] * TEAM_SIZE)
+    loser_rounds = int(rng.integers(3, 15))
+    rounds = 16 + loser_rounds
+    form = skill[lineup] * skill_scale + rng.normal(0, 0.25, len(lineup))
+    k = rng.poisson(rounds * 0.68 * np.exp(0.35 * form + 0.1 * won))
+    d = rng.poisson(rounds * 0.68 * np.exp(-0.25 * form - 0.1 * won))
+    a = rng.poisson(rounds * 0.18 * np.exp(0.15 * form))
+    adr = np.maximum(0, (k * 95 + a * 25) / rounds + rng.normal(0, 8, len(lineup))).astype(np.int64)
+    mvp = np.zeros(len(lineup), dtype=np.int64)
+    winners = np.flatnonzero(won)
+    mvp[winners[np.argmax(k[winners])]] = 1
+    return lineup, won, k, d, a, adr, mvp
+
+
+def simulate_season(seed, n_players=60, n_matches=500, params=None, online_fraction=0.5,
+                    skill_scale=1.0, win_scale=1.5, checkpoint=10, target=0.8, skills=None):
+    """Play one synthetic season and return its quality metrics"""
+    rng = np.random.default_rng(seed)
+    p = elo_engine.resolve_params(params)
+    skill = np.asarray(skills, dtype=np.float64) if skills is not None else rng.normal(0, 1, n_players)
+    n_players = len(skill)
+    elo = np.full(n_players, int(p["start_elo"]), dtype=np.int64)
+    n_online = max(2 * TEAM_SIZE, int(n_players * online_fraction))
+
+    convergence = None
+    curve = []
+    for match in range(1, n_matches + 1):
+        online = rng.choice(n_players, n_online, replace=False)
+        team_1, team_2 = _pick_teams(rng, online, elo)
+        edge = (skill[team_1].mean() - skill[team_2].mean()) * win_scale
+        team_1_won = rng.random() < 1.0 / (1.0 + np.exp(-edge))
+        lineup, won, k, d, a, adr, mvp = _scoreboard(rng, skill, team_1, team_2, team_1_won, skill_scale)
+
+        t1_gain, t2_gain = elo_engine.team_gains(elo[team_1].sum(), elo[team_2].sum(), p)
+        win_gain, loss_gain = (t1_gain, t2_gain) if team_1_won else (t2_gain, t1_gain)
+        elo[lineup] += elo_engine.elo_changes(elo[lineup], k, d, a, adr, mvp, won, win_gain, loss_gain, p)
+
+        if match % checkpoint == 0:
+            rho = spearman(elo, skill)
+            curve.append(rho)
+            if convergence is None and rho >= target:
+                convergence = match
+
+    return {
+        "spearman": spearman(elo, skill),
+        "inflation": float(elo.mean() - p["start_elo"]),
+        "elo_std": float(elo.std()),
+        "convergence": convergence,
+        "curve": curve,
+    }
+
+
+def _run_one(args):
+    seed, kwargs = args
+    return simulate_season(seed, **kwargs)
+
+
+def run_simulation(n_seasons=1000, workers=None, seed=0, **kwargs):
+    """Simulate many seasons in parallel and aggregate their metrics"""
+    started = time.perf_counter()
+    seeds = np.random.SeedSequence(seed).generate_state(n_seasons).tolist()
+    jobs = [(s, kwargs) for s in seeds]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_run_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_one, jobs, chunksize=max(1, n_seasons // (workers * 4))))
+
+    spearmans = np.array([r["spearman"] for r in results])
+    inflation = np.array([r["inflation"] for r in results])
+    spread = np.array([r["elo_std"] for r in results])
+    converged = np.array([r["convergence"] for r in results if r["convergence"] is not None])
+    curves = np.array([r["curve"] for r in results]) if results and results[0]["curve"] else np.zeros((0, 0))
+    return {
+        "seasons": n_seasons,
+        "spearman_mean": round(float(spearmans.mean()), 4),
+        "spearman_p10": round(float(np.percentile(spearmans, 10)), 4),
+        "inflation_mean": round(float(inflation.mean()), 2),
+        "inflation_std": round(float(inflation.std()), 2),
+        "elo_std_mean": round(float(spread.mean()), 2),
+        "converged_share": round(len(converged) / n_seasons, 4),
+        "convergence_median": int(np.median(converged)) if len(converged) else None,
+        "spearman_curve": [round(float(v), 4) for v in curves.mean(axis=0)] if curves.size else [],
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def _parse_param(text):
+    key, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {text!r}")
+    return key, float(value) if "." in value else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate seasons to evaluate ELO constants")
+    parser.add_argument("--seasons", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=60)
+    parser.add_argument("--matches", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target", type=float, default=0.8, help="Rank correlation counted as converged")
+    parser.add_argument("--skills", default=None, help="CSV with Name,Skill columns for the real bot pool")
+    parser.add_argument("--param", action="append", type=_parse_param, default=[],
+                        help="Override an ELO constant, e.g. mvp_bonus=5 (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    skills = None
+    if args.skills:
+        skills = pd.read_csv(args.skills)["Skill"].to_numpy(dtype=np.float64)
+        skills = (skills - skills.mean()) / (skills.std() or 1.0)
+
+    params = dict(args.param) or None
+    common = dict(n_seasons=args.seasons, workers=args.workers, seed=args.seed, n_players=args.players,
+                  n_matches=args.matches, target=args.target, skills=skills)
+    report = {"baseline": run_simulation(**common)}
+    if params:
+        report["candidate"] = run_simulation(params=params, **common)
+        report["candidate"]["params"] = params
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for label, r in report.items():
+        print(f"[{label}] {r['seasons']} seasons in {r['elapsed_s']}s")
+        print(f"  spearman  mean {r['spearman_mean']}  p10 {r['spearman_p10']}")
+        print(f"  inflation mean {r['inflation_mean']} ELO  (std {r['inflation_std']})")
+        print(f"  elo spread {r['elo_std_mean']}")
+        print(f"  converged {r['converged_share']:.0%} of seasons, median after {r['convergence_median']} matches")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Per-(player, map) performance aggregates in the SQLite database.
+
+player_map_stats holds one row per season, player and map with wins,
+losses, kills, deaths, assists, ADR total and rounds played. submit_match
+upserts the ten lines of a match in one transaction and revert_match()
+subtracts them again; backfill() rebuilds a season from its match log with
+one grouped pass and one bulk insert.
+player_map_stats_meta counts the matches a season's rows include, so a
+stale table (bulk import, replaced match folders) is detected cheaply.
+
+Usage:
+    python map_stats.py               # backfill the current season
+    python map_stats.py --season S3
+"""
+import argparse
+
+import numpy as np
+
+import db_connection
+import seasons
+
+# Minimum games on a map before a player is listed among its best players
+MIN_MAP_GAMES = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_map_stats (
+    season TEXT NOT NULL,
+    Name TEXT NOT NULL,
+    map_name TEXT NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    assists INTEGER NOT NULL DEFAULT 0,
+    adr_total INTEGER NOT NULL DEFAULT 0,
+    rounds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, Name, map_name)
+);
+CREATE INDEX IF NOT EXISTS idx_player_map_stats_map ON player_map_stats (season, map_name);
+CREATE TABLE IF NOT EXISTS player_map_stats_meta (
+    season TEXT PRIMARY KEY,
+    matches INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+STAT_COLUMNS = ["wins", "losses", "kills", "deaths", "assists", "adr_total", "rounds"]
+
+_UPSERT = (
+    f'INSERT INTO player_map_stats (season, Name, map_name, {", ".join(STAT_COLUMNS)}) '
+    f'VALUES (?, ?, ?, {", ".join("?" for _ in STAT_COLUMNS)}) '
+    f'ON CONFLICT (season, Name, map_name) DO UPDATE SET '
+    + ", ".join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS)
+)
+
+
+def _connect(db_path=None):
+    """Pooled connection (a context manager) with SCHEMA applied"""
+    return db_connection.connection(db_path, schema=SCHEMA)
+
+
+def record_match(map_name, lines, total_rounds, season=None, db_path=None):
+    """Add one match in a single transaction.
+
+    lines are (name, won, K, D, A, ADR) tuples, one per player.
+    """
+    season = season or seasons.get_current_season()
+    rows = [
+        (season, str(name), str(map_name), int(bool(won)), int(not won), int(k), int(d), int(a), int(adr), int(total_rounds))
+        for name, won, k, d, a, adr in lines
+    ]
+    with db_connection.transaction(db_path, schema=SCHEMA) as conn:
+        conn.executemany(_UPSERT, rows)
+        conn.execute('INSERT INTO player_map_stats_meta (season, matches) VALUES (?, 1) '
+                     'ON CONFLICT (season) DO UPDATE SET matches = matches + 1', (season,))
+    return len(rows)
+
+
+def revert_match(conn, map_name, lines, total_rounds, season=None):
+    """Subtract one match added by record_match, inside the caller's transaction.
+
+    conn must already have SCHEMA applied (executescript would commit);
+    db_connection.transaction(path, schema=SCHEMA) does that.
+    """
+    season = season or seasons.get_current_season()
+    rows = [
+        (int(bool(won)), int(not won), int(k), int(d), int(a), int(adr), int(total_rounds),
+         season, str(name), str(map_name))
+        for name, won, k, d, a, adr in lines
+    ]
+    conn.executemany(
+        'UPDATE player_map_stats SET ' + ", ".join(f"{c} = {c} - ?" for c in STAT_COLUMNS)
+        + ' WHERE season = ? AND Name = ? AND map_name = ?', rows)
+    conn.execute('DELETE FROM player_map_stats WHERE season = ? AND map_name = ? AND wins + losses <= 0',
+                 (season, str(map_name)))
+    conn.execute('UPDATE player_map_stats_meta SET matches = MAX(matches - 1, 0) WHERE season = ?', (season,))
+    return len(rows)
+
+
+def aggregate_log(log):
+    """(player, map) keys and summed STAT_COLUMNS for a columnar match log, in one grouped pass"""
+    starts = log["m_line_start"].astype(np.int64)
+    match_pos = np.repeat(np.arange(len(log["m_num"])), np.diff(starts))
+    player = log["l_player"].astype(np.int64)
+    map_idx = log["m_map"].astype(np.int64)[match_pos]
+    won = (log["m_winner"][match_pos].astype(np.int64) == log["l_team"]).astype(np.int64)
+    rounds = (log["m_t1_score"].astype(np.int64) + log["m_t2_score"].astype(np.int64))[match_pos]
+    values = np.column_stack([
+        won, 1 - won, log["l_k"].astype(np.int64), log["l_d"].astype(np.int64), log["l_a"].astype(np.int64),
+        # submit_match stores int(ADR)
+        np.trunc(log["l_adr"].astype(np.float64)).astype(np.int64), rounds,
+    ])
+    n_maps = max(len(log["maps"]), 1)
+    keys, group = np.unique(player * n_maps + map_idx, return_inverse=True)
+    sums = np.zeros((len(keys), len(STAT_COLUMNS)), dtype=np.int64)
+    np.add.at(sums, group.ravel(), values)
+    return [(str(log["names"][k // n_maps]), str(log["maps"][k % n_maps])) for k in keys.tolist()], sums
+
+
+def backfill(season=None, db_path=None):
+    """Rebuild a season's rows from its match log; returns the number of rows written"""
+    season = season or seasons.get_current_season()
+    log = seasons.load_match_log(season)
+    if log is None or not len(log["m_num"]):
+        keys, sums, n_matches = [], np.zeros((0, len(STAT_COLUMNS)), dtype=np.int64), 0
+    else:
+        (keys, sums), n_matches = aggregate_log(log), len(log["m_num"])
+    rows = [(season, name, map_name, *values) for (name, map_name), values in zip(keys, sums.tolist())]
+    with db_connection.transaction(db_path, schema=SCHEMA) as conn:
+        conn.execute('DELETE FROM player_map_stats WHERE season = ?', (season,))
+        conn.executemany(
+            f'INSERT INTO player_map_stats (season, Name, map_name, {", ".join(STAT_COLUMNS)}) '
+            f'VALUES (?, ?, ?, {", ".join("?" for _ in STAT_COLUMNS)})', rows)
+        conn.execute('INSERT OR REPLACE INTO player_map_stats_meta (season, matches) VALUES (?, ?)',
+                     (season, n_matches))
+    return len(rows)
+
+
+def ensure_backfilled(season=None, db_path=None):
+    """Backfill when the table does not cover every match of the season; True if it did"""
+    season = season or seasons.get_current_season()
+    with _connect(db_path) as conn:
+        row = conn.execute('SELECT matches FROM player_map_stats_meta WHERE season = ?', (season,)).fetchone()
+    n_matches = len(seasons.list_match_nums(season))
+    if not n_matches and season != seasons.get_current_season():
+        archive = seasons.load_archive(season)
+        n_matches = len(archive["m_num"]) if archive is not None else 0
+    if row is not None and row[0] == n_matches:
+        return False
+    backfill(season, db_path)
+    return True
+
+
+def _summary(wins, losses, kills, deaths, assists, adr_total, rounds):
+    games = wins + losses
+    return {
+        "games": games,
+        "wins": wins,
+        "losses": losses,
+        "win_rate": round(wins / games * 100, 1) if games else 0.0,
+        "kd": round(kills / max(deaths, 1), 2),
+        "kpr": round(kills / rounds, 3) if rounds else 0.0,
+        "apr": round(assists / rounds, 3) if rounds else 0.0,
+        "adr": round(adr_total / games, 2) if games else 0.0,
+    }
+
+
+def player_maps(name, season=None, db_path=None):
+    """Per-map stats of one player, most played first"""
+    season = season or seasons.get_current_season()
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            f'SELECT map_name, {", ".join(STAT_COLUMNS)} FROM player_map_stats '
+            f'WHERE season = ? AND Name = ? ORDER BY wins + losses DESC, map_name', (season, str(name))).fetchall()
+    return [{"map_name": r[0], **_summary(*r[1:])} for r in rows]
+
+
+def map_players(season=None, min_games=MIN_MAP_GAMES, limit=3, db_path=None):
+    """{map: best players by win rate (then K/D) among those with min_games on it}"""
+    season = season or seasons.get_current_season()
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            f'SELECT map_name, Name, {", ".join(STAT_COLUMNS)} FROM player_map_stats '
+            f'WHERE season = ? AND wins + losses >= ?', (season, int(min_games))).fetchall()
+    by_map = {}
+    for r in rows:
+        by_map.setdefault(r[0], []).append({"name": r[1], **_summary(*r[2:])})
+    for players in by_map.values():
+        players.sort(key=lambda p: (-p["win_rate"], -p["kd"]))
+        del players[limit:]
+    return by_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill per-player map statistics from the match log")
+    parser.add_argument("--season", default=None, help="Season key (default: current season)")
+    args = parser.parse_args()
+    rows = backfill(args.season)
+    print(f"Wrote {rows} player/map rows for season {args.season or seasons.get_current_season()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Lightweight request instrumentation for the web app.
+
+Timing spans around the hot phases of a request (SQLite reads and writes,
+pandas recomputation, match CSV reads, rank icon encoding, JSON
+serialization, OCR) are aggregated into per-route histograms, together with
+a few counters, and rendered in the Prometheus text format for /metrics.
+
+Spans may nest (a CSV read inside a streak computation), so phases of one
+route are not exclusive; "total" is the whole request.
+
+The sampling profiler is opt-in: set FPS_PROFILE_SLOW_MS to a threshold and
+every request slower than that writes a folded-stack file (one
+"frame;frame;frame count" line per stack, ready for flamegraph.pl or
+speedscope) into FPS_PROFILE_DIR.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = "fps"
+COUNTERS = {
+    "csv_files_read_total": "Match CSV files read from match_history",
+    "db_rows_written_total": "Rows written to the SQLite database",
+    "ocr_seconds_total": "Seconds spent in OCR text extraction",
+}
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = Counter()
+_local = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def observe(route, phase, seconds):
+    with _lock:
+        hist = _histograms.get((route, phase))
+        if hist is None:
+            hist = _histograms[(route, phase)] = Histogram()
+        hist.observe(seconds)
+
+
+def inc(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def current_route():
+    return getattr(_local, "route", None) or "background"
+
+
+@contextmanager
+def span(phase):
+    """Time a block and record it under the current request's route"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(current_route(), phase, time.perf_counter() - started)
+
+
+def begin_request(route):
+    _local.route = route
+    _local.started = time.perf_counter()
+    profiler.attach()
+
+
+def end_request():
+    route = current_route()
+    started = getattr(_local, "started", None)
+    _local.route = None
+    if started is None:
+        return 0.0
+    _local.started = None
+    elapsed = time.perf_counter() - started
+    observe(route, "total", elapsed)
+    profiler.detach(route, elapsed)
+    return elapsed
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    """All histograms and counters in the Prometheus text exposition format"""
+    with _lock:
+        histograms = {key: (list(h.counts), h.total, h.count) for key, h in _histograms.items()}
+        counters = dict(_counters)
+
+    name = f"{PREFIX}_request_phase_seconds"
+    lines = [f"# HELP {name} Time spent per request phase", f"# TYPE {name} histogram"]
+    for (route, phase), (counts, total, count) in sorted(histograms.items()):
+        labels = f'route="{_escape(route)}",phase="{_escape(phase)}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS, counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+
+    for counter, help_text in COUNTERS.items():
+        full = f"{PREFIX}_{counter}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full} {counters.get(counter, 0):g}")
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving requests and keeps the slow ones"""
+
+    def __init__(self, threshold_ms=None, out_dir=None, interval_ms=None):
+        self.configure(threshold_ms, out_dir, interval_ms)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, threshold_ms=None, out_dir=None, interval_ms=None):
+        env_threshold = os.environ.get("FPS_PROFILE_SLOW_MS")
+        threshold = threshold_ms if threshold_ms is not None else env_threshold
+        self.threshold = float(threshold) / 1000.0 if threshold not in (None, "") else None
+        self.out_dir = out_dir or os.environ.get("FPS_PROFILE_DIR", "./profiles")
+        self.interval = float(interval_ms or os.environ.get("FPS_PROFILE_INTERVAL_MS", 5)) / 1000.0
+
+    @property
+    def enabled(self):
+        return self.threshold is not None
+
+    def attach(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+                self._thread.start()
+
+    def detach(self, route, elapsed):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if stacks and elapsed >= self.threshold:
+            self._dump(route, elapsed, stacks)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own:
+                        stacks[_fold(frame)] += 1
+
+    def _dump(self, route, elapsed, stacks):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+            path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{int(elapsed * 1000)}ms.folded")
+            with open(path, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except Exception as e:
+            print(f"Warning: could not write profile: {e}")
+
+
+def _fold(frame):
+    """Root-first "file:function" frames joined by ';'"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,137 @@
+"""Screenshot preprocessing for OCR as named, timed stages.
+
+A profile is an ordered list of (stage, params) pairs run on a decoded BGR
+image. Every stage is timed; inside a request the timings also land in the
+metrics histograms as ocr_<stage> phases.
+
+Profiles:
+    quality   grayscale -> CLAHE -> non-local-means denoise -> Otsu
+              (the original preprocessing, kept as the default)
+    balanced  grayscale -> downscale to 1600px -> CLAHE -> bilateral -> Otsu
+    fast      grayscale -> downscale to 1280px -> median blur -> adaptive threshold
+
+The profile comes from the request, else FPS_OCR_PROFILE, else "quality".
+benchmarks/bench_ocr.py compares them for accuracy and latency.
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+
+DEFAULT_PROFILE = os.environ.get('FPS_OCR_PROFILE', 'quality')
+
+
+def grayscale(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+
+def downscale(img, max_width=1280):
+    height, width = img.shape[:2]
+    if width <= max_width:
+        return img
+    scale = max_width / width
+    return cv2.resize(img, (max_width, int(round(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+def clahe(img, clip_limit=2.0, tile_grid_size=8):
+    return cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid_size, tile_grid_size)).apply(img)
+
+
+def nlmeans(img, h=10, template_window=7, search_window=21):
+    return cv2.fastNlMeansDenoising(img, None, h, template_window, search_window)
+
+
+def bilateral(img, diameter=5, sigma_color=50, sigma_space=50):
+    return cv2.bilateralFilter(img, diameter, sigma_color, sigma_space)
+
+
+def median(img, ksize=3):
+    return cv2.medianBlur(img, ksize)
+
+
+def otsu(img):
+    _, thresh = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+
+def adaptive_threshold(img, block_size=31, c=10):
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block_size, c)
+
+
+STAGES = {
+    "grayscale": grayscale,
+    "downscale": downscale,
+    "clahe": clahe,
+    "nlmeans": nlmeans,
+    "bilateral": bilateral,
+    "median": median,
+    "otsu": otsu,
+    "adaptive_threshold": adaptive_threshold,
+}
+
+PROFILES = {
+    "quality": [
+        ("grayscale", {}),
+        ("clahe", {"clip_limit": 2.0, "tile_grid_size": 8}),
+        ("nlmeans", {"h": 10, "template_window": 7, "search_window": 21}),
+        ("otsu", {}),
+    ],
+    "balanced": [
+        ("grayscale", {}),
+        ("downscale", {"max_width": 1600}),
+        ("clahe", {"clip_limit": 2.0, "tile_grid_size": 8}),
+        ("bilateral", {"diameter": 5, "sigma_color": 50, "sigma_space": 50}),
+        ("otsu", {}),
+    ],
+    "fast": [
+        ("grayscale", {}),
+        ("downscale", {"max_width": 1280}),
+        ("median", {"ksize": 3}),
+        ("adaptive_threshold", {"block_size": 31, "c": 10}),
+    ],
+}
+
+
+def resolve_profile(profile=None):
+    """Stage list for a profile name (or an explicit stage list)"""
+    if profile is None or profile == "":
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown OCR profile {profile!r}, expected one of {', '.join(PROFILES)}")
+        return PROFILES[profile]
+    for name, _ in profile:
+        if name not in STAGES:
+            raise ValueError(f"Unknown OCR stage {name!r}")
+    return profile
+
+
+def decode(image_bytes):
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+
+def run(img, profile=None, timings=None):
+    """Apply a profile's stages to a decoded image; per-stage seconds are added to timings"""
+    for name, params in resolve_profile(profile):
+        started = time.perf_counter()
+        img = STAGES[name](img, **params)
+        elapsed = time.perf_counter() - started
+        metrics.observe(metrics.current_route(), f"ocr_{name}", elapsed)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+    return img
+
+
+def preprocess(image_bytes, profile=None, timings=None):
+    """Decode screenshot bytes and run the preprocessing profile"""
+    started = time.perf_counter()
+    img = decode(image_bytes)
+    if timings is not None:
+        timings["decode"] = timings.get("decode", 0.0) + time.perf_counter() - started
+    return run(img, profile, timings)
@@ -0,0 +1,207 @@
+"""Rolling per-player form: last-5/10/20 aggregates and an EWMA form score.
+
+Each player owns a ring buffer of their last CAPACITY match lines plus one
+running sum per window, so recording a match is O(1) per player: the new
+line is added to every window sum and the line that falls out of each
+window (still in the ring, since every window fits in it) is subtracted.
+Reads divide sums that are already there and never scan match history.
+
+The tracker is rebuilt from the season's match log when its cached folder
+is missing or stale, and saved next to the season's match folders after
+every submitted match. Saves write only the rows of players who played
+since the last save, in place, unless the roster grew.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+import elo_engine
+
+FIELDS = ["k", "d", "a", "adr", "rounds", "rating", "won"]
+WINDOWS = (5, 10, 20)
+CAPACITY = max(WINDOWS)
+FORM_ALPHA = 0.2
+FORM_FILENAME = 'player_form'
+FEATURES = ["form"] + [f"{stat}_{w}" for w in WINDOWS for stat in ("kd", "kpr", "adr", "rating", "win_rate")]
+# Columns of FEATURES that make up a player's recent strength for matchmaking
+STRENGTH_FEATURES = ["form"] + [f"rating_{w}" for w in WINDOWS]
+ARRAYS = ("buffer", "head", "count", "sums", "ewma")
+
+_F = {name: i for i, name in enumerate(FIELDS)}
+_EMPTY_WINDOW = {"matches": 0, "kd": 0.0, "kpr": 0.0, "adr": 0.0, "rating": 0.0, "win_rate": 0.0}
+
+
+class FormTracker:
+    """Ring buffers and window sums for every player seen this season"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.names = []
+        self.index = {}
+        self.buffer = np.zeros((0, CAPACITY, len(FIELDS)))
+        self.head = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros((0, len(WINDOWS), len(FIELDS)))
+        self.ewma = np.zeros(0)
+        self.matches = 0
+        # Rows changed since the last save or load; None: every row (rebuilt, never saved)
+        self._dirty = None
+
+    def _rows(self, names):
+        """Row of every name, adding new players (arrays grow by doubling)"""
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+        needed = len(self.names)
+        if needed > len(self.head):
+            size = max(needed, 2 * len(self.head), 16)
+            grow = size - len(self.head)
+            self.buffer = np.concatenate([self.buffer, np.zeros((grow, CAPACITY, len(FIELDS)))])
+            self.head = np.concatenate([self.head, np.zeros(grow, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.sums = np.concatenate([self.sums, np.zeros((grow, len(WINDOWS), len(FIELDS)))])
+            self.ewma = np.concatenate([self.ewma, np.zeros(grow)])
+        return np.array([self.index[n] for n in names], dtype=np.int64)
+
+    def _push(self, names, k, d, a, adr, won, total_rounds):
+        names = [str(n) for n in names]
+        idx = self._rows(names)
+        k, d, a = (np.asarray(v, dtype=np.float64) for v in (k, d, a))
+        adr = np.asarray(adr, dtype=np.float64)
+        rating = elo_engine.match_ratings(k, d, a, adr)
+        values = np.column_stack([k, d, a, adr, np.full(len(idx), float(total_rounds)),
+                                  rating, np.asarray(won, dtype=np.float64)])
+
+        for j, w in enumerate(WINDOWS):
+            leaving = self.buffer[idx, (self.head[idx] - w) % CAPACITY]
+            leaving[self.count[idx] < w] = 0.0
+            self.sums[idx, j] += values - leaving
+        self.buffer[idx, self.head[idx]] = values
+        self.head[idx] = (self.head[idx] + 1) % CAPACITY
+        first = self.count[idx] == 0
+        self.count[idx] += 1
+        self.ewma[idx] = np.where(first, rating, FORM_ALPHA * rating + (1 - FORM_ALPHA) * self.ewma[idx])
+        if self._dirty is not None:
+            self._dirty.update(idx.tolist())
+
+    def record(self, names, k, d, a, adr, won, total_rounds):
+        """Add one match's lines (one per player) to the players' windows"""
+        with self._lock:
+            self._push(names, k, d, a, adr, won, total_rounds)
+            self.matches += 1
+
+    def rebuild(self, log):
+        """Replay a columnar match log (seasons.load_match_log) from scratch"""
+        with self._lock:
+            self.reset()
+            if log is None:
+                return
+            names = log["names"]
+            starts = log["m_line_start"]
+            for i in range(len(log["m_num"])):
+                lines = slice(int(starts[i]), int(starts[i + 1]))
+                self._push(names[log["l_player"][lines]], log["l_k"][lines], log["l_d"][lines], log["l_a"][lines],
+                           np.trunc(log["l_adr"][lines]), log["l_team"][lines] == log["m_winner"][i],
+                           int(log["m_t1_score"][i]) + int(log["m_t2_score"][i]))
+            self.matches = len(log["m_num"])
+
+    def _window_stats(self, i, j):
+        n = 0 if i is None else int(min(self.count[i], WINDOWS[j]))
+        if n == 0:
+            return dict(_EMPTY_WINDOW)
+        s = self.sums[i, j].tolist()
+        return {
+            "matches": n,
+            "kd": round(s[_F["k"]] / max(s[_F["d"]], 1.0), 2),
+            "kpr": round(s[_F["k"]] / s[_F["rounds"]], 3) if s[_F["rounds"]] > 0 else 0.0,
+            "adr": round(s[_F["adr"]] / n, 2),
+            "rating": round(s[_F["rating"]] / n, 2),
+            "win_rate": round(s[_F["won"]] / n * 100, 1),
+        }
+
+    def stats(self, name):
+        """{"form": EWMA rating, "last_5": {...}, "last_10": {...}, "last_20": {...}} for one player"""
+        i = self.index.get(str(name))
+        out = {"form": round(float(self.ewma[i]), 3) if i is not None else 0.0}
+        for j, w in enumerate(WINDOWS):
+            out[f"last_{w}"] = self._window_stats(i, j)
+        return out
+
+    def features(self, names):
+        """Matrix (players x FEATURES) for matchmaking; unknown players get zeros"""
+        out = np.zeros((len(names), len(FEATURES)))
+        for row, name in enumerate(names):
+            i = self.index.get(str(name))
+            if i is None:
+                continue
+            values = [self.ewma[i]]
+            for j in range(len(WINDOWS)):
+                s = self._window_stats(i, j)
+                values += [s["kd"], s["kpr"], s["adr"], s["rating"], s["win_rate"] / 100]
+            out[row] = values
+        return out
+
+    def form(self, names):
+        """EWMA form score per name (0 for players without matches)"""
+        return [float(self.ewma[self.index[str(n)]]) if str(n) in self.index else 0.0 for n in names]
+
+    def save(self, path):
+        """Write the tracker to a folder: one .npy per array plus meta.json.
+
+        When the folder already holds this roster (saved or loaded before),
+        only the rows recorded since are written, in place through a memory
+        map; otherwise every array is rewritten. meta.json is replaced last,
+        so an interrupted save leaves a match count that no longer matches
+        the season and the next load rebuilds.
+        """
+        with self._lock:
+            n = len(self.names)
+            meta_path = os.path.join(path, 'meta.json')
+            if self._dirty is not None and _read_meta(meta_path).get("names") == self.names:
+                rows = np.array(sorted(self._dirty), dtype=np.int64)
+                if len(rows):
+                    for key in ARRAYS:
+                        stored = np.load(os.path.join(path, key + '.npy'), mmap_mode='r+')
+                        stored[rows] = getattr(self, key)[rows]
+                        stored.flush()
+                        del stored
+            else:
+                os.makedirs(path, exist_ok=True)
+                for key in ARRAYS:
+                    np.save(os.path.join(path, key + '.npy'), getattr(self, key)[:n])
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({"names": self.names, "matches": self.matches}, f)
+            os.replace(tmp_path, meta_path)
+            self._dirty = set()
+
+    def load(self, path):
+        meta = _read_meta(os.path.join(path, 'meta.json'))
+        arrays = {key: np.load(os.path.join(path, key + '.npy'), allow_pickle=False) for key in ARRAYS}
+        with self._lock:
+            self.names = [str(n) for n in meta["names"]]
+            self.index = {name: i for i, name in enumerate(self.names)}
+            for key, values in arrays.items():
+                setattr(self, key, values)
+            self.matches = int(meta["matches"])
+            self._dirty = set()
+        return self.matches
+
+
+def _read_meta(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def strength(features):
+    """Recent strength of each row of a features() matrix: mean of the EWMA form and the windowed ratings"""
+    return features[:, [FEATURES.index(f) for f in STRENGTH_FEATURES]].mean(axis=1)
@@ -0,0 +1,147 @@
+"""In-memory player name search: sorted-prefix array plus a trigram index.
+
+Names are normalized (case-folded, whitespace collapsed) and indexed under
+the full name and under every word after the first, so "tenz" finds
+"SEN tenz" and "kye" finds "100T Kyedae". Prefix lookups are two bisects
+into a sorted key array; typo-tolerant lookups take candidates from the
+rarest query trigrams in an inverted index and rank names by their best
+key's trigram similarity, so "kyedea" still finds "100T Kyedae".
+
+sync() diffs a new roster against the indexed one and only adds or
+removes the names that changed.
+"""
+import bisect
+import math
+import re
+import threading
+
+MIN_SIMILARITY = 0.3
+DEFAULT_LIMIT = 10
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', str(text)).strip().casefold()
+
+
+def trigrams(text):
+    """Trigrams of a normalized string padded so short names and word edges count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+    """Prefix and trigram lookups over a changing set of player names"""
+
+    def __init__(self, names=()):
+        self._lock = threading.Lock()
+        self._keys = []      # sorted (key, name) pairs; a name appears once per indexed key
+        self._grams = {}     # trigram -> set of (key, name)
+        self._name_grams = {}  # name -> {key: trigrams of key}
+        self.source = None
+        self.sync(names)
+
+    def __len__(self):
+        return len(self._name_grams)
+
+    def __contains__(self, name):
+        return name in self._name_grams
+
+    @staticmethod
+    def _index_keys(name):
+        words = normalize(name).split(' ')
+        return {' '.join(words)} | {' '.join(words[i:]) for i in range(1, len(words))}
+
+    def _add(self, name):
+        key_grams = {}
+        for key in self._index_keys(name):
+            bisect.insort(self._keys, (key, name))
+            key_grams[key] = trigrams(key)
+            for gram in key_grams[key]:
+                self._grams.setdefault(gram, set()).add((key, name))
+        self._name_grams[name] = key_grams
+
+    def _remove(self, name):
+        for key, grams in self._name_grams.pop(name).items():
+            i = bisect.bisect_left(self._keys, (key, name))
+            if i < len(self._keys) and self._keys[i] == (key, name):
+                del self._keys[i]
+            for gram in grams:
+                bucket = self._grams[gram]
+                bucket.discard((key, name))
+                if not bucket:
+                    del self._grams[gram]
+
+    def add(self, name):
+        with self._lock:
+            if name not in self._name_grams:
+                self._add(name)
+
+    def remove(self, name):
+        with self._lock:
+            if name in self._name_grams:
+                self._remove(name)
+
+    def sync(self, names, source=None):
+        """Make the index hold exactly names; returns (added, removed) counts"""
+        names = {str(n) for n in names}
+        with self._lock:
+            current = set(self._name_grams)
+            removed, added = current - names, names - current
+            for name in removed:
+                self._remove(name)
+            for name in added:
+                self._add(name)
+            self.source = source
+        return len(added), len(removed)
+
+    def prefix(self, query, limit=DEFAULT_LIMIT):
+        """Names with a word-start prefix match, full-name matches first, then shorter names"""
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (q,))
+            end = bisect.bisect_left(self._keys, (q + '\U0010ffff',))
+            matches = self._keys[start:end]
+        best = {}
+        for key, name in matches:
+            full = normalize(name) == key
+            rank = (0 if full else 1, len(name), name)
+            if name not in best or rank < best[name]:
+                best[name] = rank
+        return [name for name, _ in sorted(best.items(), key=lambda item: item[1])[:limit]]
+
+    def fuzzy(self, query, limit=DEFAULT_LIMIT, min_similarity=MIN_SIMILARITY):
+        """(name, similarity) for names whose best key shares enough trigrams with the query"""
+        q = normalize(query)
+        if not q:
+            return []
+        grams = trigrams(q)
+        # A key scoring >= min_similarity shares at least `needed` trigrams with the query,
+        # so it must appear in one of the len(grams) - needed + 1 rarest ones
+        needed = max(1, math.ceil(min_similarity * len(grams)))
+        with self._lock:
+            postings = sorted((self._grams.get(gram, ()) for gram in grams), key=len)
+            candidates = set().union(*postings[:len(grams) - needed + 1])
+            best = {}
+            for key, name in candidates:
+                key_grams = self._name_grams[name][key]
+                count = len(grams & key_grams)
+                score = count / (len(grams) + len(key_grams) - count)
+                if score > best.get(name, 0.0):
+                    best[name] = score
+        scored = [(name, score) for name, score in best.items() if score >= min_similarity]
+        scored.sort(key=lambda item: (-item[1], len(item[0]), item[0]))
+        return scored[:limit]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Prefix matches first, then typo-tolerant matches, without duplicates"""
+        results = [{"name": name, "match": "prefix", "score": 1.0} for name in self.prefix(query, limit)]
+        if len(results) < limit:
+            seen = {r["name"] for r in results}
+            for name, score in self.fuzzy(query, limit):
+                if name not in seen:
+                    results.append({"name": name, "match": "fuzzy", "score": round(score, 3)})
+                    if len(results) == limit:
+                        break
+        return results
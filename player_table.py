@@ -0,0 +1,228 @@
+"""Struct-of-arrays player table for the request hot path.
+
+PlayerTable holds the players with one typed NumPy array per stat, a
+name -> row dict and __slots__ row views, so the leaderboard, matchmaking
+and match submission avoid .loc boolean masks and iterrows(). Match
+submission updates a copy of the table in place (apply_match, derive,
+sort_by_elo) and the DataFrame in global_context["database"] is produced
+from it, so the table is not rebuilt from the DataFrame per request.
+"""
+import numpy as np
+import pandas as pd
+
+import elo_engine
+import rating_formulas
+
+INT_COLUMNS = ["Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "Matches", "ELO"]
+FLOAT_COLUMNS = ["KPM", "DPM", "APM", "K/D", "ADR", "Rating", "KPR", "DPR", "APR"]
+ROUND_COLUMNS = ["KPR", "DPR", "APR"]
+
+
+class PlayerRow:
+    """Read-only view of one player, indexable like a DataFrame row"""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, column):
+        if column == "Name":
+            return self._table.names[self._i]
+        if column == "MatchHistory":
+            return self._table.history[self._i]
+        return self._table.columns[column][self._i].item()
+
+    def get(self, column, default=None):
+        try:
+            return self[column]
+        except KeyError:
+            return default
+
+    @property
+    def index(self):
+        return self._i
+
+
+class PlayerTable:
+    """Players as typed column arrays, in the row order of the source DataFrame"""
+
+    __slots__ = ("names", "index", "columns", "history", "_extra", "_column_order")
+
+    def __init__(self, names, columns, history, extra=None, column_order=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.columns = columns
+        self.history = list(history)
+        self._extra = extra or {}
+        self._column_order = column_order or (["Name"] + INT_COLUMNS + FLOAT_COLUMNS + ["MatchHistory"])
+
+    @classmethod
+    def from_dataframe(cls, df):
+        columns = {}
+        for col in INT_COLUMNS:
+            values = df[col] if col in df.columns else pd.Series(0, index=df.index)
+            columns[col] = pd.to_numeric(values, errors="coerce").fillna(0).round().to_numpy(dtype=np.int64).copy()
+        if "Matches" not in df.columns:
+            columns["Matches"] = columns["Wins"] + columns["Losses"]
+        for col in FLOAT_COLUMNS:
+            values = df[col] if col in df.columns else pd.Series(0.0, index=df.index)
+            columns[col] = pd.to_numeric(values, errors="coerce").fillna(0.0).to_numpy(dtype=np.float64).copy()
+        history = df["MatchHistory"].fillna("").astype(str).tolist() if "MatchHistory" in df.columns else [""] * len(df)
+        history = ["" if h in ("0", "nan") else h for h in history]
+        managed = set(INT_COLUMNS) | set(FLOAT_COLUMNS) | {"Name", "MatchHistory"}
+        extra = {col: df[col].tolist() for col in df.columns if col not in managed}
+        column_order = list(df.columns) + [c for c in INT_COLUMNS + FLOAT_COLUMNS + ["MatchHistory"] if c not in df.columns]
+        return cls(df["Name"].astype(str).tolist(), columns, history, extra, column_order)
+
+    def copy(self):
+        """Independent copy (arrays and lists copied), for updates readers must not see half-done"""
+        return PlayerTable(self.names, {col: values.copy() for col, values in self.columns.items()},
+                           self.history, {col: list(values) for col, values in self._extra.items()},
+                           list(self._column_order))
+
+    def to_dataframe(self):
+        data = {"Name": self.names, "MatchHistory": self.history, **self.columns, **self._extra}
+        return pd.DataFrame({col: data[col] for col in self._column_order})
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def row(self, name):
+        return PlayerRow(self, self.index[name])
+
+    def rows(self, indices=None):
+        return [PlayerRow(self, int(i)) for i in (range(len(self)) if indices is None else indices)]
+
+    def indices(self, names, sort=False):
+        """Row indices of the known names (unknown names are skipped), optionally in table order"""
+        found = np.array([self.index[n] for n in names if n in self.index], dtype=np.int64)
+        return np.sort(found) if sort else found
+
+    def elo_ranks(self):
+        """1-based position of every row when ordered by ELO, highest first"""
+        ranks = np.empty(len(self), dtype=np.int64)
+        ranks[np.argsort(-self.columns["ELO"], kind="stable")] = np.arange(1, len(self) + 1)
+        return ranks
+
+    def nbytes(self):
+        """Approximate memory held by the table (arrays plus name/history strings)"""
+        import sys
+        strings = sum(sys.getsizeof(s) for s in self.names) + sum(sys.getsizeof(h) for h in self.history)
+        return int(sum(a.nbytes for a in self.columns.values()) + strings)
+
+    def derive(self):
+        """Per-match averages and the season Rating for all rows at once; returns the table.
+
+        Rounds like the DataFrame path (DataFrame.round(2), i.e. np.round),
+        including the per-round averages; zero matches or deaths divide by 1.
+        """
+        c = self.columns
+        c["Matches"] = c["Wins"] + c["Losses"]
+        matches = np.where(c["Matches"] == 0, 1, c["Matches"])
+        deaths = np.where(c["TDeaths"] == 0, 1, c["TDeaths"])
+        c["KPM"] = np.round(c["TKills"] / matches, 2)
+        c["DPM"] = np.round(c["TDeaths"] / matches, 2)
+        c["APM"] = np.round(c["TAssists"] / matches, 2)
+        c["K/D"] = np.round(c["TKills"] / deaths, 2)
+        c["ADR"] = np.round(c["TADR"] / matches, 2)
+        for col in ROUND_COLUMNS:
+            c[col] = np.round(c[col], elo_engine.ROUND_STAT_DECIMALS)
+        c["Rating"] = rating_formulas.season_ratings(c)
+        return self
+
+    def sort_by_elo(self):
+        """Reorder the rows by ELO, highest first (the leaderboard order); returns the table"""
+        order = np.argsort(-self.columns["ELO"], kind="stable")
+        self.names = [self.names[i] for i in order]
+        self.history = [self.history[i] for i in order]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for col, values in self.columns.items():
+            self.columns[col] = values[order]
+        self._extra = {col: [values[i] for i in order] for col, values in self._extra.items()}
+        return self
+
+    def json_rows(self, fields, indices=None):
+        """Plain-Python dicts for JSON responses.
+
+        fields maps output keys to (column, decimals); decimals None means int.
+        Columns are converted with tolist() once instead of per cell.
+        """
+        rows = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        values = {}
+        for key, (column, decimals) in fields.items():
+            if column == "Name":
+                values[key] = [self.names[i] for i in rows]
+            elif decimals is None:
+                values[key] = self.columns[column][rows].tolist()
+            else:
+                values[key] = [round(v, decimals) for v in self.columns[column][rows].tolist()]
+        keys = list(values)
+        return [dict(zip(keys, row)) for row in zip(*(values[k] for k in keys))]
+
+    def apply_match(self, names, k, d, a, adr, mvp, won, elo_deltas, total_rounds, match_label):
+        """Add one match's lines to the totals, per-round averages, history and ELO.
+
+        Same rules as the per-player update in submit_match: only winners
+        get their MVP counted, per-round stats are running averages rounded
+        to 3 decimals, and elo_deltas are the precomputed ELO changes.
+        """
+        known = np.array([n in self.index for n in names], dtype=bool)
+        idx = np.array([self.index[n] for n in np.asarray(names)[known]], dtype=np.int64)
+        won = np.asarray(won, dtype=bool)[known]
+        k, d, a, adr, mvp, elo_deltas = (np.asarray(v, dtype=np.int64)[known] for v in (k, d, a, adr, mvp, elo_deltas))
+        c = self.columns
+        c["Matches"][idx] += 1
+        c["Wins"][idx] += won
+        c["Losses"][idx] += ~won
+        c["TKills"][idx] += k
+        c["TDeaths"][idx] += d
+        c["TAssists"][idx] += a
+        c["TADR"][idx] += adr
+        c["MVP"][idx] += np.where(won, mvp, 0)
+        if total_rounds > 0:
+            per_round = elo_engine.round_like_python(np.stack([k, d, a], axis=1) / total_rounds, 3)
+        else:
+            per_round = np.zeros((len(idx), 3))
+        for j, col in enumerate(ROUND_COLUMNS):
+            c[col][idx] = elo_engine.running_average(c[col][idx], c["Matches"][idx], per_round[:, j])
+        for i in idx.tolist():
+            self.history[i] = f"{self.history[i]},{match_label}" if self.history[i] else match_label
+        c["ELO"][idx] += elo_deltas
+
+    def revert_match(self, names, k, d, a, adr, mvp, won, elo_deltas, previous_round_stats, match_label):
+        """Undo apply_match for one match from its recorded deltas.
+
+        previous_round_stats holds each player's KPR/DPR/APR before the
+        match (the running averages are rounded, so they cannot be
+        recomputed exactly from the totals).
+        """
+        known = np.array([n in self.index for n in names], dtype=bool)
+        idx = np.array([self.index[n] for n in np.asarray(names)[known]], dtype=np.int64)
+        won = np.asarray(won, dtype=bool)[known]
+        k, d, a, adr, mvp, elo_deltas = (np.asarray(v, dtype=np.int64)[known] for v in (k, d, a, adr, mvp, elo_deltas))
+        previous = np.asarray(previous_round_stats, dtype=np.float64).reshape(-1, len(ROUND_COLUMNS))[known]
+        c = self.columns
+        c["Matches"][idx] -= 1
+        c["Wins"][idx] -= won
+        c["Losses"][idx] -= ~won
+        c["TKills"][idx] -= k
+        c["TDeaths"][idx] -= d
+        c["TAssists"][idx] -= a
+        c["TADR"][idx] -= adr
+        c["MVP"][idx] -= np.where(won, mvp, 0)
+        for j, col in enumerate(ROUND_COLUMNS):
+            c[col][idx] = previous[:, j]
+        for i in idx.tolist():
+            entries = self.history[i].split(",") if self.history[i] else []
+            if match_label in entries:
+                del entries[len(entries) - 1 - entries[::-1].index(match_label)]
+            self.history[i] = ",".join(entries)
+        c["ELO"][idx] -= elo_deltas
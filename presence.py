@@ -0,0 +1,96 @@
+"""Online-presence registry for the matchmaker.
+
+Bots and server scripts report players with join/heartbeat/leave. Each
+report is a dict write plus a heap push; expiry pops the min-heap of
+(expires_at, name) entries lazily, and an entry only expires a player when it
+still matches the player's current deadline, so refreshed heartbeats leave
+stale heap entries behind instead of being searched for.
+
+Membership changes bump a version number; snapshot() returns the version
+with a frozenset of online names that is rebuilt only when the version moved,
+so readers (page loads, create-match) share one immutable set.
+"""
+import heapq
+import threading
+import time
+
+DEFAULT_TTL = 120.0
+
+
+class PresenceRegistry:
+    """Players currently online, each with a heartbeat deadline"""
+
+    def __init__(self, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._deadline = {}
+        self._heap = []
+        self.version = 0
+        self._snapshot = (0, frozenset())
+
+    def _touch(self, name, ttl, now):
+        """Set a deadline; True when the player was not online before"""
+        deadline = now + (self.ttl if ttl is None else float(ttl))
+        is_new = name not in self._deadline
+        self._deadline[name] = deadline
+        heapq.heappush(self._heap, (deadline, name))
+        # Heartbeats leave stale entries behind; rebuild once they dominate the heap
+        if len(self._heap) > 2 * len(self._deadline) + 64:
+            self._heap = [(d, n) for n, d in self._deadline.items()]
+            heapq.heapify(self._heap)
+        return is_new
+
+    def _expire(self, now):
+        changed = False
+        while self._heap and self._heap[0][0] <= now:
+            deadline, name = heapq.heappop(self._heap)
+            if self._deadline.get(name) == deadline:
+                del self._deadline[name]
+                changed = True
+        return changed
+
+    def join(self, names, ttl=None):
+        """Mark players online (or refresh them); returns the names that just came online"""
+        now = self._clock()
+        with self._lock:
+            expired = self._expire(now)
+            joined = [str(n) for n in names if self._touch(str(n), ttl, now)]
+            if joined or expired:
+                self.version += 1
+            return joined
+
+    heartbeat = join
+
+    def leave(self, names):
+        """Mark players offline; returns the names that were online"""
+        with self._lock:
+            left = [str(n) for n in names if self._deadline.pop(str(n), None) is not None]
+            if left:
+                self.version += 1
+            return left
+
+    def clear(self):
+        with self._lock:
+            if self._deadline:
+                self.version += 1
+            self._deadline.clear()
+            self._heap.clear()
+
+    def snapshot(self):
+        """(version, frozenset of online names) after expiring overdue players"""
+        with self._lock:
+            if self._expire(self._clock()):
+                self.version += 1
+            if self._snapshot[0] != self.version:
+                self._snapshot = (self.version, frozenset(self._deadline))
+            return self._snapshot
+
+    def online(self):
+        return sorted(self.snapshot()[1])
+
+    def __contains__(self, name):
+        return str(name) in self.snapshot()[1]
+
+    def __len__(self):
+        return len(self.snapshot()[1])
@@ -0,0 +1,290 @@
+"""Named, versioned rating formulas evaluated as vectorized expressions.
+
+A formula is a weighted sum of named features plus a rounding precision.
+Feature sets are built from NumPy arrays (or DataFrame columns), so one
+formula scores the whole player table or the whole match-line history in
+a single pass:
+
+    table_features(df)                 season averages (K/D, KPM, ... columns)
+    totals_features(k, d, a, adr, m)   cumulative totals, unrounded averages
+    line_features(k, d, a, adr)        single-match lines (KPM == K, ...)
+
+Two roles pick the formula in use:
+    season  the leaderboard Rating column
+    match   the single-match rating behind ELO deltas and form
+
+Formulas beyond the built-in ones come from register() (plugins), the
+"formulas" list of custom_rating_formulas.json next to the match history
+(read on first use) or add_formula(), which registers a spec and appends it
+to that file. set_active() switches a role and persists the choice next to
+the match history. Callers compute the backfill with the new formula first (Rating
+column: backfill_table(); match role: an ELO replay), then persist, instead
+of editing every copy of the formula.
+
+Usage:
+    python rating_formulas.py     # list formulas and the active ones
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+import elo_engine
+import seasons
+
+ROLES = ("season", "match")
+ACTIVE_PATH = os.path.join(seasons.MATCH_HISTORY_ROOT, 'rating_formulas.json')
+FORMULAS_PATH = os.path.join(seasons.MATCH_HISTORY_ROOT, 'custom_rating_formulas.json')
+FEATURES = ("kd", "kd_smooth", "kpm", "dpm", "apm", "adr")
+
+
+class RatingFormula:
+    """Weighted sum of features, rounded like Python's round() to decimals"""
+
+    __slots__ = ("name", "version", "weights", "decimals", "description")
+
+    def __init__(self, name, version, weights, decimals=2, description=""):
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown rating features: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.version = int(version)
+        self.weights = dict(weights)
+        self.decimals = decimals
+        self.description = description
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def evaluate(self, features, rounded=True):
+        """Rating for every row of a feature set in one NumPy pass"""
+        total = 0.0
+        for feature, weight in self.weights.items():
+            total = total + weight * np.asarray(features[feature], dtype=np.float64)
+        if rounded and self.decimals is not None:
+            return elo_engine.round_like_python(total, self.decimals)
+        return np.asarray(total, dtype=np.float64)
+
+    def describe(self):
+        terms = " + ".join(f"{w:g}*{f}" for f, w in self.weights.items()).replace("+ -", "- ")
+        return {"key": self.key, "name": self.name, "version": self.version, "expression": terms,
+                "decimals": self.decimals, "description": self.description}
+
+
+_registry = {}
+_DEFAULTS = {}
+_active = {}
+_config = {"loaded": False}
+_lock = threading.Lock()
+
+
+def register(formula, role=None):
+    """Add a formula to the registry, optionally as the default for a role"""
+    if formula.key in _registry:
+        raise ValueError(f"Rating formula {formula.key} is already registered")
+    _registry[formula.key] = formula
+    if role is not None:
+        _DEFAULTS[role] = formula.key
+    return formula
+
+
+register(RatingFormula("season", 1, {"kd": 0.28, "kpm": 0.02, "apm": 0.006, "adr": 0.0058},
+                       description="Leaderboard Rating from season averages"), role="season")
+register(RatingFormula("match", 1, {"kd_smooth": 0.65, "kpm": 0.024, "apm": 0.016, "dpm": -0.025, "adr": 0.0035},
+                       description="Single-match performance rating used for ELO deltas"), role="match")
+
+
+def from_spec(spec):
+    """RatingFormula from a JSON object: {"name", "version", "weights", "decimals"?, "description"?}"""
+    try:
+        return RatingFormula(str(spec["name"]), spec["version"],
+                             {str(f): float(w) for f, w in spec["weights"].items()},
+                             spec.get("decimals", 2), str(spec.get("description", "")))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid rating formula spec {spec!r}: {e}")
+
+
+def _register_spec(spec):
+    """Register a spec unless the same definition is already there; the formula, or None when skipped"""
+    formula = from_spec(spec)
+    existing = _registry.get(formula.key)
+    if existing is not None:
+        if existing.describe() != formula.describe():
+            raise ValueError(f"Rating formula {formula.key} is already registered with another definition")
+        return None
+    return register(formula)
+
+
+def _read_config(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get("formulas", [])
+    except FileNotFoundError:
+        return []
+
+
+def register_from_config(path=None):
+    """Register the formulas of a JSON file ({"formulas": [spec, ...]}); returns the ones added.
+
+    Specs identical to a registered formula are skipped, so a file can be
+    loaded more than once; a missing file registers nothing.
+    """
+    return [f for f in (_register_spec(spec) for spec in _read_config(path or FORMULAS_PATH)) if f is not None]
+
+
+def _ensure_config():
+    if not _config["loaded"]:
+        register_from_config()
+        _config["loaded"] = True
+
+
+def add_formula(spec):
+    """Register a formula spec and append it to FORMULAS_PATH so it is there after a restart"""
+    with _lock:
+        _ensure_config()
+        formula = from_spec(spec)
+        if formula.key in _registry:
+            raise ValueError(f"Rating formula {formula.key} is already registered")
+        specs = _read_config(FORMULAS_PATH)
+        specs.append({"name": formula.name, "version": formula.version, "weights": formula.weights,
+                      "decimals": formula.decimals, "description": formula.description})
+        os.makedirs(os.path.dirname(FORMULAS_PATH), exist_ok=True)
+        with open(FORMULAS_PATH + '.tmp', 'w') as f:
+            json.dump({"formulas": specs}, f, indent=2)
+        os.replace(FORMULAS_PATH + '.tmp', FORMULAS_PATH)
+        return register(formula)
+
+
+def formulas():
+    with _lock:
+        _ensure_config()
+    return list(_registry.values())
+
+
+def get(key):
+    """Formula by "name@version" (or bare name for its latest version)"""
+    with _lock:
+        _ensure_config()
+    if key in _registry:
+        return _registry[key]
+    versions = [f for f in _registry.values() if f.name == key]
+    if not versions:
+        raise KeyError(f"Unknown rating formula {key!r}")
+    return max(versions, key=lambda f: f.version)
+
+
+def _load_active():
+    if _active:
+        return _active
+    # Saved choices may name formulas from the config file
+    _ensure_config()
+    chosen = dict(_DEFAULTS)
+    try:
+        with open(ACTIVE_PATH, 'r') as f:
+            saved = json.load(f)
+        chosen.update({role: key for role, key in saved.items() if role in ROLES and key in _registry})
+    except (OSError, ValueError):
+        pass
+    _active.update(chosen)
+    return _active
+
+
+def active(role):
+    """Formula currently used for a role ("season" or "match")"""
+    with _lock:
+        return _registry[_load_active()[role]]
+
+
+def validate_role(role):
+    if role not in ROLES:
+        raise ValueError(f"Unknown rating role {role!r}, expected one of {', '.join(ROLES)}")
+    return role
+
+
+def set_active(role, key):
+    """Switch a role to another formula and persist it; returns (previous, new) formulas"""
+    validate_role(role)
+    formula = get(key)
+    with _lock:
+        current = _load_active()
+        previous = _registry[current[role]]
+        current[role] = formula.key
+        os.makedirs(os.path.dirname(ACTIVE_PATH), exist_ok=True)
+        with open(ACTIVE_PATH + '.tmp', 'w') as f:
+            json.dump(current, f, indent=2)
+        os.replace(ACTIVE_PATH + '.tmp', ACTIVE_PATH)
+    return previous, formula
+
+
+def table_features(columns):
+    """Features from a players table's derived columns (DataFrame or column dict)"""
+    return {
+        "kd": columns["K/D"],
+        "kd_smooth": columns["K/D"],
+        "kpm": columns["KPM"],
+        "dpm": columns["DPM"],
+        "apm": columns["APM"],
+        "adr": columns["ADR"],
+    }
+
+
+def totals_features(kills, deaths, assists, adr_total, matches):
+    """Features from cumulative totals, with unrounded per-match averages"""
+    kills, deaths, assists, adr_total = (np.asarray(v, dtype=np.float64) for v in (kills, deaths, assists, adr_total))
+    m = np.maximum(np.asarray(matches, dtype=np.float64), 1)
+    return {
+        "kd": kills / np.maximum(deaths, 1),
+        "kd_smooth": kills / (deaths + 0.001),
+        "kpm": kills / m,
+        "dpm": deaths / m,
+        "apm": assists / m,
+        "adr": adr_total / m,
+    }
+
+
+def line_features(k, d, a, adr):
+    """Features of single-match lines, where KPM == K, DPM == D and APM == A"""
+    k, d, a, adr = (np.asarray(v, dtype=np.float64) for v in (k, d, a, adr))
+    return {
+        "kd": k / np.maximum(d, 1),
+        "kd_smooth": k / (d + 0.001),
+        "kpm": k,
+        "dpm": d,
+        "apm": a,
+        "adr": adr,
+    }
+
+
+def season_ratings(columns, formula=None):
+    """Rating column for a players table (DataFrame or column dict)"""
+    return (formula or active("season")).evaluate(table_features(columns))
+
+
+def match_ratings(k, d, a, adr, formula=None):
+    """Rating of every match line"""
+    return (formula or active("match")).evaluate(line_features(k, d, a, adr))
+
+
+def backfill_table(df, formula=None):
+    """Recompute the Rating column of a players DataFrame in place; returns the number of changed rows"""
+    ratings = season_ratings(df, formula)
+    changed = int(np.count_nonzero(~np.isclose(df["Rating"].to_numpy(dtype=np.float64), ratings, equal_nan=True)))
+    df["Rating"] = ratings
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the registered rating formulas")
+    parser.parse_args()
+    for role in ROLES:
+        print(f"active {role}: {active(role).key}")
+    for formula in formulas():
+        info = formula.describe()
+        print(f"  {info['key']:<10} {info['expression']}  ({info['description']})")
+
+
+if __name__ == '__main__':
+    main()
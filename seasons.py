@@ -0,0 +1,421 @@
+"""Season storage: live per-match folders for the current season, compact archives for finished ones.
+
+Live layout (unchanged):
+    match_history/<season>/match_<n>/{t1.csv, t2.csv, metadata.json}
+
+Archived layout:
+    match_history/archive/<season>.npz
+
+An archive is a single columnar file. Match-level columns are prefixed ``m_``,
+per-player match lines ``l_`` (sorted by match), final standings ``s_``.
+``m_line_start`` indexes each match's lines and ``p_line_order``/``p_line_start``
+index every player's lines, so lookups never scan the whole season.
+"""
+import csv
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+MATCH_HISTORY_ROOT = './match_history'
+ARCHIVE_DIR = os.path.join(MATCH_HISTORY_ROOT, 'archive')
+SEASON_STATE_PATH = os.path.join(MATCH_HISTORY_ROOT, 'seasons.json')
+DEFAULT_SEASON = 'S4'
+ARCHIVE_FORMAT_VERSION = 1
+
+STANDINGS_COLUMNS = ["ELO", "Wins", "Losses", "TKills", "TDeaths", "TAssists", "TADR", "MVP", "Rating"]
+
+_MATCH_DIR_RE = re.compile(r'^match_(\d+)$')
+_SEASON_KEY_RE = re.compile(r'S\d+')
+_state_lock = threading.Lock()
+_current = {"season": None}
+
+
+def validate_season(season):
+    """Season key as a string; ValueError unless it looks like 'S<number>' (keys become folder names)"""
+    season = str(season)
+    if not _SEASON_KEY_RE.fullmatch(season):
+        raise ValueError(f"Invalid season key {season!r}, expected e.g. 'S5'")
+    return season
+
+
+def _load_state():
+    try:
+        with open(SEASON_STATE_PATH, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("current", DEFAULT_SEASON)
+    state.setdefault("archived", [])
+    return state
+
+
+def _save_state(state):
+    os.makedirs(MATCH_HISTORY_ROOT, exist_ok=True)
+    tmp_path = SEASON_STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, SEASON_STATE_PATH)
+
+
+def get_current_season():
+    """Season key that new matches are recorded under (read from seasons.json once, then cached)"""
+    season = _current["season"]
+    if season is None:
+        with _state_lock:
+            season = _current["season"] = _load_state()["current"]
+    return season
+
+
+def set_current_season(season):
+    """Switch the live season (e.g. S4 -> S5 after an archive)"""
+    season = validate_season(season)
+    with _state_lock:
+        state = _load_state()
+        state["current"] = season
+        _save_state(state)
+        _current["season"] = season
+
+
+def season_dir(season=None):
+    return os.path.join(MATCH_HISTORY_ROOT, validate_season(season) if season else get_current_season())
+
+
+def match_dir(match_id, season=None):
+    """Folder of one live match; match_id is either an int or a 'match_<n>' string"""
+    if not isinstance(match_id, str):
+        match_id = f'match_{int(match_id)}'
+    return os.path.join(season_dir(season), match_id)
+
+
+def list_match_nums(season=None):
+    """Sorted match numbers that have a live folder in the season"""
+    root = season_dir(season)
+    if not os.path.isdir(root):
+        return []
+    nums = []
+    for entry in os.listdir(root):
+        m = _MATCH_DIR_RE.match(entry)
+        if m and os.path.isdir(os.path.join(root, entry)):
+            nums.append(int(m.group(1)))
+    return sorted(nums)
+
+
+def next_match_num(season=None):
+    nums = list_match_nums(season)
+    return (nums[-1] if nums else 0) + 1
+
+
+def _read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def read_live_match(match_num, season=None):
+    """Load one live match folder as plain Python data (None if the folder is missing)"""
+    path = match_dir(match_num, season)
+    if not os.path.isdir(path):
+        return None
+    metadata = {}
+    metadata_path = os.path.join(path, 'metadata.json')
+    if os.path.exists(metadata_path):
+        try:
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        except ValueError:
+            metadata = {}
+    return {
+        "match_num": int(match_num),
+        "metadata": metadata,
+        "team1": _read_lines(os.path.join(path, 't1.csv')),
+        "team2": _read_lines(os.path.join(path, 't2.csv')),
+    }
+
+
+def archive_path(season):
+    return os.path.join(ARCHIVE_DIR, f'{validate_season(season)}.npz')
+
+
+def list_seasons():
+    """All known seasons with their storage state"""
+    state = _load_state()
+    seasons = []
+    archived = set()
+    if os.path.isdir(ARCHIVE_DIR):
+        for entry in sorted(os.listdir(ARCHIVE_DIR)):
+            if entry.endswith('.npz'):
+                archived.add(entry[:-4])
+    for season in sorted(archived | {state["current"]}):
+        seasons.append({
+            "season": season,
+            "current": season == state["current"],
+            "archived": season in archived,
+            "live_matches": len(list_match_nums(season)),
+        })
+    return seasons
+
+
+def _num(value, cast=int):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return cast(0)
+
+
+def pack_live_season(season=None, match_nums=None):
+    """Read a season's live match folders into the columnar layout used by archives.
+
+    Matches are ordered by match number. Gains and the match day are kept
+    when the metadata recorded them (-1 / '' otherwise) so the log can be
+    replayed later.
+    """
+    if match_nums is None:
+        match_nums = list_match_nums(season)
+    names, name_idx = [], {}
+    maps, map_idx = [], {}
+
+    def _intern(value, table, index):
+        if value not in index:
+            index[value] = len(table)
+            table.append(value)
+        return index[value]
+
+    m_cols = {k: [] for k in ("m_num", "m_winner", "m_t1_score", "m_t2_score", "m_map",
+                              "m_t1_gain", "m_t2_gain", "m_day", "m_line_start")}
+    l_cols = {k: [] for k in ("l_match", "l_player", "l_team", "l_k", "l_d", "l_a", "l_adr", "l_mvp")}
+
+    for match_num in match_nums:
+        match = read_live_match(match_num, season)
+        if match is None:
+            continue
+        meta = match["metadata"]
+        m_cols["m_num"].append(match_num)
+        m_cols["m_winner"].append(2 if meta.get("winning_team") == "Team 2" else 1)
+        m_cols["m_t1_score"].append(_num(meta.get("team1_score")))
+        m_cols["m_t2_score"].append(_num(meta.get("team2_score")))
+        m_cols["m_map"].append(_intern(str(meta.get("map") or "Unknown"), maps, map_idx))
+        m_cols["m_t1_gain"].append(_num(meta.get("t1_gain", -1)))
+        m_cols["m_t2_gain"].append(_num(meta.get("t2_gain", -1)))
+        m_cols["m_day"].append(str(meta.get("created_at") or "")[:10])
+        m_cols["m_line_start"].append(len(l_cols["l_match"]))
+        for team, rows in ((1, match["team1"]), (2, match["team2"])):
+            for row in rows:
+                name = str(row.get("Name", "")).strip()
+                if not name:
+                    continue
+                l_cols["l_match"].append(match_num)
+                l_cols["l_player"].append(_intern(name, names, name_idx))
+                l_cols["l_team"].append(team)
+                l_cols["l_k"].append(_num(row.get("K")))
+                l_cols["l_d"].append(_num(row.get("D")))
+                l_cols["l_a"].append(_num(row.get("A")))
+                l_cols["l_adr"].append(_num(row.get("ADR"), float))
+                l_cols["l_mvp"].append(_num(row.get("MVP")))
+    m_cols["m_line_start"].append(len(l_cols["l_match"]))
+
+    arrays = {
+        "format_version": np.int32(ARCHIVE_FORMAT_VERSION),
+        "season": np.array(str(season or get_current_season())),
+        "names": np.array(names, dtype=str),
+        "maps": np.array(maps, dtype=str),
+        "m_num": np.array(m_cols["m_num"], dtype=np.int32),
+        "m_winner": np.array(m_cols["m_winner"], dtype=np.int8),
+        "m_t1_score": np.array(m_cols["m_t1_score"], dtype=np.int16),
+        "m_t2_score": np.array(m_cols["m_t2_score"], dtype=np.int16),
+        "m_map": np.array(m_cols["m_map"], dtype=np.int16),
+        "m_t1_gain": np.array(m_cols["m_t1_gain"], dtype=np.int16),
+        "m_t2_gain": np.array(m_cols["m_t2_gain"], dtype=np.int16),
+        "m_day": np.array(m_cols["m_day"], dtype=str),
+        "m_line_start": np.array(m_cols["m_line_start"], dtype=np.int32),
+        "l_match": np.array(l_cols["l_match"], dtype=np.int32),
+        "l_player": np.array(l_cols["l_player"], dtype=np.int32),
+        "l_team": np.array(l_cols["l_team"], dtype=np.int8),
+        "l_k": np.array(l_cols["l_k"], dtype=np.int16),
+        "l_d": np.array(l_cols["l_d"], dtype=np.int16),
+        "l_a": np.array(l_cols["l_a"], dtype=np.int16),
+        "l_adr": np.array(l_cols["l_adr"], dtype=np.float32),
+        "l_mvp": np.array(l_cols["l_mvp"], dtype=np.int16),
+    }
+
+    # Per-player index (CSR): lines of player i are p_line_order[p_line_start[i]:p_line_start[i+1]]
+    order = np.argsort(arrays["l_player"], kind="stable").astype(np.int32)
+    counts = np.bincount(arrays["l_player"], minlength=len(names))
+    arrays["p_line_order"] = order
+    arrays["p_line_start"] = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+    return arrays
+
+
+def archive_season(season, standings_df=None, prune=False):
+    """Pack every live match folder of a season into one columnar archive.
+
+    standings_df (optional) stores the season's final player table alongside
+    the matches. With prune=True the per-match folders are removed once the
+    archive has been written.
+    """
+    match_nums = list_match_nums(season)
+    arrays = pack_live_season(season, match_nums)
+
+    if standings_df is not None and not standings_df.empty:
+        arrays["s_name"] = standings_df["Name"].astype(str).to_numpy(dtype=str)
+        for col in STANDINGS_COLUMNS:
+            if col in standings_df.columns:
+                key = "s_" + col.lower()
+                arrays[key] = standings_df[col].fillna(0).to_numpy(dtype=np.float64 if col == "Rating" else np.int32)
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(season)
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    load_archive.cache_clear()
+
+    with _state_lock:
+        state = _load_state()
+        if season not in state["archived"]:
+            state["archived"].append(season)
+        _save_state(state)
+
+    if prune:
+        import shutil
+        for match_num in match_nums:
+            shutil.rmtree(match_dir(match_num, season), ignore_errors=True)
+
+    return {"season": season, "path": path, "matches": len(arrays["m_num"]), "lines": len(arrays["l_match"])}
+
+
+def load_match_log(season=None):
+    """Columnar match log of a season: live folders when present, otherwise its archive.
+
+    The current season is always live: with no folders yet it has no log
+    (None), even if an archive exists under the same key.
+    """
+    season = season or get_current_season()
+    if list_match_nums(season):
+        return pack_live_season(season)
+    if season == get_current_season():
+        return None
+    return load_archive(season)
+
+
+@lru_cache(maxsize=8)
+def load_archive(season):
+    """Load an archived season into memory (cached; archives are immutable once written)"""
+    path = archive_path(season)
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        archive = {key: data[key] for key in data.files}
+    archive["name_index"] = {str(n): i for i, n in enumerate(archive["names"])}
+    return archive
+
+
+def _match_summary(archive, i):
+    t1_score = int(archive["m_t1_score"][i])
+    t2_score = int(archive["m_t2_score"][i])
+    return {
+        "match_num": int(archive["m_num"][i]),
+        "map_name": str(archive["maps"][archive["m_map"][i]]),
+        "team1_score": t1_score,
+        "team2_score": t2_score,
+        "winning_team": f'Team {int(archive["m_winner"][i])}',
+        "total_rounds": t1_score + t2_score,
+    }
+
+
+def _line(archive, j):
+    return {
+        "Name": str(archive["names"][archive["l_player"][j]]),
+        "K": int(archive["l_k"][j]),
+        "D": int(archive["l_d"][j]),
+        "A": int(archive["l_a"][j]),
+        "ADR": round(float(archive["l_adr"][j]), 2),
+        "MVP": int(archive["l_mvp"][j]),
+    }
+
+
+def archived_matches(season):
+    """Match summaries of an archived season, newest first (None if not archived)"""
+    archive = load_archive(season)
+    if archive is None:
+        return None
+    return [_match_summary(archive, i) for i in range(len(archive["m_num"]) - 1, -1, -1)]
+
+
+def archived_match(season, match_num):
+    """One archived match with both teams' lines (None if missing)"""
+    archive = load_archive(season)
+    if archive is None:
+        return None
+    i = int(np.searchsorted(archive["m_num"], match_num))
+    if i >= len(archive["m_num"]) or archive["m_num"][i] != match_num:
+        return None
+    start, end = archive["m_line_start"][i], archive["m_line_start"][i + 1]
+    team1_stats, team2_stats = [], []
+    for j in range(start, end):
+        (team1_stats if archive["l_team"][j] == 1 else team2_stats).append(_line(archive, j))
+    return {"match": _match_summary(archive, i), "team1_stats": team1_stats, "team2_stats": team2_stats}
+
+
+def archived_player_stats(season, player_name):
+    """Season totals and per-match lines for one player of an archived season"""
+    archive = load_archive(season)
+    if archive is None:
+        return None
+    p = archive["name_index"].get(player_name)
+    if p is None:
+        return {"name": player_name, "season": season, "matches": 0, "match_history": []}
+    lines = archive["p_line_order"][archive["p_line_start"][p]:archive["p_line_start"][p + 1]]
+    match_pos = np.searchsorted(archive["m_num"], archive["l_match"][lines])
+    won = archive["m_winner"][match_pos] == archive["l_team"][lines]
+    kills = int(archive["l_k"][lines].sum())
+    deaths = int(archive["l_d"][lines].sum())
+    n = len(lines)
+    history = []
+    for j, pos, w in zip(lines, match_pos, won):
+        entry = _line(archive, j)
+        history.append({
+            "match_id": f'match_{int(archive["l_match"][j])}',
+            "map": str(archive["maps"][archive["m_map"][pos]]),
+            "player_stats": {
+                "k": entry["K"], "d": entry["D"], "a": entry["A"], "adr": entry["ADR"], "mvp": entry["MVP"],
+                "team": f'Team {int(archive["l_team"][j])}',
+                "won": bool(w),
+            },
+        })
+    return {
+        "name": player_name,
+        "season": season,
+        "matches": n,
+        "wins": int(won.sum()),
+        "losses": int(n - won.sum()),
+        "total_kills": kills,
+        "total_deaths": deaths,
+        "total_assists": int(archive["l_a"][lines].sum()),
+        "kd": round(kills / (deaths or 1), 2),
+        "adr": round(float(archive["l_adr"][lines].mean()), 2) if n else 0.0,
+        "mvp_count": int(archive["l_mvp"][lines].sum()),
+        "match_history": history,
+    }
+
+
+def archived_standings(season):
+    """Final player table stored with an archived season, sorted by ELO"""
+    archive = load_archive(season)
+    if archive is None or "s_name" not in archive:
+        return None
+    rows = []
+    for i, name in enumerate(archive["s_name"]):
+        row = {"name": str(name)}
+        for col in STANDINGS_COLUMNS:
+            key = "s_" + col.lower()
+            if key in archive:
+                value = archive[key][i]
+                row[col.lower()] = round(float(value), 2) if col == "Rating" else int(value)
+        rows.append(row)
+    rows.sort(key=lambda r: r.get("elo", 0), reverse=True)
+    return rows
@@ -0,0 +1,203 @@
+"""Leaderboards as they stood after a past match or on a past day.
+
+StandingsHistory replays a season's match log once, match by match, with
+the rules of elo_replay.replay_log, and keeps a checkpoint of every
+player's totals, per-round averages and ELO every CHECKPOINT_EVERY
+matches. table_at(n) restores the nearest checkpoint at or before n and
+replays at most CHECKPOINT_EVERY - 1 matches on top of it; extend(log)
+steps the latest state over newly recorded matches only. Recently
+requested tables stay in an LRU cache, so stepping through a season is
+interactive.
+
+Historical tables are replays: they match /api/admin/replay with recorded
+gains, not necessarily ELO edits made outside the match log.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import elo_engine
+import elo_replay
+
+CHECKPOINT_EVERY = 25
+CACHE_SIZE = 32
+
+
+class StandingsHistory:
+    """Checkpointed replay of one season's match log"""
+
+    def __init__(self, log, roster=(), params=None, use_recorded_gains=True,
+                 checkpoint_every=CHECKPOINT_EVERY, cache_size=CACHE_SIZE):
+        self.p = elo_engine.resolve_params(params)
+        self.names, self._index = elo_replay.roster_index(log, roster)
+        self.use_recorded_gains = use_recorded_gains
+        self.checkpoint_every = max(1, int(checkpoint_every))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cols, self.m_num, self.days, self.l_match, self.winners, self.recorded, self.terms = self._columns(log)
+        self._state = self._initial_state()
+        self._checkpoints = [self._copy(self._state)]
+        self._advance(0)
+
+    def _columns(self, log):
+        """Per-line and per-match arrays of a log on this history's roster"""
+        cols = elo_replay.line_columns(log, self._index)
+        m_num = log["m_num"].astype(np.int64)
+        days = log.get("m_day")
+        days = days.astype(str) if days is not None else np.full(len(m_num), "", dtype=str)
+        recorded = (None, None)
+        if self.use_recorded_gains:
+            # -1: gain not recorded, recomputed from the ELOs like the live table did
+            recorded = tuple(log[key].astype(np.int64) if log.get(key) is not None else np.full(len(m_num), -1)
+                             for key in ("m_t1_gain", "m_t2_gain"))
+        terms = elo_engine.performance_terms(
+            elo_engine.match_ratings(cols["k"], cols["d"], cols["a"], cols["adr"]), cols["mvp"], cols["won"], self.p)
+        return cols, m_num, days, log["l_match"].astype(np.int64), log["m_winner"].astype(np.int64), recorded, terms
+
+    def _advance(self, start):
+        """Step the latest state over matches start.. of the log, checkpointing on the way"""
+        for i in range(start, len(self.m_num)):
+            self._step(self._state, i)
+            if (i + 1) % self.checkpoint_every == 0:
+                self._checkpoints.append(self._copy(self._state))
+
+    def extend(self, log):
+        """Append the matches of a log that continues this one (e.g. the folders added since).
+
+        Only the new matches are replayed: the latest state steps over them
+        like the constructor would have. ValueError when the log has players
+        outside the roster or matches that are not after the last one; build
+        a new history then.
+        """
+        if not len(log["m_num"]):
+            return
+        unknown = [str(n) for n in log["names"] if str(n) not in self._index]
+        if unknown:
+            raise ValueError(f"Players outside the roster: {', '.join(unknown)}")
+        if len(self.m_num) and int(log["m_num"][0]) <= int(self.m_num[-1]):
+            raise ValueError(f"match_{int(log['m_num'][0])} is not after match_{int(self.m_num[-1])}")
+        cols, m_num, days, l_match, winners, recorded, terms = self._columns(log)
+        start = len(self.m_num)
+        line_offset = self.cols["starts"][-1]
+        with self._lock:
+            self.cols = {key: np.concatenate((self.cols[key][:-1], cols[key] + line_offset)) if key == "starts"
+                         else np.concatenate((self.cols[key], cols[key])) for key in self.cols}
+            self.m_num = np.concatenate((self.m_num, m_num))
+            self.days = np.concatenate((self.days, days))
+            self.l_match = np.concatenate((self.l_match, l_match))
+            self.winners = np.concatenate((self.winners, winners))
+            if self.use_recorded_gains:
+                self.recorded = tuple(np.concatenate(pair) for pair in zip(self.recorded, recorded))
+            self.terms = np.concatenate((self.terms, terms))
+            self._advance(start)
+
+    def __len__(self):
+        return len(self.m_num)
+
+    def _initial_state(self):
+        n = len(self.names)
+        return {
+            "totals": {col: np.zeros(n, dtype=np.int64) for col in elo_replay.TOTAL_COLUMNS},
+            "per_round": np.zeros((n, len(elo_replay.ROUND_COLUMNS)), dtype=np.float64),
+            "elo": np.full(n, int(self.p["start_elo"]), dtype=np.int64),
+        }
+
+    @staticmethod
+    def _copy(state):
+        return {
+            "totals": {col: values.copy() for col, values in state["totals"].items()},
+            "per_round": state["per_round"].copy(),
+            "elo": state["elo"].copy(),
+        }
+
+    def _step(self, state, i):
+        """Apply match i of the log to a state in place"""
+        c = self.cols
+        s, e = c["starts"][i], c["starts"][i + 1]
+        if s == e:
+            return
+        pl, won = c["player"][s:e], c["won"][s:e]
+        elo = state["elo"]
+        elo_before = elo[pl]
+        team = c["team"][s:e]
+        t1_elo, t2_elo = elo_before[team == 1].sum(), elo_before[team == 2].sum()
+        recorded_t1, recorded_t2 = self.recorded
+        if recorded_t1 is not None and recorded_t1[i] >= 0 and recorded_t2[i] >= 0:
+            t1_gain, t2_gain = int(recorded_t1[i]), int(recorded_t2[i])
+        else:
+            t1_gain, t2_gain = elo_engine.team_gains(t1_elo, t2_elo, self.p)
+        win_gain, loss_gain = (t1_gain, t2_gain) if self.winners[i] == 1 else (t2_gain, t1_gain)
+        elo[pl] = elo_before + elo_engine.apply_terms(elo_before, self.terms[s:e], won, win_gain, loss_gain, self.p)
+
+        totals = state["totals"]
+        totals["Wins"][pl] += won
+        totals["Losses"][pl] += ~won
+        totals["TKills"][pl] += c["k"][s:e]
+        totals["TDeaths"][pl] += c["d"][s:e]
+        totals["TAssists"][pl] += c["a"][s:e]
+        totals["TADR"][pl] += c["adr"][s:e]
+        totals["MVP"][pl] += c["mvp"][s:e] * won
+        totals["Matches"][pl] += 1
+        state["per_round"][pl] = elo_engine.step_round_stats(
+            state["per_round"][pl], totals["Matches"][pl][:, None], c["per_round"][s:e])
+
+    def position_for_match(self, match_num):
+        """Number of log matches up to and including match_num"""
+        return int(np.searchsorted(self.m_num, int(match_num), side="right"))
+
+    def position_for_date(self, day):
+        """Number of log matches played on or before day ("YYYY-MM-DD"); undated matches count as earlier"""
+        on_or_before = (self.days == "") | (self.days <= str(day))
+        return len(on_or_before) if on_or_before.all() else int(np.argmin(on_or_before))
+
+    def _state_at(self, position):
+        checkpoint = min(position // self.checkpoint_every, len(self._checkpoints) - 1)
+        state = self._copy(self._checkpoints[checkpoint])
+        for i in range(checkpoint * self.checkpoint_every, position):
+            self._step(state, i)
+        return state
+
+    def _streaks(self, line_end):
+        """{name: {"type", "count"}} from each player's trailing results before line_end"""
+        streaks = {}
+        for j, won in zip(self.cols["player"][:line_end].tolist(), self.cols["won"][:line_end].tolist()):
+            kind = "win" if won else "loss"
+            current = streaks.get(j)
+            if current is not None and current[0] == kind:
+                streaks[j] = (kind, current[1] + 1)
+            else:
+                streaks[j] = (kind, 1)
+        result = {name: {"type": "none", "count": 0} for name in self.names}
+        for j, (kind, count) in streaks.items():
+            result[self.names[j]] = {"type": kind, "count": count}
+        return result
+
+    def table_at(self, position):
+        """(players DataFrame, streaks) after the first position matches of the log"""
+        position = max(0, min(int(position), len(self)))
+        with self._lock:
+            if position in self._cache:
+                self._cache.move_to_end(position)
+                return self._cache[position]
+        state = self._state_at(position)
+        line_end = int(self.cols["starts"][position])
+        history = [[] for _ in self.names]
+        for j, match in zip(self.cols["player"][:line_end].tolist(), self.l_match[:line_end].tolist()):
+            history[j].append(f"match_{match}")
+        table = elo_replay.build_table(self.names, state["totals"], state["elo"], state["per_round"], history)
+        result = (table, self._streaks(line_end))
+        with self._lock:
+            self._cache[position] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def describe(self, position):
+        """The last match a position includes"""
+        if position <= 0:
+            return {"matches": 0, "match_num": None, "day": None}
+        return {"matches": int(position), "match_num": int(self.m_num[position - 1]),
+                "day": str(self.days[position - 1]) or None}
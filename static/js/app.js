@@ -439,6 +439,9 @@ function renderMatch(match) {
     document.getElementById('elo-diff').textContent = match.elo_diff;
     document.getElementById('t1-gain').textContent = match.t1_gain;
     document.getElementById('t2-gain').textContent = match.t2_gain;
+    document.getElementById('win-prob').textContent = match.t1_win_prob !== undefined
+        ? `${Math.round(match.t1_win_prob * 100)}% - ${Math.round(match.t2_win_prob * 100)}%`
+        : '-';
     
     // Render teams as cards
     renderTeam('team-1-cards', match.team_1);
@@ -620,20 +623,28 @@ function resetMatch() {
     document.getElementById('ocr-status').style.display = 'none';
 }
 
+// Full roster for the player datalist, restored when a search query is cleared
+let rosterNames = [];
+
+function fillPlayerList(names) {
+    const datalist = document.getElementById('player-list');
+    if (datalist) {
+        datalist.innerHTML = '';
+        names.forEach(name => {
+            const option = document.createElement('option');
+            option.value = name;
+            datalist.appendChild(option);
+        });
+    }
+}
+
 // Load player list for search
 async function loadPlayerList() {
     try {
         const response = await fetch('/api/database');
         const players = await response.json();
-        const datalist = document.getElementById('player-list');
-        if (datalist) {
-            datalist.innerHTML = '';
-            players.forEach(player => {
-                const option = document.createElement('option');
-                option.value = player.name;
-                datalist.appendChild(option);
-            });
-        }
+        rosterNames = players.map(player => player.name);
+        fillPlayerList(rosterNames);
     } catch (error) {
         console.error('Error loading player list:', error);
     }
@@ -858,6 +869,28 @@ function setupPlayerSearch() {
                 searchPlayer();
             }
         });
+        // Suggest names as the user types (prefix and typo-tolerant matches)
+        let suggestTimer = null;
+        searchInput.addEventListener('input', () => {
+            clearTimeout(suggestTimer);
+            suggestTimer = setTimeout(() => suggestPlayers(searchInput.value.trim()), 150);
+        });
+    }
+}
+
+async function suggestPlayers(query) {
+    if (!query) {
+        fillPlayerList(rosterNames);
+        return;
+    }
+    try {
+        const response = await fetch(`/api/players/search?q=${encodeURIComponent(query)}`);
+        const data = await response.json();
+        // A slower response for an older query must not replace newer suggestions
+        if (document.getElementById('player-search').value.trim() !== query) return;
+        fillPlayerList(data.results.map(result => result.name));
+    } catch (error) {
+        console.error('Error searching players:', error);
     }
 }
 
@@ -872,7 +905,9 @@ async function searchPlayer() {
         const response = await fetch(`/api/player-stats/${encodeURIComponent(playerName)}`);
         if (!response.ok) {
             if (response.status === 404) {
-                alert('Player not found');
+                const data = await response.json().catch(() => ({}));
+                const suggestions = data.suggestions || [];
+                alert(suggestions.length ? `Player not found. Did you mean: ${suggestions.join(', ')}?` : 'Player not found');
                 return;
             }
             throw new Error('Failed to fetch player stats');
@@ -1456,6 +1491,11 @@ function getMapImagePath(mapName) {
     };
     
     const normalizedName = mapName.toLowerCase();
-    return mapImageMap[normalizedName] || null;
+    const path = mapImageMap[normalizedName];
+    if (!path) return null;
+    // Prefer the fingerprinted WebP thumbnail (cached immutably) when the asset build produced one
+    const built = (window.ASSET_URLS || {})[path.replace('/assets/', '')];
+    if (built) return built.thumbnail || built.url;
+    return path;
 }
 
@@ -0,0 +1,172 @@
+"""Teammate synergy and head-to-head counts as dense N x N matrices.
+
+Three int32 matrices indexed by player row, stored in one memory-mapped
+.npy file (shape 3 x capacity x capacity) next to the season's match folders:
+    TOGETHER      games i and j played on the same team (diagonal: games played)
+    WINS_TOGETHER games i and j won together
+    H2H_WINS      games i won against j (games against = H2H[i, j] + H2H[j, i])
+
+Recording a match touches 25 cells per team in the team matrices and 25 in
+the head-to-head one; lookups are single cells or one row. Names, capacity
+and the number of matches recorded live in a JSON sidecar, and the file is
+rebuilt from the match log when that count is stale.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+TOGETHER, WINS_TOGETHER, H2H_WINS = 0, 1, 2
+SYNERGY_FILENAME = 'synergy.npy'
+INITIAL_CAPACITY = 64
+# Games of shrinkage toward a 50% pair win rate in team_synergy
+PAIR_PRIOR_GAMES = 4
+
+
+class SynergyMatrix:
+    """Memory-mapped teammate and opponent counts for one season"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.names = []
+        self.index = {}
+        self.matches = 0
+        self.data = np.zeros((3, INITIAL_CAPACITY, INITIAL_CAPACITY), dtype=np.int32)
+
+    @property
+    def meta_path(self):
+        return os.path.splitext(self.path)[0] + '.json'
+
+    def _open(self, capacity, copy_from=None):
+        """(Re)create the backing array with room for capacity players"""
+        if self.path:
+            tmp_path = self.path + '.tmp.npy'
+            data = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.int32, shape=(3, capacity, capacity))
+        else:
+            data = np.zeros((3, capacity, capacity), dtype=np.int32)
+        if copy_from is not None:
+            n = copy_from.shape[1]
+            data[:, :n, :n] = copy_from
+        if self.path:
+            data.flush()
+            del data
+            os.replace(tmp_path, self.path)
+            data = np.load(self.path, mmap_mode='r+')
+        self.data = data
+
+    def _rows(self, names):
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+        capacity = self.data.shape[1]
+        if len(self.names) > capacity:
+            while capacity < len(self.names):
+                capacity *= 2
+            self._open(capacity, copy_from=np.array(self.data))
+        return np.array([self.index[n] for n in names], dtype=np.int64)
+
+    def _count(self, w, l):
+        """Add one match given the row indices of the winners and the losers"""
+        self.data[TOGETHER][np.ix_(w, w)] += 1
+        self.data[TOGETHER][np.ix_(l, l)] += 1
+        self.data[WINS_TOGETHER][np.ix_(w, w)] += 1
+        self.data[H2H_WINS][np.ix_(w, l)] += 1
+
+    def record(self, winners, losers):
+        """Add one finished match and persist it"""
+        with self._lock:
+            self._count(self._rows([str(n) for n in winners]), self._rows([str(n) for n in losers]))
+            self.matches += 1
+            self._flush()
+
+    def rebuild(self, log):
+        """Recount every match of a columnar match log (seasons.load_match_log)"""
+        with self._lock:
+            self.names, self.index, self.matches = [], {}, 0
+            names = [str(n) for n in log["names"]] if log is not None else []
+            capacity = INITIAL_CAPACITY
+            while capacity < len(names):
+                capacity *= 2
+            self._open(capacity)
+            if log is not None:
+                self._rows(names)
+                starts = log["m_line_start"]
+                for i in range(len(log["m_num"])):
+                    lines = slice(int(starts[i]), int(starts[i + 1]))
+                    players = log["l_player"][lines]
+                    won = log["l_team"][lines] == log["m_winner"][i]
+                    self._count(players[won], players[~won])
+                self.matches = len(log["m_num"])
+            self._flush()
+
+    def _flush(self):
+        if not self.path:
+            return
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"names": self.names, "matches": self.matches}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def load(self):
+        """Map the saved matrices; returns the number of matches they hold"""
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        with self._lock:
+            self.data = np.load(self.path, mmap_mode='r+')
+            self.names = meta["names"]
+            self.index = {name: i for i, name in enumerate(self.names)}
+            self.matches = int(meta["matches"])
+        return self.matches
+
+    def pair(self, a, b):
+        """Counts for two players: games/wins together and games/wins against"""
+        i, j = self.index.get(str(a)), self.index.get(str(b))
+        if i is None or j is None:
+            return {"games_together": 0, "wins_together": 0, "games_against": 0, "wins_against": 0}
+        d = self.data
+        return {
+            "games_together": int(d[TOGETHER, i, j]),
+            "wins_together": int(d[WINS_TOGETHER, i, j]),
+            "games_against": int(d[H2H_WINS, i, j] + d[H2H_WINS, j, i]),
+            "wins_against": int(d[H2H_WINS, i, j]),
+        }
+
+    def player_summary(self, name, min_games=1):
+        """Teammates and opponents of one player from a single row of each matrix"""
+        i = self.index.get(str(name))
+        if i is None:
+            return None
+        n = len(self.names)
+        together = np.asarray(self.data[TOGETHER, i, :n])
+        wins_together = np.asarray(self.data[WINS_TOGETHER, i, :n])
+        wins_against = np.asarray(self.data[H2H_WINS, i, :n])
+        losses_against = np.asarray(self.data[H2H_WINS, :n, i])
+        against = wins_against + losses_against
+
+        teammates, opponents = [], []
+        for j in np.flatnonzero(together >= min_games).tolist():
+            if j != i:
+                teammates.append({"name": self.names[j], "games": int(together[j]), "wins": int(wins_together[j]),
+                                  "win_rate": round(float(wins_together[j] / together[j]) * 100, 1)})
+        for j in np.flatnonzero(against >= min_games).tolist():
+            opponents.append({"name": self.names[j], "games": int(against[j]), "wins": int(wins_against[j]),
+                              "losses": int(losses_against[j]),
+                              "win_rate": round(float(wins_against[j] / against[j]) * 100, 1)})
+        teammates.sort(key=lambda t: (-t["games"], -t["win_rate"]))
+        opponents.sort(key=lambda t: (-t["games"], -t["win_rate"]))
+        return {"name": str(name), "matches": int(together[i]), "teammates": teammates, "opponents": opponents}
+
+    def team_synergy(self, names):
+        """Summed pair win-rate edge of a lineup, each pair shrunk toward 50% by PAIR_PRIOR_GAMES"""
+        idx = np.array([self.index[str(n)] for n in names if str(n) in self.index], dtype=np.int64)
+        if len(idx) < 2:
+            return 0.0
+        upper = np.triu_indices(len(idx), k=1)
+        games = self.data[TOGETHER][np.ix_(idx, idx)][upper].astype(np.float64)
+        wins = self.data[WINS_TOGETHER][np.ix_(idx, idx)][upper].astype(np.float64)
+        return float(np.sum((wins - games / 2) / (games + PAIR_PRIOR_GAMES)))
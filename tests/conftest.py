@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+import db_connection  # noqa: E402
+import elo_engine  # noqa: E402
+import player_table  # noqa: E402
+import rating_formulas  # noqa: E402
+import seasons  # noqa: E402
+import synthetic_league  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def default_formulas(tmp_path, monkeypatch):
+    """Registry defaults, never the rating_formulas.json or custom formulas of a local match_history"""
+    monkeypatch.setattr(rating_formulas, 'ACTIVE_PATH', str(tmp_path / 'rating_formulas.json'))
+    monkeypatch.setattr(rating_formulas, 'FORMULAS_PATH', str(tmp_path / 'custom_rating_formulas.json'))
+    monkeypatch.setattr(rating_formulas, '_registry', dict(rating_formulas._registry))
+    monkeypatch.setattr(rating_formulas, '_DEFAULTS', dict(rating_formulas._DEFAULTS))
+    monkeypatch.setitem(rating_formulas._config, "loaded", False)
+    rating_formulas._active.clear()
+    yield
+    rating_formulas._active.clear()
+
+
+@pytest.fixture
+def league_root(tmp_path, monkeypatch):
+    """Empty match_history under tmp_path with the seasons module pointed at it"""
+    root = tmp_path / 'match_history'
+    monkeypatch.setattr(seasons, 'MATCH_HISTORY_ROOT', str(root))
+    monkeypatch.setattr(seasons, 'ARCHIVE_DIR', str(root / 'archive'))
+    monkeypatch.setattr(seasons, 'SEASON_STATE_PATH', str(root / 'seasons.json'))
+    monkeypatch.setitem(seasons._current, "season", None)
+    seasons.load_archive.cache_clear()
+    yield tmp_path
+    seasons.load_archive.cache_clear()
+    db_connection.close_all()
+
+
+@pytest.fixture(scope='session')
+def log():
+    return synthetic_league.generate_log(n_players=24, n_matches=60, seed=7)
+
+
+def prefix_log(log, n):
+    """The first n matches of a columnar match log (names and maps unchanged)"""
+    end = int(log["m_line_start"][n])
+    out = dict(log)
+    for key, values in log.items():
+        if key.startswith("m_") and key != "m_line_start":
+            out[key] = values[:n]
+        elif key.startswith("l_"):
+            out[key] = values[:end]
+    out["m_line_start"] = log["m_line_start"][:n + 1]
+    return out
+
+
+def match_lines(log, i):
+    """(names, k, d, a, adr, mvp, won, total_rounds) of match i, ADR stored as int like submit_match"""
+    lines = slice(int(log["m_line_start"][i]), int(log["m_line_start"][i + 1]))
+    names = log["names"][log["l_player"][lines]].tolist()
+    won = log["l_team"][lines] == log["m_winner"][i]
+    adr = np.trunc(log["l_adr"][lines]).astype(np.int64)
+    total_rounds = int(log["m_t1_score"][i]) + int(log["m_t2_score"][i])
+    return (names, log["l_k"][lines].astype(np.int64), log["l_d"][lines].astype(np.int64),
+            log["l_a"][lines].astype(np.int64), adr, log["l_mvp"][lines].astype(np.int64), won, total_rounds)
+
+
+def roster_df(names):
+    df = pd.DataFrame({"Name": names})
+    for col in player_table.INT_COLUMNS:
+        df[col] = 1000 if col == "ELO" else 0
+    for col in player_table.FLOAT_COLUMNS:
+        df[col] = 0.0
+    df["MatchHistory"] = ""
+    return df
+
+
+def submit_live(log):
+    """Submit every match of a log the way submit_match does: apply_match, derive, next match.
+
+    Returns the final table and the log with the gains submit_match records.
+    """
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    recorded = dict(log, m_t1_gain=log["m_t1_gain"].copy(), m_t2_gain=log["m_t2_gain"].copy())
+    for i in range(len(log["m_num"])):
+        names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, i)
+        elo = table["ELO"][table.indices(names)]
+        team_1 = np.arange(len(names)) < 5
+        t1_gain, t2_gain = elo_engine.team_gains(elo[team_1].sum(), elo[~team_1].sum())
+        recorded["m_t1_gain"][i], recorded["m_t2_gain"][i] = t1_gain, t2_gain
+        win_gain, loss_gain = (t1_gain, t2_gain) if log["m_winner"][i] == 1 else (t2_gain, t1_gain)
+        deltas = elo_engine.elo_changes(elo, k, d, a, adr, mvp, won, win_gain, loss_gain)
+        table.apply_match(names, k, d, a, adr, mvp, won, deltas, total_rounds, f"match_{int(log['m_num'][i])}")
+        table.derive()
+    return table, recorded
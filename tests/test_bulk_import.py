@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+import bulk_import
+import elo_replay
+from conftest import match_lines, roster_df, submit_live
+
+COMPARED = ["Name", "ELO"] + elo_replay.TOTAL_COLUMNS + elo_replay.DERIVED_COLUMNS + elo_replay.ROUND_COLUMNS + ["MatchHistory"]
+
+
+def records(log):
+    """JSONL-style import records of every match of a log"""
+    out = []
+    for i in range(len(log["m_num"])):
+        names, k, d, a, adr, mvp, _, _ = match_lines(log, i)
+        lines = [{"Name": n, "K": int(ki), "D": int(di), "A": int(ai), "ADR": int(adri), "MVP": int(m)}
+                 for n, ki, di, ai, adri, m in zip(names, k, d, a, adr, mvp)]
+        out.append({"team_1": lines[:5], "team_2": lines[5:], "map": str(log["maps"][log["m_map"][i]]),
+                    "team1_score": int(log["m_t1_score"][i]), "team2_score": int(log["m_t2_score"][i])})
+    return out
+
+
+def by_name(df):
+    return df[COMPARED].sort_values("Name").reset_index(drop=True)
+
+
+def test_import_matches_submitting_one_by_one(log):
+    names = log["names"].tolist()
+    matches = bulk_import.validate_records(records(log), names)
+    table, results, _ = bulk_import.apply_matches(roster_df(names), matches, first_match_num=1)
+
+    live, recorded = submit_live(log)
+    pd.testing.assert_frame_equal(by_name(table), by_name(live.to_dataframe()), check_dtype=False)
+    assert [r["t1_gain"] for r in results] == recorded["m_t1_gain"].tolist()
+
+
+def test_validation_reports_every_problem(log):
+    bad = records(log)[:2]
+    bad[0]["team_1"][0]["Name"] = "nobody"
+    bad[1]["team_2"] = bad[1]["team_2"][:4]
+    with pytest.raises(bulk_import.ImportValidationError) as info:
+        bulk_import.validate_records(bad, log["names"].tolist())
+    assert len(info.value.errors) == 2
+
+
+def test_plan_import_writes_nothing(league_root, log):
+    names = log["names"].tolist()
+    plan = bulk_import.plan_import(records(log)[:3], roster_df(names), season="S4")
+    assert plan["first_match_num"] == 1
+    assert [r["match_num"] for r in plan["results"]] == [1, 2, 3]
+    assert not (league_root / 'match_history').exists()
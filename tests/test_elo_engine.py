@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import elo_engine
+
+
+def old_get_rating(kd, kpm, apm, dpm, adr):
+    return round(0.65*kd + 0.024*kpm + 0.016*apm - 0.025*dpm + 0.0035*adr, 2)
+
+
+def old_submit_match_changes(elo, k, d, a, adr, mvp, won, elo_gain, losing_elo_gain):
+    """Per-player ELO changes exactly as the scalar submit_match loop computed them"""
+    average_elo = sum(elo) // 10
+    changes = []
+    for elo_i, k_i, d_i, a_i, adr_i, mvp_i, won_i in zip(elo, k, d, a, adr, mvp, won):
+        rating = old_get_rating(k_i / (d_i + 0.001), k_i, a_i, d_i, adr_i)
+        if won_i:
+            changes.append(int(int(elo_gain) + min(15, int(rating * 5)) - int((elo_i - average_elo) * 0.03) + mvp_i * 10))
+        else:
+            changes.append(-(int(losing_elo_gain) + max(0, (10 - int(rating * 10))) + int((elo_i - average_elo) * 0.03)))
+    return changes
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_elo_changes_match_old_submit_match(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        elo = rng.integers(700, 1400, 10).tolist()
+        k = rng.integers(0, 40, 10).tolist()
+        d = rng.integers(0, 30, 10).tolist()
+        a = rng.integers(0, 15, 10).tolist()
+        adr = rng.integers(0, 200, 10).tolist()
+        won = [True] * 5 + [False] * 5
+        mvp_index = int(rng.integers(0, 5))
+        mvp = [int(i == mvp_index) for i in range(10)]
+        t1_gain, t2_gain = elo_engine.team_gains(sum(elo[:5]), sum(elo[5:]))
+
+        expected = old_submit_match_changes(elo, k, d, a, adr, mvp, won, t1_gain, t2_gain)
+        changes = elo_engine.elo_changes(np.array(elo), k, d, a, adr, mvp, won, t1_gain, t2_gain)
+        assert changes.tolist() == expected
+
+
+def test_match_ratings_match_old_get_rating():
+    rng = np.random.default_rng(1)
+    k, d, a, adr = (rng.integers(0, hi, 2000) for hi in (40, 30, 15, 200))
+    # submit_match passed Python ints (int(...) of the DataFrame cells)
+    expected = [old_get_rating(ki / (di + 0.001), ki, ai, di, adri)
+                for ki, di, ai, adri in zip(k.tolist(), d.tolist(), a.tolist(), adr.tolist())]
+    assert elo_engine.match_ratings(k, d, a, adr).tolist() == expected
+
+
+def test_team_gains_follow_the_create_match_rule():
+    assert elo_engine.team_gains(5000, 5000) == (25, 25)
+    assert elo_engine.team_gains(5120, 5000) == (23, 27)
+    assert elo_engine.team_gains(9000, 5000) == (0, 50)
+    assert elo_engine.team_gains(5000, 5120) == (28, 22)
+
+
+def test_resolve_params_rejects_unknown_keys():
+    assert elo_engine.resolve_params({"mvp_bonus": 5})["mvp_bonus"] == 5
+    with pytest.raises(ValueError):
+        elo_engine.resolve_params({"mvp_bonsu": 5})
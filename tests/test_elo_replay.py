@@ -0,0 +1,80 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import db_connection
+import elo_replay
+import synthetic_league
+from conftest import submit_live
+
+COMPARED = ["Name", "ELO"] + elo_replay.TOTAL_COLUMNS + elo_replay.DERIVED_COLUMNS + elo_replay.ROUND_COLUMNS + ["MatchHistory"]
+
+
+def by_name(df):
+    return df[COMPARED].sort_values("Name").reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def long_log():
+    return synthetic_league.generate_log(n_players=24, n_matches=200, seed=3)
+
+
+@pytest.mark.parametrize("use_recorded_gains", [True, False])
+def test_replay_matches_live_submissions(long_log, use_recorded_gains):
+    live, recorded = submit_live(long_log)
+    replayed = elo_replay.replay_log(recorded, long_log["names"].tolist(), use_recorded_gains=use_recorded_gains)
+    pd.testing.assert_frame_equal(by_name(replayed["table"]), by_name(live.to_dataframe()), check_dtype=False)
+
+
+def test_replay_is_deterministic(log):
+    first = elo_replay.replay_log(log, log["names"].tolist())
+    second = elo_replay.replay_log(log, log["names"].tolist())
+    pd.testing.assert_frame_equal(first["table"], second["table"])
+    assert first["snapshots"] == second["snapshots"]
+
+
+def test_replay_params_override_the_formula(log):
+    default = elo_replay.replay_log(log, log["names"].tolist())["table"]
+    no_mvp = elo_replay.replay_log(log, log["names"].tolist(), params={"mvp_bonus": 0})["table"]
+    assert by_name(default)["ELO"].sum() > by_name(no_mvp)["ELO"].sum()
+
+
+def create_players_db(path, names):
+    columns = ", ".join(f'"{c}" REAL DEFAULT 0' for c in COMPARED[1:-1])
+    with sqlite3.connect(path) as conn:
+        conn.execute(f'CREATE TABLE players (Name TEXT PRIMARY KEY, {columns}, MatchHistory TEXT DEFAULT "")')
+        conn.execute('CREATE TABLE elo_history (Name TEXT, day TEXT, elo INTEGER, PRIMARY KEY (Name, day))')
+        conn.executemany('INSERT INTO players (Name, ELO) VALUES (?, 1000)', [(n,) for n in names])
+        conn.execute('INSERT INTO elo_history VALUES (?, ?, 1000)', (names[0], "2026-09-01"))
+    conn.close()
+
+
+def test_write_replay_persists_players_and_snapshots_together(tmp_path, log):
+    path = str(tmp_path / 'league.db')
+    names = log["names"].tolist()
+    create_players_db(path, names)
+    result = elo_replay.replay_log(log, names)
+    elo_replay.write_replay(result["table"], result["snapshots"], db_path=path)
+    db_connection.close_all()
+
+    with sqlite3.connect(path) as conn:
+        elo = dict(conn.execute('SELECT Name, ELO FROM players').fetchall())
+        days = conn.execute('SELECT COUNT(DISTINCT day), MAX(day) FROM elo_history').fetchone()
+    assert elo == dict(zip(result["table"]["Name"], result["table"]["ELO"].tolist()))
+    assert days == (len(result["snapshots"]), max(result["snapshots"]))
+
+
+def test_write_replay_rolls_back_players_when_snapshots_fail(tmp_path, log):
+    path = str(tmp_path / 'league.db')
+    names = log["names"].tolist()
+    create_players_db(path, names)
+    with sqlite3.connect(path) as conn:
+        conn.execute('DROP TABLE elo_history')
+    result = elo_replay.replay_log(log, names)
+    with pytest.raises(sqlite3.OperationalError):
+        elo_replay.write_replay(result["table"], result["snapshots"], db_path=path)
+    db_connection.close_all()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM players WHERE ELO != 1000').fetchone() == (0,)
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import elo_snapshots
+
+
+def players(**elo):
+    return pd.DataFrame({"Name": list(elo), "ELO": list(elo.values())})
+
+
+def test_only_changed_players_are_written_within_a_day():
+    writes = []
+    writer = elo_snapshots.EloSnapshotWriter(lambda rows, day_str: writes.append((day_str, rows)))
+    assert writer.record(players(a=1000, b=1000), "2026-10-01") == 2
+    assert writer.record(players(a=1012, b=1000), "2026-10-01") == 1
+    assert writer.record(players(a=1012, b=1000), "2026-10-01") == 0
+    assert writes[-1] == ("2026-10-01", {"a": 1012})
+
+
+def test_a_new_day_writes_every_player_again():
+    writes = []
+    writer = elo_snapshots.EloSnapshotWriter(lambda rows, day_str: writes.append((day_str, rows)))
+    writer.record(players(a=1000, b=1000), "2026-10-01")
+    assert writer.record(players(a=1000, b=1000), "2026-10-02") == 2
+    assert writes[-1] == ("2026-10-02", {"a": 1000, "b": 1000})
+
+
+def test_baseline_runs_once_before_the_first_write():
+    calls = []
+    writer = elo_snapshots.EloSnapshotWriter(lambda rows, day_str: calls.append("upsert"),
+                                             ensure_baseline=lambda: calls.append("baseline"))
+    writer.record(players(a=1000), "2026-10-01")
+    writer.record(players(a=1010), "2026-10-01")
+    assert calls == ["baseline", "upsert", "upsert"]
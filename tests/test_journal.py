@@ -0,0 +1,141 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import journal
+import player_table
+from conftest import match_lines, roster_df
+
+
+def match_event(log, i, table):
+    """Journal payload of match i with per-player deltas, as submit_match writes it"""
+    names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, i)
+    return {"delta": {
+        "match_num": int(log["m_num"][i]),
+        "total_rounds": total_rounds,
+        "players": [
+            {"name": n, "won": bool(w), "K": int(ki), "D": int(di), "A": int(ai), "ADR": int(adri), "MVP": int(m),
+             "elo_change": 10 if w else -10,
+             "prev_round_stats": [table.row(n)[col] for col in player_table.ROUND_COLUMNS]}
+            for n, w, ki, di, ai, adri, m in zip(names, won, k, d, a, adr, mvp)
+        ],
+    }}
+
+
+def submit(j, table, log, i):
+    event = match_event(log, i, table)
+    seq = j.append("match", event)
+    journal.apply_event(table, {"type": "match", "data": event})
+    return seq
+
+
+def test_records_survive_reopen(tmp_path):
+    j = journal.Journal(str(tmp_path)).open()
+    seqs = [j.append("reset", {"n": n}) for n in range(5)]
+    j.close()
+
+    j = journal.Journal(str(tmp_path)).open()
+    assert seqs == [1, 2, 3, 4, 5]
+    assert j.last_seq == 5
+    assert [e["data"]["n"] for e in j.events()] == list(range(5))
+    assert j.append("reset", {"n": 5}) == 6
+    j.close()
+
+
+@pytest.mark.parametrize("damage", ["torn", "corrupt"])
+def test_damaged_tail_is_truncated(tmp_path, damage):
+    j = journal.Journal(str(tmp_path)).open()
+    for n in range(3):
+        j.append("reset", {"n": n})
+    path, intact = j.path, os.path.getsize(j.path)
+    j.append("reset", {"n": 3})
+    j.close()
+    with open(path, 'r+b') as f:
+        if damage == "torn":
+            f.truncate(intact + 5)
+        else:
+            f.seek(-2, os.SEEK_END)
+            f.write(b'??')
+
+    j = journal.Journal(str(tmp_path)).open()
+    assert j.last_seq == 3
+    assert os.path.getsize(path) == intact
+    assert j.append("reset", {"n": 4}) == 4
+    j.close()
+    assert [e["seq"] for e in journal.Journal(str(tmp_path)).open().events()] == [1, 2, 3, 4]
+
+
+def test_append_requires_open(tmp_path):
+    with pytest.raises(RuntimeError):
+        journal.Journal(str(tmp_path)).append("reset", {})
+
+
+def test_recover_replays_tail_onto_snapshot(tmp_path, log):
+    j = journal.Journal(str(tmp_path), snapshot_every=10).open()
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    j.save_snapshot(table.to_dataframe())
+    for i in range(25):
+        submit(j, table, log, i)
+        if j.snapshot_due():
+            j.save_snapshot(table.to_dataframe())
+    j.close()
+
+    # Rotated at every snapshot; only segments a kept snapshot needs remain
+    segments = sorted(os.path.basename(p) for p in os.listdir(tmp_path) if p.startswith("events_"))
+    assert segments == ["events_0000000011.log", "events_0000000021.log"]
+    assert j.latest_snapshot_seq() == 20
+
+    j = journal.Journal(str(tmp_path)).open()
+    recovered, tail = j.recover()
+    assert [e["seq"] for e in tail] == [21, 22, 23, 24, 25]
+    pd.testing.assert_frame_equal(recovered.to_dataframe(), table.to_dataframe())
+    j.close()
+
+
+def test_recover_without_snapshot_returns_events(tmp_path):
+    j = journal.Journal(str(tmp_path)).open()
+    j.append("reset", {})
+    j.close()
+    table, tail = journal.Journal(str(tmp_path)).open().recover()
+    assert table is None
+    assert [e["type"] for e in tail] == ["reset"]
+
+
+def test_legacy_log_is_migrated(tmp_path):
+    j = journal.Journal(str(tmp_path)).open()
+    j.append("reset", {})
+    j.close()
+    os.replace(j.path, tmp_path / journal.LEGACY_FILENAME)
+
+    j = journal.Journal(str(tmp_path)).open()
+    assert os.path.basename(j.path) == "events_0000000001.log"
+    assert j.last_seq == 1
+    j.close()
+
+
+def test_reset_event_zeroes_the_table(log):
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    journal.apply_event(table, {"type": "match", "data": match_event(log, 0, table)})
+    assert journal.apply_event(table, {"type": "reset", "data": {}})
+    assert np.all(table["ELO"] == journal.START_ELO)
+    assert np.all(table["Matches"] == 0)
+    assert not journal.apply_event(table, {"type": "rebuild", "data": {}})
+
+
+def test_snapshot_after_rebuild_unblocks_recovery(tmp_path, log):
+    j = journal.Journal(str(tmp_path)).open()
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    j.save_snapshot(table.to_dataframe())
+    submit(j, table, log, 0)
+    seq = j.append("rebuild", {"action": "import"})
+    assert j.recover()[0] is None
+
+    # web_app.journaled_rebuild snapshots right after the rebuild, written or failed
+    j.save_snapshot(table.to_dataframe(), seq)
+    submit(j, table, log, 1)
+    j.close()
+    recovered, tail = journal.Journal(str(tmp_path)).open().recover()
+    assert [e["type"] for e in tail] == ["match"]
+    pd.testing.assert_frame_equal(recovered.to_dataframe(), table.to_dataframe())
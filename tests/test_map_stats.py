@@ -0,0 +1,70 @@
+"""Per-match map stats equal a backfill from the match log.
+
+submit_match brings the table up to date with the log *before* the new
+match folder is written, then records the match on top; recording after a
+backfill that already includes the folder would count the match twice.
+"""
+import map_stats
+import synthetic_league
+from conftest import match_lines, prefix_log
+
+
+def map_rows(db_path, season):
+    with map_stats._connect(db_path) as conn:
+        return conn.execute(f'SELECT Name, map_name, {", ".join(map_stats.STAT_COLUMNS)} FROM player_map_stats '
+                            'WHERE season = ? ORDER BY Name, map_name', (season,)).fetchall()
+
+
+def record_next_match(log, i, root, db_path):
+    """submit_match's order: catch up with the folders on disk, record the match, then write its folder"""
+    map_stats.ensure_backfilled("S4", db_path)
+    names, k, d, a, adr, _, won, total_rounds = match_lines(log, i)
+    map_stats.record_match(str(log["maps"][log["m_map"][i]]), list(zip(names, won, k, d, a, adr)),
+                           total_rounds, season="S4", db_path=db_path)
+    synthetic_league.write_match_folders(prefix_log(log, i + 1), root)
+
+
+def test_map_stats_record_equals_backfill(league_root, log):
+    db_path = str(league_root / 'league.db')
+    n = 40
+    synthetic_league.write_match_folders(prefix_log(log, n), str(league_root))
+    for i in range(n, len(log["m_num"])):
+        record_next_match(log, i, str(league_root), db_path)
+
+    assert map_stats.ensure_backfilled("S4", db_path) is False
+    recorded = map_rows(db_path, "S4")
+
+    rebuilt_path = str(league_root / 'rebuilt.db')
+    map_stats.backfill("S4", rebuilt_path)
+    assert recorded == map_rows(rebuilt_path, "S4")
+    assert sum(r[2] + r[3] for r in recorded) == 10 * len(log["m_num"])
+
+
+def test_map_stats_catch_up_after_the_folder_counts_twice(league_root, log):
+    db_path = str(league_root / 'league.db')
+    synthetic_league.write_match_folders(prefix_log(log, 10), str(league_root))
+    # Folder first, then the catch-up backfill: it already includes the match
+    assert map_stats.ensure_backfilled("S4", db_path) is True
+    names, k, d, a, adr, _, won, total_rounds = match_lines(log, 9)
+    map_stats.record_match(str(log["maps"][log["m_map"][9]]), list(zip(names, won, k, d, a, adr)),
+                           total_rounds, season="S4", db_path=db_path)
+    assert sum(r[2] + r[3] for r in map_rows(db_path, "S4")) == 10 * 11
+    # ... which the match counter catches on the next request
+    assert map_stats.ensure_backfilled("S4", db_path) is True
+    assert sum(r[2] + r[3] for r in map_rows(db_path, "S4")) == 10 * 10
+
+
+def test_map_stats_revert_undoes_record(league_root, log):
+    db_path = str(league_root / 'league.db')
+    synthetic_league.write_match_folders(prefix_log(log, 20), str(league_root))
+    map_stats.backfill("S4", db_path)
+    before = map_rows(db_path, "S4")
+
+    names, k, d, a, adr, _, won, total_rounds = match_lines(log, 20)
+    lines = list(zip(names, won, k, d, a, adr))
+    map_name = str(log["maps"][log["m_map"][20]])
+    map_stats.record_match(map_name, lines, total_rounds, season="S4", db_path=db_path)
+    with map_stats.db_connection.transaction(db_path, schema=map_stats.SCHEMA) as conn:
+        map_stats.revert_match(conn, map_name, lines, total_rounds, season="S4")
+    assert map_rows(db_path, "S4") == before
+    assert map_stats.ensure_backfilled("S4", db_path) is False
@@ -0,0 +1,60 @@
+"""Recording matches one by one equals a rebuild from the match log."""
+import numpy as np
+import pytest
+
+import player_form
+from conftest import match_lines, prefix_log
+
+SPLITS = [1, 30, 59]
+
+
+@pytest.mark.parametrize("n", SPLITS)
+def test_form_record_equals_rebuild(log, n):
+    tracker = player_form.FormTracker()
+    tracker.rebuild(prefix_log(log, n))
+    for i in range(n, len(log["m_num"])):
+        names, k, d, a, adr, _, won, total_rounds = match_lines(log, i)
+        tracker.record(names, k, d, a, adr, won, total_rounds)
+
+    rebuilt = player_form.FormTracker()
+    rebuilt.rebuild(log)
+    assert tracker.matches == rebuilt.matches == len(log["m_num"])
+    assert sorted(tracker.names) == sorted(rebuilt.names)
+    for name in rebuilt.names:
+        assert tracker.stats(name) == rebuilt.stats(name)
+    np.testing.assert_allclose(tracker.features(rebuilt.names), rebuilt.features(rebuilt.names))
+
+
+def test_save_writes_only_the_rows_that_changed(tmp_path, log):
+    path = str(tmp_path / player_form.FORM_FILENAME)
+    tracker = player_form.FormTracker()
+    tracker.rebuild(prefix_log(log, 30))
+    tracker.save(path)
+    names, k, d, a, adr, _, won, total_rounds = match_lines(log, 30)
+    tracker.record(names, k, d, a, adr, won, total_rounds)
+    assert sorted(tracker._dirty) == sorted(tracker.index[n] for n in names)
+
+    # Rows of players outside the match are not written: corrupt one on disk, it stays corrupt
+    bystander = next(i for i, n in enumerate(tracker.names) if n not in names)
+    stored = np.load(f'{path}/ewma.npy', mmap_mode='r+')
+    stored[bystander] = -1.0
+    stored.flush()
+    del stored
+    tracker.save(path)
+
+    loaded = player_form.FormTracker()
+    assert loaded.load(path) == 31
+    assert loaded.ewma[bystander] == -1.0
+    loaded.ewma[bystander] = tracker.ewma[bystander]
+    for name in names:
+        assert loaded.stats(name) == tracker.stats(name)
+    np.testing.assert_allclose(loaded.features(tracker.names), tracker.features(tracker.names))
+
+
+def test_strength_averages_form_and_windowed_ratings(log):
+    tracker = player_form.FormTracker()
+    tracker.rebuild(log)
+    features = tracker.features(tracker.names)
+    expected = np.mean([tracker.ewma[0]] + [tracker.stats(tracker.names[0])[f"last_{w}"]["rating"]
+                                            for w in player_form.WINDOWS])
+    assert player_form.strength(features)[0] == pytest.approx(expected)
@@ -0,0 +1,36 @@
+import player_search
+
+NAMES = ["tenzin", "SEN tenz", "Tenacious", "100T Kyedae", "Kyle", "FNC Boaster"]
+
+
+def test_prefix_ranks_full_name_matches_then_shorter_names():
+    index = player_search.PlayerSearchIndex(NAMES)
+    assert index.prefix("ten") == ["tenzin", "Tenacious", "SEN tenz"]
+    assert index.prefix("  TEN ") == index.prefix("ten")
+    assert index.prefix("boas") == ["FNC Boaster"]
+    assert index.prefix("") == []
+
+
+def test_fuzzy_finds_typos():
+    index = player_search.PlayerSearchIndex(NAMES)
+    names = [name for name, _ in index.fuzzy("kyedea")]
+    assert names[0] == "100T Kyedae"
+    assert "FNC Boaster" not in names
+
+
+def test_search_puts_prefix_matches_before_fuzzy_ones_without_duplicates():
+    index = player_search.PlayerSearchIndex(NAMES)
+    results = index.search("tenz")
+    assert [r["name"] for r in results[:2]] == ["tenzin", "SEN tenz"]
+    assert all(r["match"] == "prefix" for r in results[:2])
+    assert len({r["name"] for r in results}) == len(results)
+    assert len(index.search("tenz", limit=1)) == 1
+
+
+def test_sync_adds_and_removes_changed_names():
+    index = player_search.PlayerSearchIndex(NAMES)
+    index.sync(["tenzin", "Kyle", "Sacy"])
+    assert "SEN tenz" not in index
+    assert index.prefix("sac") == ["Sacy"]
+    assert index.prefix("tenz") == ["tenzin"]
+    assert len(index) == 3
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+import elo_engine
+import player_table
+from conftest import match_lines, roster_df
+
+
+def old_round_stats(old, matches, value):
+    """KPR/DPR/APR update of the scalar submit_match loop"""
+    if matches > 1:
+        return round((np.float64(old) * (matches - 1) + value) / matches, 3)
+    return value
+
+
+def test_apply_match_matches_old_scalar_update(log):
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    expected = {name: {"Matches": 0, "Wins": 0, "TKills": 0, "MVP": 0, "KPR": 0.0, "DPR": 0.0, "ELO": 1000, "history": []}
+                for name in table.names}
+    for i in range(len(log["m_num"])):
+        names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, i)
+        deltas = elo_engine.elo_changes(table["ELO"][table.indices(names)], k, d, a, adr, mvp, won, 25, 25)
+        for j, name in enumerate(names):
+            e = expected[name]
+            e["Matches"] += 1
+            e["Wins"] += int(won[j])
+            e["TKills"] += int(k[j])
+            e["MVP"] += int(mvp[j]) if won[j] else 0
+            e["KPR"] = old_round_stats(e["KPR"], e["Matches"], round(int(k[j]) / total_rounds, 3))
+            e["DPR"] = old_round_stats(e["DPR"], e["Matches"], round(int(d[j]) / total_rounds, 3))
+            e["ELO"] += int(deltas[j])
+            e["history"].append(f"match_{int(log['m_num'][i])}")
+        table.apply_match(names, k, d, a, adr, mvp, won, deltas, total_rounds, f"match_{int(log['m_num'][i])}")
+
+    for name, e in expected.items():
+        row = table.row(name)
+        for col in ("Matches", "Wins", "TKills", "MVP", "KPR", "DPR", "ELO"):
+            assert row[col] == e[col], (name, col)
+        assert row["MatchHistory"] == ",".join(e["history"])
+
+
+def test_revert_match_round_trips_apply_match(log):
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    for i in range(len(log["m_num"]) - 1):
+        names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, i)
+        table.apply_match(names, k, d, a, adr, mvp, won, np.zeros(len(names)), total_rounds, f"match_{i + 1}")
+    before = table.copy()
+
+    i = len(log["m_num"]) - 1
+    names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, i)
+    previous = [[table.row(n)[col] for col in player_table.ROUND_COLUMNS] for n in names]
+    deltas = elo_engine.elo_changes(table["ELO"][table.indices(names)], k, d, a, adr, mvp, won, 30, 20)
+    table.apply_match(names, k, d, a, adr, mvp, won, deltas, total_rounds, f"match_{i + 1}")
+    assert table.columns["Matches"].sum() == before.columns["Matches"].sum() + 10
+    table.revert_match(names, k, d, a, adr, mvp, won, deltas, previous, f"match_{i + 1}")
+
+    pd.testing.assert_frame_equal(table.derive().to_dataframe(), before.derive().to_dataframe())
+
+
+def test_copy_is_independent(log):
+    table = player_table.PlayerTable.from_dataframe(roster_df(log["names"].tolist()))
+    copy = table.copy()
+    names, k, d, a, adr, mvp, won, total_rounds = match_lines(log, 0)
+    copy.apply_match(names, k, d, a, adr, mvp, won, np.ones(len(names)), total_rounds, "match_1")
+    assert table.columns["Matches"].sum() == 0
+    assert table.history == [""] * len(table)
+
+
+def test_sort_by_elo_keeps_rows_together():
+    df = roster_df(["a", "b", "c"])
+    df["ELO"] = [900, 1100, 1000]
+    df["TKills"] = [1, 2, 3]
+    table = player_table.PlayerTable.from_dataframe(df).sort_by_elo()
+    assert table.names == ["b", "c", "a"]
+    assert table.index == {"b": 0, "c": 1, "a": 2}
+    assert table["TKills"].tolist() == [2, 3, 1]
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rating_formulas
+
+SPEC = {"name": "season", "version": 2, "weights": {"kd": 0.3, "adr": 0.006}, "description": "Lighter on kills"}
+
+
+def test_config_formulas_register_on_first_use(tmp_path):
+    with open(rating_formulas.FORMULAS_PATH, 'w') as f:
+        json.dump({"formulas": [SPEC]}, f)
+    with open(rating_formulas.ACTIVE_PATH, 'w') as f:
+        json.dump({"season": "season@2"}, f)
+
+    assert rating_formulas.active("season").key == "season@2"
+    assert rating_formulas.get("season").weights == SPEC["weights"]
+    # Loading the same file again is a no-op
+    assert rating_formulas.register_from_config() == []
+
+
+def test_add_formula_persists_and_rejects_duplicates():
+    formula = rating_formulas.add_formula(SPEC)
+    assert rating_formulas.get("season@2") is formula
+    with open(rating_formulas.FORMULAS_PATH) as f:
+        assert [s["version"] for s in json.load(f)["formulas"]] == [2]
+    with pytest.raises(ValueError):
+        rating_formulas.add_formula(SPEC)
+    with pytest.raises(ValueError):
+        rating_formulas.add_formula({"name": "season", "version": 3, "weights": {"kills": 1}})
+
+
+def test_conflicting_config_definition_is_rejected():
+    with open(rating_formulas.FORMULAS_PATH, 'w') as f:
+        json.dump({"formulas": [dict(SPEC, version=1)]}, f)
+    with pytest.raises(ValueError):
+        rating_formulas.formulas()
+
+
+def test_backfill_keeps_ratings_python_rounded_at_half_way_points():
+    # ADR values on .xx5 ties, where np.round and round() disagree for most of them
+    adr = np.array([x / 1000 for x in range(5, 2000, 10)])
+    formula = rating_formulas.add_formula({"name": "adr_only", "version": 1, "weights": {"adr": 1.0}})
+    df = pd.DataFrame({"K/D": 0.0, "KPM": 0.0, "DPM": 0.0, "APM": 0.0, "ADR": adr,
+                       # what the scalar code stored: Python's round() per row
+                       "Rating": [round(v, 2) for v in adr.tolist()]})
+    assert (np.round(adr, 2) != df["Rating"].to_numpy()).sum() > 10
+
+    assert rating_formulas.backfill_table(df, formula) == 0
+    assert df["Rating"].tolist() == [round(v, 2) for v in adr.tolist()]
@@ -0,0 +1,25 @@
+import map_stats
+import seasons
+import synthetic_league
+from conftest import prefix_log
+
+
+def test_archived_season_reads_from_its_archive_once_pruned(league_root, log):
+    synthetic_league.write_match_folders(prefix_log(log, 10), str(league_root))
+    seasons.set_current_season("S5")
+    seasons.archive_season("S4", prune=True)
+
+    assert seasons.list_match_nums("S4") == []
+    assert len(seasons.load_match_log("S4")["m_num"]) == 10
+
+
+def test_current_season_never_falls_back_to_its_archive(league_root, log):
+    synthetic_league.write_match_folders(prefix_log(log, 10), str(league_root))
+    seasons.archive_season("S4", prune=True)
+    # S4 is still the live season: its (stale) archive is not its match log
+    assert seasons.get_current_season() == "S4"
+    assert seasons.load_match_log() is None
+    db_path = str(league_root / 'league.db')
+    map_stats.ensure_backfilled("S4", db_path)
+    with map_stats._connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM player_map_stats').fetchone() == (0,)
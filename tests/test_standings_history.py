@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import elo_replay
+import seasons
+import standings_history
+import synthetic_league
+from conftest import prefix_log
+
+
+def by_name(df):
+    return df.sort_values("Name").reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def history(log):
+    return standings_history.StandingsHistory(log, log["names"].tolist(), checkpoint_every=10)
+
+
+@pytest.mark.parametrize("position", [0, 1, 9, 10, 11, 37, 60])
+def test_table_at_equals_replay_of_the_prefix(log, history, position):
+    table, _ = history.table_at(position)
+    replayed = elo_replay.replay_log(prefix_log(log, position), log["names"].tolist(), use_recorded_gains=True)["table"]
+    pd.testing.assert_frame_equal(by_name(table), by_name(replayed))
+
+
+def test_cached_and_uncached_tables_agree(log, history):
+    first, _ = history.table_at(23)
+    fresh = standings_history.StandingsHistory(log, log["names"].tolist(), checkpoint_every=1, cache_size=0)
+    pd.testing.assert_frame_equal(by_name(first), by_name(fresh.table_at(23)[0]))
+    assert history.table_at(23)[0] is first
+
+
+def test_streaks_count_trailing_results(log, history):
+    _, streaks = history.table_at(len(log["m_num"]))
+    name = str(log["names"][log["l_player"][-1]])
+    won = log["l_team"][-1] == log["m_winner"][-1]
+    assert streaks[name]["type"] == ("win" if won else "loss")
+    assert streaks[name]["count"] >= 1
+
+
+def test_positions_for_match_and_date(log, history):
+    assert history.position_for_match(0) == 0
+    assert history.position_for_match(int(log["m_num"][-1])) == len(log["m_num"])
+    last_day = str(log["m_day"][-1])
+    assert history.position_for_date(last_day) == len(log["m_num"])
+    assert history.position_for_date("2000-01-01") == 0
+
+
+def test_extend_equals_a_full_build(league_root, log):
+    names = log["names"].tolist()
+    synthetic_league.write_match_folders(prefix_log(log, 23), str(league_root))
+    extended = standings_history.StandingsHistory(seasons.load_match_log("S4"), names, checkpoint_every=10)
+    early, _ = extended.table_at(23)
+    synthetic_league.write_match_folders(log, str(league_root))
+    nums = seasons.list_match_nums("S4")
+    extended.extend(seasons.pack_live_season("S4", nums[23:41]))
+    extended.extend(seasons.pack_live_season("S4", nums[41:]))
+
+    full = standings_history.StandingsHistory(seasons.load_match_log("S4"), names, checkpoint_every=10)
+    assert len(extended) == len(full) == len(log["m_num"])
+    assert len(extended._checkpoints) == len(full._checkpoints)
+    for position in (23, 30, 41, 60):
+        pd.testing.assert_frame_equal(extended.table_at(position)[0], full.table_at(position)[0])
+        assert extended.table_at(position)[1] == full.table_at(position)[1]
+    assert extended.table_at(23)[0] is early
+    assert extended.position_for_date(str(log["m_day"][-1])) == len(log["m_num"])
+
+
+def test_extend_rejects_matches_it_already_has(league_root, log):
+    synthetic_league.write_match_folders(prefix_log(log, 10), str(league_root))
+    history = standings_history.StandingsHistory(seasons.load_match_log("S4"), log["names"].tolist())
+    with pytest.raises(ValueError):
+        history.extend(seasons.pack_live_season("S4", seasons.list_match_nums("S4")[-1:]))
+    assert len(history) == 10
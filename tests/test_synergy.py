@@ -0,0 +1,23 @@
+"""Recording matches one by one equals a rebuild from the match log."""
+import numpy as np
+import pytest
+
+import synergy
+from conftest import match_lines, prefix_log
+
+SPLITS = [1, 30, 59]
+
+
+@pytest.mark.parametrize("n", SPLITS)
+def test_synergy_record_equals_rebuild(log, n):
+    matrix = synergy.SynergyMatrix()
+    matrix.rebuild(prefix_log(log, n))
+    for i in range(n, len(log["m_num"])):
+        names, *_, won, _ = match_lines(log, i)
+        matrix.record([p for p, w in zip(names, won) if w], [p for p, w in zip(names, won) if not w])
+
+    rebuilt = synergy.SynergyMatrix()
+    rebuilt.rebuild(log)
+    assert matrix.matches == rebuilt.matches
+    assert matrix.names == rebuilt.names
+    np.testing.assert_array_equal(matrix.data, rebuilt.data)
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+import rating_formulas
+
 csv_path = './vct_ss4.csv'
 # csv_path = './data/sample.csv'
 df = pd.read_csv(csv_path)
@@ -23,8 +25,7 @@ df["DPM"] = (df["TDeaths"] / df["Matches"]).round(2)
 df["APM"] = (df["TAssists"] / df["Matches"]).round(2)
 df["K/D"] = (df["TKills"] / df["TDeaths"]).round(2)
 df["ADR"] = (df["TADR"] / df["Matches"]).round(2)
-df["Rating"] = 0.28 * df["K/D"] + 0.02 * df["KPM"] + 0.006 * df["APM"] + 0.0058 * df["ADR"]
-df["Rating"] = df["Rating"].round(2)
+df["Rating"] = rating_formulas.season_ratings(df)
 df = df.fillna(0)
 df["ELO"] = df["ELO"].round().astype(int)
 df = df.sort_values('ELO', ascending=False)
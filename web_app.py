@@ -1,19 +1,71 @@
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import numpy as np
 from random import sample, choice
-from datetime import date
+from datetime import date, datetime
 import pandas as pd
 import os
 import base64
 import database as db
-import sqlite3
+import asset_pipeline
+import bulk_import
+import db_connection
+import elo_engine
+import elo_replay
+import elo_snapshots
+import export
+import journal
+import map_stats
+import metrics
+import ocr_pipeline
+import player_form
+import player_search
+import player_table
+import presence
+import rating_formulas
+import seasons
+import standings_history
+import synergy
+import win_prob
 import cv2
 import easyocr
 from PIL import Image
+import functools
 import io
+import json
+import mimetypes
 import re
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 
 app = Flask(__name__)
+# Request bodies (screenshot batches, match imports) larger than this get a 413 before they are read
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('FPS_MAX_UPLOAD_MB', 64)) * 1024 * 1024
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider with serialization time recorded per route"""
+
+    def dumps(self, obj, **kwargs):
+        with metrics.span("json"):
+            return super().dumps(obj, **kwargs)
+
+
+app.json = InstrumentedJSONProvider(app)
+
+
+@app.before_request
+def begin_request_metrics():
+    metrics.begin_request(request.url_rule.rule if request.url_rule else "unmatched")
+
+
+@app.teardown_request
+def end_request_metrics(exc):
+    metrics.end_request()
 
 # Fix for Pillow 10+ compatibility with EasyOCR
 # Pillow 10.0.0+ removed Image.ANTIALIAS, but EasyOCR still uses it
@@ -39,10 +91,32 @@ def init_ocr():
             OCR_AVAILABLE = False
     return OCR_AVAILABLE
 
+# Fingerprinted assets (content-hashed names, gzip variants, map thumbnails)
+try:
+    asset_manifest = asset_pipeline.build()
+except Exception as e:
+    print(f"Warning: asset build failed, serving original assets: {e}")
+    asset_manifest = asset_pipeline.load_manifest()
+asset_urls = asset_pipeline.asset_urls(asset_manifest)
+
 # Serve static assets
 @app.route('/assets/<path:filename>')
 def assets(filename):
-    return send_from_directory('assets', filename)
+    if not filename.startswith(asset_pipeline.BUILD_DIRNAME + '/'):
+        # Unversioned paths may change, so let browsers revalidate them
+        return send_from_directory('assets', filename, max_age=3600)
+    # Built files are named by content and never change
+    build_path = os.path.join('assets', filename)
+    use_gzip = (os.path.exists(build_path + '.gz')
+                and 'gzip' in request.headers.get('Accept-Encoding', ''))
+    response = send_from_directory('assets', filename + '.gz' if use_gzip else filename,
+                                   max_age=31536000, conditional=True)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response.headers['Cache-Control'] = asset_pipeline.IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 # Initialize database
 if not db.database_exists():
@@ -58,6 +132,12 @@ try:
 except Exception as e:
     print(f"Warning: Database migration failed: {e}")
 
+# WAL mode and pragmas on the pooled connections (WAL persists for the database module's own connections)
+try:
+    db_connection.configure(db.DB_PATH)
+except Exception as e:
+    print(f"Warning: could not configure SQLite connections: {e}")
+
 # Load initial data
 df = db.get_all_players()
 df = df.round(2)
@@ -67,8 +147,7 @@ df["DPM"] = (df["TDeaths"] / df["Matches"]).round(2)
 df["APM"] = (df["TAssists"] / df["Matches"]).round(2)
 df["K/D"] = (df["TKills"] / df["TDeaths"]).round(2)
 df["ADR"] = (df["TADR"] / df["Matches"]).round(2)
-df["Rating"] = 0.28 * df["K/D"] + 0.02 * df["KPM"] + 0.006 * df["APM"] + 0.0058 * df["ADR"]
-df["Rating"] = df["Rating"].round(2)
+df["Rating"] = rating_formulas.season_ratings(df)
 
 # Ensure new columns exist
 if "KPR" not in df.columns:
@@ -94,6 +173,52 @@ global_context = {
     "database_path": csv_path,
 }
 
+# Written next to metadata.json by submit_match; read by the revert endpoint
+MATCH_DELTA_FILENAME = 'delta.json'
+
+_player_table_cache = {"df": None, "table": None}
+
+def get_player_table():
+    """PlayerTable mirror of global_context["database"], rebuilt only when the DataFrame is replaced"""
+    df_current = global_context["database"]
+    if _player_table_cache["df"] is not df_current:
+        with metrics.span("pandas"):
+            _player_table_cache["table"] = player_table.PlayerTable.from_dataframe(df_current)
+        _player_table_cache["df"] = df_current
+    return _player_table_cache["table"]
+
+def set_player_table(table, df_current=None):
+    """Install an updated PlayerTable: global_context["database"] becomes its DataFrame, with no rebuild"""
+    if df_current is None:
+        with metrics.span("pandas"):
+            df_current = table.to_dataframe()
+    _player_table_cache["df"] = df_current
+    _player_table_cache["table"] = table
+    global_context["database"] = df_current
+    return df_current
+
+# Submits copy the player table, apply the match and install the copy, and take the next
+# match number from the folders on disk; Flask serves requests on threads, so every route
+# that replaces the table or allocates match numbers runs under this lock
+_submit_lock = threading.Lock()
+
+def serialized(route):
+    """Run a route under _submit_lock"""
+    @functools.wraps(route)
+    def wrapper(*args, **kwargs):
+        with _submit_lock:
+            return route(*args, **kwargs)
+    return wrapper
+
+player_search_index = player_search.PlayerSearchIndex()
+
+def get_player_search():
+    """Search index over the current roster, synced (added/removed names only) when the table is replaced"""
+    table = get_player_table()
+    if player_search_index.source is not table:
+        player_search_index.sync(table.names, source=table)
+    return player_search_index
+
 def get_rank(elo):
     """Determine rank based on ELO"""
     if elo < 900:
@@ -113,7 +238,7 @@ def get_rank_icon_base64(rank):
     """Get base64 encoded SVG icon for rank"""
     icon_path = f"assets/logos/{rank}.svg"
     try:
-        with open(icon_path, 'rb') as f:
+        with metrics.span("icon_encode"), open(icon_path, 'rb') as f:
             svg_data = f.read()
             b64_data = base64.b64encode(svg_data).decode('utf-8')
             return f"data:image/svg+xml;base64,{b64_data}"
@@ -128,13 +253,45 @@ def get_random_players(df):
     # return df.sample(n=n_selected, weights=1/(df["Matches"]+0.01))
     return df.sample(n=n_selected)
 
-def get_rating(kd, kpm, apm, dpm, adr):
-    return round(0.65*kd + 0.024*kpm + 0.016*apm - 0.025*dpm + 0.0035*adr, 2)
+# Players reported online by bots/server scripts (join/heartbeat/leave APIs).
+# Until anything reports, a random sample stands in, rotated by the hourly update.
+presence_registry = presence.PresenceRegistry()
+SAMPLED_PRESENCE_TTL = 2 * 60 * 60
+_presence_state = {"sampled": False, "reported": False}
+
+def get_online_players(df, rotate=False):
+    """(version, frozenset of online names) from the presence registry"""
+    version, online = presence_registry.snapshot()
+    if _presence_state["reported"]:
+        return version, online
+    if (not online and not df.empty) or (rotate and _presence_state["sampled"]):
+        presence_registry.clear()
+        presence_registry.join(get_random_players(df)["Name"].tolist(), ttl=SAMPLED_PRESENCE_TTL)
+        _presence_state["sampled"] = True
+        version, online = presence_registry.snapshot()
+    return version, online
+
+_db_read = {"raw": None, "df": None}
 
 def refresh_database_from_db():
-    """Refresh global database context from actual database - ensures deleted players are removed"""
-    df_current = db.get_all_players()
-    
+    """Refresh global database context from actual database - ensures deleted players are removed.
+
+    When the players rows are unchanged since the last read, the current
+    DataFrame (and the PlayerTable cached for it) is kept.
+    """
+    with metrics.span("db_read"):
+        df_raw = db.get_all_players()
+    if (_db_read["df"] is global_context["database"] and _db_read["raw"] is not None
+            and df_raw.equals(_db_read["raw"])):
+        return _db_read["df"]
+    with metrics.span("pandas"):
+        df_current = _recompute_player_table(df_raw)
+    _db_read["raw"] = df_raw
+    _db_read["df"] = df_current
+    return df_current
+
+def _recompute_player_table(df_current):
+    """Derived columns of a fresh players table, stored in the global context"""
     # Update global context with fresh data
     df_current = df_current.round(2)
     df_current["Matches"] = df_current["Wins"] + df_current["Losses"]
@@ -144,8 +301,7 @@ def refresh_database_from_db():
     df_current["APM"] = (df_current["TAssists"] / df_current["Matches"].replace(0, 1)).round(2)
     df_current["K/D"] = (df_current["TKills"] / df_current["TDeaths"].replace(0, 1)).round(2)
     df_current["ADR"] = (df_current["TADR"] / df_current["Matches"].replace(0, 1)).round(2)
-    df_current["Rating"] = 0.28 * df_current["K/D"] + 0.02 * df_current["KPM"] + 0.006 * df_current["APM"] + 0.0058 * df_current["ADR"]
-    df_current["Rating"] = df_current["Rating"].round(2)
+    df_current["Rating"] = rating_formulas.season_ratings(df_current)
     
     # Ensure new columns exist
     if "KPR" not in df_current.columns:
@@ -167,7 +323,27 @@ def refresh_database_from_db():
 
 def update_database_stats():
     """Update database statistics"""
-    df_source = global_context["database"]
+    with metrics.span("pandas"):
+        df_new = _recompute_stats(global_context["database"])
+    global_context["database"] = df_new
+    write_players(df_new)
+    return df_new
+
+def write_players(df_players):
+    """Bulk-write the players table, counted in the metrics"""
+    with metrics.span("db_write"):
+        db.bulk_update_from_dataframe(df_players)
+    metrics.inc("db_rows_written_total", len(df_players))
+
+def read_match_csv(path):
+    """Read one team CSV of a match folder, counted in the metrics"""
+    with metrics.span("csv_read"):
+        df_team = pd.read_csv(path)
+    metrics.inc("csv_files_read_total")
+    return df_team
+
+def _recompute_stats(df_source):
+    """Derived per-match columns of the in-memory players table"""
     df_new = df_source.round(2)
     df_new["Matches"] = df_source["Wins"] + df_source["Losses"]
     df_new["KPM"] = (df_source["TKills"] / df_new["Matches"]).round(2)
@@ -175,7 +351,7 @@ def update_database_stats():
     df_new["APM"] = (df_source["TAssists"] / df_new["Matches"]).round(2)
     df_new["K/D"] = (df_source["TKills"] / df_source["TDeaths"]).round(2)
     df_new["ADR"] = (df_source["TADR"] / df_new["Matches"]).round(2)
-    df_new["Rating"] = (0.28 * df_new["K/D"] + 0.02 * df_new["KPM"] + 0.006 * df_new["APM"] + 0.0058 * df_new["ADR"]).round(2)
+    df_new["Rating"] = rating_formulas.season_ratings(df_new)
     
     # Ensure new columns exist
     if "KPR" not in df_new.columns:
@@ -190,31 +366,292 @@ def update_database_stats():
     df_new = df_new.fillna(0)
     df_new = df_new.sort_values('ELO', ascending=False)
     df_new = df_new.round(2)
-    global_context["database"] = df_new
-    db.bulk_update_from_dataframe(df_new)
     return df_new
 
+elo_snapshot_writer = elo_snapshots.EloSnapshotWriter(
+    db.upsert_daily_elo_snapshots, lambda: db.ensure_initial_elo_baseline(default_elo=1000))
+
 def record_daily_elo_snapshots(df_current):
-    """Record one ELO snapshot per player for today (idempotent)."""
+    """Record one ELO snapshot per changed player for today (idempotent)."""
     try:
-        if df_current is None or df_current.empty:
-            return
-        # Ensure baseline exists before we start recording real snapshots
-        try:
-            db.ensure_initial_elo_baseline(default_elo=1000)
-        except Exception:
-            pass
-        player_elo_map = {str(r["Name"]): int(r["ELO"]) for _, r in df_current[["Name", "ELO"]].iterrows()}
-        db.upsert_daily_elo_snapshots(player_elo_map, day_str=date.today().isoformat())
+        elo_snapshot_writer.record(df_current)
     except Exception as e:
         print(f"Error recording ELO snapshots: {e}")
 
+win_model = win_prob.WinProbabilityModel()
+_win_model_state = {"loaded": False}
+
+def get_win_model():
+    """Win-probability model for the current season, loaded from cache or refitted from the match log"""
+    if _win_model_state["loaded"]:
+        return win_model
+    path = os.path.join(seasons.season_dir(), win_prob.MODEL_FILENAME)
+    try:
+        if os.path.exists(path) and win_model.load(path) == len(seasons.list_match_nums()):
+            _win_model_state["loaded"] = True
+            return win_model
+    except Exception as e:
+        print(f"Error loading win-probability model: {e}")
+    try:
+        log = seasons.load_match_log()
+        if log is not None and len(log["m_num"]):
+            replay = elo_replay.replay_log(log, use_recorded_gains=True)
+            win_model.fit_from_log(log, replay["team_elo"])
+            os.makedirs(seasons.season_dir(), exist_ok=True)
+            win_model.save(path)
+        else:
+            win_model.reset()
+    except Exception as e:
+        print(f"Error fitting win-probability model: {e}")
+    _win_model_state["loaded"] = True
+    return win_model
+
+def save_win_model():
+    try:
+        os.makedirs(seasons.season_dir(), exist_ok=True)
+        win_model.save(os.path.join(seasons.season_dir(), win_prob.MODEL_FILENAME))
+    except Exception as e:
+        print(f"Error saving win-probability model: {e}")
+
+player_form_tracker = player_form.FormTracker()
+_player_form_state = {"loaded": False}
+
+def get_player_form():
+    """Rolling form tracker for the current season, loaded from cache or rebuilt from the match log"""
+    if _player_form_state["loaded"]:
+        return player_form_tracker
+    path = os.path.join(seasons.season_dir(), player_form.FORM_FILENAME)
+    try:
+        if os.path.exists(path) and player_form_tracker.load(path) == len(seasons.list_match_nums()):
+            _player_form_state["loaded"] = True
+            return player_form_tracker
+    except Exception as e:
+        print(f"Error loading player form: {e}")
+    try:
+        player_form_tracker.rebuild(seasons.load_match_log())
+        os.makedirs(seasons.season_dir(), exist_ok=True)
+        player_form_tracker.save(path)
+    except Exception as e:
+        print(f"Error rebuilding player form: {e}")
+    _player_form_state["loaded"] = True
+    return player_form_tracker
+
+def save_player_form():
+    try:
+        os.makedirs(seasons.season_dir(), exist_ok=True)
+        player_form_tracker.save(os.path.join(seasons.season_dir(), player_form.FORM_FILENAME))
+    except Exception as e:
+        print(f"Error saving player form: {e}")
+
+synergy_matrix = synergy.SynergyMatrix()
+_synergy_state = {"loaded": False}
+
+def get_synergy():
+    """Teammate/head-to-head matrices for the current season, mapped from disk or rebuilt from the match log"""
+    if _synergy_state["loaded"]:
+        return synergy_matrix
+    os.makedirs(seasons.season_dir(), exist_ok=True)
+    synergy_matrix.path = os.path.join(seasons.season_dir(), synergy.SYNERGY_FILENAME)
+    try:
+        if os.path.exists(synergy_matrix.meta_path) and synergy_matrix.load() == len(seasons.list_match_nums()):
+            _synergy_state["loaded"] = True
+            return synergy_matrix
+    except Exception as e:
+        print(f"Error loading synergy matrices: {e}")
+    try:
+        synergy_matrix.rebuild(seasons.load_match_log())
+    except Exception as e:
+        print(f"Error rebuilding synergy matrices: {e}")
+    _synergy_state["loaded"] = True
+    return synergy_matrix
+
+_map_stats_state = {"checked": False}
+
+def ensure_map_stats():
+    """Backfill per-player map stats once per process (or after an import/reset) when stale"""
+    if _map_stats_state["checked"]:
+        return
+    try:
+        map_stats.ensure_backfilled()
+    except Exception as e:
+        print(f"Error backfilling player map stats: {e}")
+    _map_stats_state["checked"] = True
+
+event_journal = journal.Journal()
+
+def journal_event(kind, data):
+    """Durably journal a state change before it is applied; returns its seq"""
+    with metrics.span("journal"):
+        return event_journal.append(kind, data)
+
+def maybe_snapshot_journal(seq=None, force=False):
+    """Snapshot the players table every journal.SNAPSHOT_EVERY events (or now when forced)"""
+    if not (force or event_journal.snapshot_due()):
+        return
+    try:
+        with metrics.span("journal"):
+            event_journal.save_snapshot(global_context["database"], seq)
+    except Exception as e:
+        print(f"Error writing journal snapshot: {e}")
+
+@contextmanager
+def journaled_rebuild(data):
+    """Journal a rebuild right before its database writes, then snapshot.
+
+    Rebuild events cannot be replayed, so the snapshot is forced whether
+    the writes succeed or not (after a failure, from the database as it
+    then stands); otherwise the event would stay in the journal tail and
+    block recovery until the next snapshot.
+    """
+    seq = journal_event("rebuild", data)
+    try:
+        yield seq
+    except Exception:
+        try:
+            refresh_database_from_db()
+        except Exception as e:
+            print(f"Error reloading players after a failed rebuild: {e}")
+        raise
+    finally:
+        maybe_snapshot_journal(seq, force=True)
+
+def season_key_error(season):
+    """400 response for a malformed season key (keys become folder names), else None"""
+    try:
+        seasons.validate_season(season)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return None
+
+def write_match_folder(match_path, team_1_rows, team_2_rows, metadata, delta):
+    """Team CSVs, metadata.json and delta.json of one match"""
+    os.makedirs(match_path, exist_ok=True)
+    pd.DataFrame(team_1_rows).to_csv(f'{match_path}/t1.csv', index=False)
+    pd.DataFrame(team_2_rows).to_csv(f'{match_path}/t2.csv', index=False)
+    with open(f'{match_path}/metadata.json', 'w') as f:
+        json.dump(metadata, f)
+    with open(os.path.join(match_path, MATCH_DELTA_FILENAME), 'w') as f:
+        json.dump(delta, f)
+
+def _delete_match_records(conn, match_num, map_name, total_rounds):
+    """Remove a match from the matches/map_stats tables when they have the expected columns (no commit)"""
+    if "match_num" in _table_columns(conn, "matches"):
+        conn.execute('DELETE FROM matches WHERE match_num = ?', (match_num,))
+    if {"map_name", "num_games", "total_rounds"} <= _table_columns(conn, "map_stats"):
+        conn.execute(
+            'UPDATE map_stats SET num_games = MAX(num_games - 1, 0), '
+            'total_rounds = MAX(total_rounds - ?, 0) WHERE map_name = ?',
+            (int(total_rounds), map_name))
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+def _restore_match_files(tail):
+    """Redo the folder and match-record writes of journaled matches (and reverts) a crash cut short"""
+    final = {}
+    for event in tail:
+        if event["type"] == "match":
+            delta = event["data"]["delta"]
+            final[(delta["season"], delta["match_num"])] = event
+        elif event["type"] == "revert":
+            final[(event["data"]["season"], event["data"]["match_num"])] = event
+    for (season, match_num), event in final.items():
+        match_path = seasons.match_dir(match_num, season)
+        delta_path = os.path.join(match_path, MATCH_DELTA_FILENAME)
+        if event["type"] == "match":
+            data = event["data"]
+            if not os.path.exists(delta_path):
+                print(f"Journal: restoring match folder {match_path}")
+                write_match_folder(match_path, data["team_1_result"], data["team_2_result"],
+                                   data["metadata"], data["delta"])
+            if season == seasons.get_current_season() and not db.get_match(match_num):
+                teams = data["metadata"]
+                db.create_match_record(
+                    match_num=match_num,
+                    team1_players=[row["Name"] for row in data["team_1_result"]],
+                    team2_players=[row["Name"] for row in data["team_2_result"]],
+                    team1_score=teams["team1_score"],
+                    team2_score=teams["team2_score"],
+                    winning_team=teams["winning_team"],
+                    map_name=teams["map"],
+                    total_rounds=data["delta"]["total_rounds"]
+                )
+                db.update_map_stats(teams["map"], data["delta"]["total_rounds"], match_num)
+        elif os.path.exists(delta_path):
+            with open(delta_path, 'r') as f:
+                if json.load(f).get("created_at") != event["data"].get("created_at"):
+                    continue
+            if season == seasons.get_current_season() and db.get_match(match_num):
+                with db_connection.transaction(db.DB_PATH) as conn:
+                    _delete_match_records(conn, match_num, event["data"]["map"], event["data"]["total_rounds"])
+            print(f"Journal: finishing revert of {match_path}")
+            os.replace(match_path, os.path.join(seasons.season_dir(season), f'reverted_match_{match_num}_{int(time.time())}'))
+    _map_stats_state["checked"] = False
+
+def recover_from_journal(df_db):
+    """Players table from the newest journal snapshot plus its tail.
+
+    Players the tail touched take the journal's values wherever the
+    database disagrees (a crash between the journal write and the database
+    write); other rows keep the database values. Missing match folders and
+    records are rewritten, then a fresh snapshot is taken so the next start
+    has no tail to replay.
+    """
+    # Every write is journaled first, so running without the journal is not an option
+    try:
+        event_journal.open()
+    except Exception as e:
+        raise RuntimeError(f"Could not open the event journal in {event_journal.directory}: {e}") from e
+    try:
+        # Replay through the same derived-column pass (and rounding) submit_match applies
+        recovered, tail = event_journal.recover(player_table.PlayerTable.derive)
+    except Exception as e:
+        print(f"Error reading journal: {e}")
+        return df_db
+    df_current = df_db
+    if recovered is not None and tail:
+        touched = set()
+        for event in tail:
+            names = journal.touched_names(event)
+            touched = set(recovered.names) if names is None else touched | names
+        table = player_table.PlayerTable.from_dataframe(df_db)
+        repaired = []
+        for name in touched:
+            if name not in table or name not in recovered:
+                continue
+            i, j = table.index[name], recovered.index[name]
+            differs = table.history[i] != recovered.history[j]
+            for col in player_table.INT_COLUMNS + player_table.ROUND_COLUMNS:
+                differs = differs or bool(table[col][i] != recovered[col][j])
+            if differs:
+                for col in player_table.INT_COLUMNS + player_table.ROUND_COLUMNS:
+                    table[col][i] = recovered[col][j]
+                table.history[i] = recovered.history[j]
+                repaired.append(name)
+        if repaired:
+            print(f"Journal: repaired {len(repaired)} players from {len(tail)} journaled events")
+            df_current = table.derive().sort_by_elo().to_dataframe()
+            write_players(df_current)
+    try:
+        if tail:
+            _restore_match_files(tail)
+    except Exception as e:
+        print(f"Error restoring journaled matches: {e}")
+    try:
+        if tail or not event_journal.latest_snapshot_seq():
+            event_journal.save_snapshot(df_current)
+    except Exception as e:
+        print(f"Error writing journal snapshot: {e}")
+    return df_current
+
+global_context["database"] = recover_from_journal(global_context["database"])
+
 @app.route('/', methods=['GET'])
 def index():
     """Main page"""
     # Always fetch fresh data from database to ensure deleted players are not shown
     df_current = refresh_database_from_db()
-    online_df = get_random_players(df_current)
+    _, online_players = get_online_players(df_current)
     top_3 = df_current.head(3)
     
     # Add rank icons to top 3
@@ -229,7 +666,8 @@ def index():
         })
     return render_template('index.html', 
                          top_3=top_3_list,
-                         online_players=online_df["Name"].tolist())
+                         online_players=sorted(online_players),
+                         asset_urls=asset_urls)
 
 @app.route('/', methods=['POST'])
 def index_post():
@@ -238,39 +676,65 @@ def index_post():
     return '', 200
 
 @app.route('/api/reset-database', methods=['POST'])
+@serialized
 def reset_database():
-    """Reset all player stats to default values"""
+    """Reset all player stats to default values.
+
+    Optional JSON body: {"archive": true, "next_season": "S5"} packs the
+    current season (matches + final standings) into its archive before the
+    wipe and starts recording new matches under next_season. Archiving
+    requires next_season: the archived key must stop being the live season.
+    """
     try:
-        conn = sqlite3.connect(db.DB_PATH)
-        cursor = conn.cursor()
-        
+        options = request.get_json(silent=True) or {}
+        if options.get("next_season"):
+            error = season_key_error(options["next_season"])
+            if error:
+                return error
+            next_season = str(options["next_season"])
+            if next_season == seasons.get_current_season() or any(
+                    s["season"] == next_season and s["archived"] for s in seasons.list_seasons()):
+                return jsonify({"success": False,
+                                "error": f"next_season {next_season} is the current or an archived season"}), 400
+        if options.get("archive") and not options.get("next_season"):
+            return jsonify({"success": False, "error": "archive requires next_season"}), 400
+        journal_seq = journal_event("reset", {"season": seasons.get_current_season(), "options": options})
+        archived = None
+        if options.get("archive"):
+            finished_season = seasons.get_current_season()
+            archived = seasons.archive_season(
+                finished_season,
+                standings_df=db.get_all_players(),
+                prune=bool(options.get("prune", False)),
+            )
+        if options.get("next_season"):
+            seasons.set_current_season(str(options["next_season"]))
+
         # Reset all player stats to default values
-        cursor.execute('''
-            UPDATE players 
-            SET 
-                Wins = 0,
-                Losses = 0,
-                TKills = 0,
-                TDeaths = 0,
-                TAssists = 0,
-                TADR = 0,
-                MVP = 0,
-                Matches = 0,
-                KPM = 0.0,
-                DPM = 0.0,
-                APM = 0.0,
-                "K/D" = 0.0,
-                ADR = 0.0,
-                Rating = 0.0,
-                ELO = 1000,
-                KPR = 0.0,
-                DPR = 0.0,
-                APR = 0.0,
-                MatchHistory = ''
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with db_connection.transaction(db.DB_PATH) as conn:
+            conn.execute('''
+                UPDATE players 
+                SET 
+                    Wins = 0,
+                    Losses = 0,
+                    TKills = 0,
+                    TDeaths = 0,
+                    TAssists = 0,
+                    TADR = 0,
+                    MVP = 0,
+                    Matches = 0,
+                    KPM = 0.0,
+                    DPM = 0.0,
+                    APM = 0.0,
+                    "K/D" = 0.0,
+                    ADR = 0.0,
+                    Rating = 0.0,
+                    ELO = 1000,
+                    KPR = 0.0,
+                    DPR = 0.0,
+                    APR = 0.0,
+                    MatchHistory = ''
+            ''')
         
         # Reload database
         df = db.get_all_players()
@@ -282,8 +746,7 @@ def reset_database():
         df["APM"] = (df["TAssists"] / df["Matches"].replace(0, 1)).round(2)
         df["K/D"] = (df["TKills"] / df["TDeaths"].replace(0, 1)).round(2)
         df["ADR"] = (df["TADR"] / df["Matches"].replace(0, 1)).round(2)
-        df["Rating"] = 0.28 * df["K/D"] + 0.02 * df["KPM"] + 0.006 * df["APM"] + 0.0058 * df["ADR"]
-        df["Rating"] = df["Rating"].round(2)
+        df["Rating"] = rating_formulas.season_ratings(df)
         # Set to 0 where matches are 0
         df.loc[df["Matches"] == 0, ["KPM", "DPM", "APM", "ADR"]] = 0.0
         
@@ -300,10 +763,17 @@ def reset_database():
         df["ELO"] = df["ELO"].round().astype(int)
         df = df.sort_values('ELO', ascending=False)
         global_context["database"] = df
+        _win_model_state["loaded"] = False
+        _player_form_state["loaded"] = False
+        _synergy_state["loaded"] = False
+        _map_stats_state["checked"] = False
+        maybe_snapshot_journal(journal_seq, force=True)
         
         return jsonify({
             "success": True,
-            "message": "Database reset successfully. All stats set to 0, ELO to 1000, and match history cleared."
+            "message": "Database reset successfully. All stats set to 0, ELO to 1000, and match history cleared.",
+            "season": seasons.get_current_season(),
+            "archived": archived
         })
     except Exception as e:
         return jsonify({
@@ -336,7 +806,7 @@ def calculate_streak(player_name):
     streak_count = 0
     
     for match_id in match_ids:
-        match_path = f'./match_history/S4/{match_id}'
+        match_path = seasons.match_dir(match_id)
         if not os.path.exists(match_path):
             continue
         
@@ -359,7 +829,7 @@ def calculate_streak(player_name):
         player_team = None
         if os.path.exists(t1_path):
             try:
-                t1_df = pd.read_csv(t1_path)
+                t1_df = read_match_csv(t1_path)
                 if player_name in t1_df["Name"].values:
                     player_team = "Team 1"
             except:
@@ -367,7 +837,7 @@ def calculate_streak(player_name):
         
         if player_team is None and os.path.exists(t2_path):
             try:
-                t2_df = pd.read_csv(t2_path)
+                t2_df = read_match_csv(t2_path)
                 if player_name in t2_df["Name"].values:
                     player_team = "Team 2"
             except:
@@ -395,39 +865,111 @@ def calculate_streak(player_name):
     
     return {"type": streak_type, "count": streak_count}
 
+LEADERBOARD_FIELDS = {
+    "name": ("Name", None),
+    "elo": ("ELO", None),
+    "rating": ("Rating", 2),
+    "matches": ("Matches", None),
+    "wins": ("Wins", None),
+    "losses": ("Losses", None),
+    "kd": ("K/D", 2),
+    "kpr": ("KPR", 3),
+    "dpr": ("DPR", 3),
+    "apr": ("APR", 3),
+    "adr": ("ADR", 2),
+}
+
+_standings_history_state = {"history": None, "key": None, "match_nums": []}
+_standings_history_lock = threading.Lock()
+
+def get_standings_history():
+    """Checkpointed replay of the current season.
+
+    New match folders extend the history by their matches alone; it is
+    rebuilt from the whole log only when the season, roster or match
+    formula change, or when matches were reverted or renumbered.
+    """
+    season = seasons.get_current_season()
+    key = (season, len(global_context["database"]), rating_formulas.active("match").key)
+    match_nums = seasons.list_match_nums(season)
+    with _standings_history_lock:
+        state = _standings_history_state
+        history, known = state["history"], state["match_nums"]
+        if state["key"] == key and match_nums == known:
+            return history
+        if (state["key"] == key and history is not None and len(match_nums) > len(known)
+                and match_nums[:len(known)] == known):
+            try:
+                with metrics.span("replay"):
+                    history.extend(seasons.pack_live_season(season, match_nums[len(known):]))
+                state["match_nums"] = match_nums
+                return history
+            except ValueError:
+                pass
+        log = seasons.load_match_log(season)
+        with metrics.span("replay"):
+            state["history"] = standings_history.StandingsHistory(
+                log, global_context["database"]["Name"].astype(str).tolist()) if log is not None else None
+        state["key"], state["match_nums"] = key, match_nums
+        return state["history"]
+
+def historical_standings(as_of_match=None, as_of_date=None):
+    """(players DataFrame, streaks, as-of info) after match as_of_match or at the end of day as_of_date"""
+    history = get_standings_history()
+    if history is None:
+        raise ValueError("No match log for the current season")
+    if as_of_date:
+        try:
+            day = datetime.strptime(as_of_date, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            raise ValueError("as_of_date must be YYYY-MM-DD")
+        position = history.position_for_date(day)
+    else:
+        position = history.position_for_match(as_of_match)
+    with metrics.span("replay"):
+        df_history, streaks = history.table_at(position)
+    return df_history, streaks, history.describe(position)
+
 @app.route('/api/database')
 def get_database():
-    """Get all players from database - always fetch fresh from database"""
-    # Always fetch fresh data from database to ensure deleted players are not shown
-    df_current = refresh_database_from_db()
+    """Get all players from database - always fetch fresh from database.
+
+    ?as_of_match=N or ?as_of_date=YYYY-MM-DD returns the table as it stood
+    after that match or day instead (replayed from the match log).
+    """
+    as_of_match = request.args.get('as_of_match', type=int)
+    as_of_date = request.args.get('as_of_date')
+    as_of = None
+    if as_of_match is not None or as_of_date:
+        try:
+            df_history, streaks, as_of = historical_standings(as_of_match, as_of_date)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        table = player_table.PlayerTable.from_dataframe(df_history)
+        df_current = global_context["database"]
+    else:
+        # Always fetch fresh data from database to ensure deleted players are not shown
+        df_current = refresh_database_from_db()
+        table = get_player_table()
+        streaks = None
     
     # Get current online players
-    online_df = get_random_players(df_current)
-    online_players_set = set(online_df["Name"].tolist())
-    
-    players = []
-    for i, (_, row) in enumerate(df_current.iterrows()):
-        rank = get_rank(row["ELO"])
-        icon_data = get_rank_icon_base64(rank)
-        streak = calculate_streak(row["Name"])
-        players.append({
-            "name": row["Name"],
-            "elo": int(row["ELO"]),
-            "elo_rank": int(i + 1),
-            "rating": round(row["Rating"], 2),
-            "matches": int(row["Matches"]),
-            "wins": int(row["Wins"]),
-            "losses": int(row["Losses"]),
-            "kd": round(row["K/D"], 2),
-            "kpr": round(row.get("KPR", 0.0), 3),
-            "dpr": round(row.get("DPR", 0.0), 3),
-            "apr": round(row.get("APR", 0.0), 3),
-            "adr": round(row["ADR"], 2),
+    _, online_players_set = get_online_players(df_current)
+    
+    players = table.json_rows(LEADERBOARD_FIELDS)
+    icons = {}
+    for i, player in enumerate(players):
+        rank = get_rank(player["elo"])
+        if rank not in icons:
+            icons[rank] = get_rank_icon_base64(rank)
+        streak = streaks[player["name"]] if streaks is not None else calculate_streak(player["name"])
+        player.update({
+            "elo_rank": i + 1,
             "rank": rank,
-            "rank_icon": icon_data,
+            "rank_icon": icons[rank],
             "streak_type": streak["type"],
             "streak_count": streak["count"],
-            "is_online": row["Name"] in online_players_set
+            "is_online": player["name"] in online_players_set
         })
     
     # Identify top 5 and worst 5 players for each stat with their ranks
@@ -507,7 +1049,13 @@ def get_database():
         player['is_kpr_cold_leader'] = 2 <= player['worst5_kpr_rank'] <= 5
         player['is_apr_cold_leader'] = 2 <= player['worst5_apr_rank'] <= 5
         player['is_adr_cold_leader'] = 2 <= player['worst5_adr_rank'] <= 5
-    return jsonify(players)
+    response = jsonify(players)
+    if as_of is not None:
+        # The body stays a plain player list; the point in time travels in headers
+        response.headers['X-As-Of-Matches'] = str(as_of["matches"])
+        response.headers['X-As-Of-Match'] = '' if as_of["match_num"] is None else str(as_of["match_num"])
+        response.headers['X-As-Of-Day'] = as_of["day"] or ''
+    return response
 
 def _compute_global_leader_names(df_current):
     """Compute global top 5 and worst 5 ranks for selected stats from current DB snapshot."""
@@ -564,13 +1112,23 @@ def _compute_global_leader_names(df_current):
 def create_match():
     """Create a new match with balanced teams"""
     data = request.json
-    online_list = data.get('online_players', [])
+    # Fall back to the presence registry when the caller doesn't send a lobby
+    online_list = data.get('online_players') or sorted(get_online_players(global_context["database"])[1])
     
     if len(online_list) < 10:
         return jsonify({"error": "Not enough online players"}), 400
     
     df_current = global_context["database"]
+    table = get_player_table()
+    elo = table["ELO"]
     leaders = _compute_global_leader_names(df_current)
+    # Optional balancing term: ELO points per unit of team synergy difference
+    synergy_weight = float(data.get('synergy_weight', 0) or 0)
+    matrix = get_synergy() if synergy_weight > 0 else None
+    # ... and per unit of recent-form difference (player_form.strength of the form features)
+    form_weight = float(data.get('form_weight', 0) or 0)
+    strength = dict(zip(online_list, player_form.strength(get_player_form().features(online_list)).tolist())) \
+        if form_weight > 0 else None
     
     # Generate 10 different team combinations
     combinations = []
@@ -579,23 +1137,25 @@ def create_match():
         remaining_players = [p for p in online_list if p not in team_1_names]
         team_2_names = sample(remaining_players, 5) if len(remaining_players) >= 5 else remaining_players
         
-        df_1 = df_current.loc[df_current['Name'].isin(team_1_names)]
-        df_2 = df_current.loc[df_current['Name'].isin(team_2_names)]
-        
-        ELO_1 = df_1["ELO"].sum()
-        ELO_2 = df_2["ELO"].sum()
+        ELO_1 = int(elo[table.indices(team_1_names)].sum())
+        ELO_2 = int(elo[table.indices(team_2_names)].sum())
         elo_diff = abs(ELO_1 - ELO_2)
+        synergy_diff = matrix.team_synergy(team_1_names) - matrix.team_synergy(team_2_names) if matrix else 0.0
+        form_diff = sum(strength[n] for n in team_1_names) - sum(strength[n] for n in team_2_names) if strength else 0.0
         
         combinations.append({
             'team_1_names': team_1_names,
             'team_2_names': team_2_names,
             'elo_diff': elo_diff,
+            'synergy_diff': synergy_diff,
+            'form_diff': form_diff,
+            'cost': elo_diff + synergy_weight * abs(synergy_diff) + form_weight * abs(form_diff),
             'elo_1': ELO_1,
             'elo_2': ELO_2
         })
     
-    # Sort by ELO difference (lowest first) and get top 3
-    combinations.sort(key=lambda x: x['elo_diff'])
+    # Sort by ELO difference plus the synergy and form terms (lowest first) and get top 3
+    combinations.sort(key=lambda x: x['cost'])
     top_5_combinations = combinations[:5]
     
     # Randomly select one from the top 3
@@ -608,26 +1168,26 @@ def create_match():
     team_1_names = team_1_names[:5]
     team_2_names = team_2_names[:5]
     
-    df_1 = df_current.loc[df_current['Name'].isin(team_1_names)]
-    df_2 = df_current.loc[df_current['Name'].isin(team_2_names)]
-    
-    # Ensure we only get exactly 5 players (in case of duplicates in database)
-    if len(df_1) > 5:
-        df_1 = df_1.head(5)
-    if len(df_2) > 5:
-        df_2 = df_2.head(5)
+    # Rows in table (ELO) order, at most 5 per team
+    rows_1 = table.indices(team_1_names, sort=True)[:5]
+    rows_2 = table.indices(team_2_names, sort=True)[:5]
     
     ELO_1 = selected['elo_1']
     ELO_2 = selected['elo_2']
     
     map_name = np.random.choice(['Dust2', 'Inferno', 'Mirage', 'Vertigo', 'Anubis', 'Ancient', 'Train', 'Nuke'])
     elo_diff = ELO_1 - ELO_2
-    t1_gain = 25 - min(25, (ELO_1 - ELO_2) // 50)
-    t2_gain = 25 + min(25, (ELO_1 - ELO_2) // 50)
+    # Expected outcome drives the gains once the model has seen enough matches
+    model = get_win_model()
+    t1_win_prob = model.predict(model.team_features(df_current, team_1_names, team_2_names))
+    if model.ready:
+        t1_gain, t2_gain = elo_engine.probability_gains(t1_win_prob)
+    else:
+        t1_gain, t2_gain = elo_engine.team_gains(ELO_1, ELO_2)
     
-    # Get all players sorted by ELO to calculate ranks
-    df_all_sorted = df_current.sort_values('ELO', ascending=False).reset_index(drop=True)
-    player_ranks = {name: idx + 1 for idx, name in enumerate(df_all_sorted["Name"])}
+    # Position of every player in the ELO standings
+    elo_ranks = table.elo_ranks()
+    form = get_player_form()
     
     # Helper function to get badge flags for a player
     def get_badge_flags(player_name):
@@ -646,41 +1206,27 @@ def create_match():
         return flags
     
     # Format teams
-    team_1 = []
-    for _, row in df_1.iterrows():
-        rank = get_rank(row["ELO"])
-        icon_data = get_rank_icon_base64(rank)
-        streak = calculate_streak(row["Name"])
-        player_rank = player_ranks.get(row["Name"], 0)
-        badge_flags = get_badge_flags(row["Name"])
-        team_1.append({
-            "name": row["Name"],
-            "rank_icon": icon_data,
-            "kd": round(row["K/D"], 2),
-            "elo": int(row["ELO"]),
-            "streak_type": streak["type"],
-            "streak_count": streak["count"],
-            "rank": player_rank,
-            **badge_flags
-        })
+    def format_team(rows):
+        team = []
+        for player in table.rows(rows):
+            rank = get_rank(player["ELO"])
+            icon_data = get_rank_icon_base64(rank)
+            streak = calculate_streak(player["Name"])
+            team.append({
+                "name": player["Name"],
+                "rank_icon": icon_data,
+                "kd": round(player["K/D"], 2),
+                "elo": player["ELO"],
+                "streak_type": streak["type"],
+                "streak_count": streak["count"],
+                "rank": int(elo_ranks[player.index]),
+                "form": round(form.form([player["Name"]])[0], 3),
+                **get_badge_flags(player["Name"])
+            })
+        return team
     
-    team_2 = []
-    for _, row in df_2.iterrows():
-        rank = get_rank(row["ELO"])
-        icon_data = get_rank_icon_base64(rank)
-        streak = calculate_streak(row["Name"])
-        player_rank = player_ranks.get(row["Name"], 0)
-        badge_flags = get_badge_flags(row["Name"])
-        team_2.append({
-            "name": row["Name"],
-            "rank_icon": icon_data,
-            "kd": round(row["K/D"], 2),
-            "elo": int(row["ELO"]),
-            "streak_type": streak["type"],
-            "streak_count": streak["count"],
-            "rank": player_rank,
-            **badge_flags
-        })
+    team_1 = format_team(rows_1)
+    team_2 = format_team(rows_2)
     
     # Generate command
     command = "bot_kick\n"
@@ -695,6 +1241,12 @@ def create_match():
         "elo_diff": int(elo_diff),
         "t1_gain": int(t1_gain),
         "t2_gain": int(t2_gain),
+        "t1_win_prob": round(t1_win_prob, 3),
+        "t2_win_prob": round(1 - t1_win_prob, 3),
+        "t1_form": round(float(np.mean(form.form(team_1_names))), 3),
+        "t2_form": round(float(np.mean(form.form(team_2_names))), 3),
+        "synergy_diff": round(selected['synergy_diff'], 3),
+        "form_diff": round(selected['form_diff'], 3),
         "command": command
     })
 
@@ -744,21 +1296,22 @@ def get_records():
                 return cand
             return cand if cand["value"] < curr["value"] else curr
 
+        season_formula = rating_formulas.active("season")
         for m in matches:
             match_num = m.get("match_num")
             total_rounds = int(m.get("total_rounds") or 0)
             if not match_num or total_rounds <= 0:
                 continue
 
-            match_path = f'./match_history/S4/match_{match_num}'
+            match_path = seasons.match_dir(match_num)
             t1_path = f'{match_path}/t1.csv'
             t2_path = f'{match_path}/t2.csv'
             if not (os.path.exists(t1_path) and os.path.exists(t2_path)):
                 continue
 
             try:
-                t1_df = pd.read_csv(t1_path)
-                t2_df = pd.read_csv(t2_path)
+                t1_df = read_match_csv(t1_path)
+                t2_df = read_match_csv(t2_path)
                 all_df = pd.concat([t1_df, t2_df], ignore_index=True)
             except Exception:
                 continue
@@ -773,10 +1326,9 @@ def get_records():
                 a = int(row.get("A", 0) or 0)
                 adr = float(row.get("ADR", 0.0) or 0.0)
 
-                kd = (k / (d or 1))
                 kpr = (k / total_rounds)
-                # Single-match "rating" aligned to existing season formula (per-match KPM==K, APM==A)
-                rating = 0.28 * kd + 0.02 * k + 0.006 * a + 0.0058 * adr
+                # Single-match "rating" from the active season formula (per-match KPM==K, APM==A)
+                rating = float(season_formula.evaluate(rating_formulas.line_features(k, d, a, adr), rounded=False))
 
                 base = {
                     "player": name,
@@ -813,6 +1365,7 @@ def get_records():
         return jsonify({"success": False, "error": str(e), "records": {}})
 
 @app.route('/api/submit-match', methods=['POST'])
+@serialized
 def submit_match():
     """Submit match results and update database"""
     data = request.json
@@ -831,8 +1384,12 @@ def submit_match():
     df_current = global_context["database"]
     players_1 = result_1["Name"].tolist()
     players_2 = result_2["Name"].tolist()
-    average_elo = (df_current.loc[df_current["Name"].isin(players_1)]["ELO"].sum() + 
-                   df_current.loc[df_current["Name"].isin(players_2)]["ELO"].sum()) // 10
+    
+    # Every player must be on the roster: an unknown name has no ELO for the lobby average
+    table = get_player_table()
+    unknown = [str(n) for n in players_1 + players_2 if n not in table]
+    if unknown:
+        return jsonify({"success": False, "error": f"Unknown players: {', '.join(unknown)}"}), 400
     
     # Determine which team won and which ELO gain to use
     if win_team == "Team 1":
@@ -847,27 +1404,83 @@ def submit_match():
         losing_players = players_1
         losing_result = result_1
         elo_gain = t2_gain
-    
-    # Save match history first to get the path
-    os.makedirs('./match_history/S4', exist_ok=True)
-    match_dirs = [d for d in os.listdir('./match_history/S4') if os.path.isdir(f'./match_history/S4/{d}')]
-    match_num = len(match_dirs) + 1
-    match_path = f'./match_history/S4/match_{match_num}'
-    os.makedirs(match_path, exist_ok=True)
-    result_1.to_csv(f'{match_path}/t1.csv', index=False)
-    result_2.to_csv(f'{match_path}/t2.csv', index=False)
-    
-    # Save match metadata (winning team, scores, map)
+    # For losing team, use the opposite team's gain value for loss calculation
+    losing_elo_gain = t2_gain if win_team == "Team 1" else t1_gain
+    
+    # Pre-match features for the win-probability refit
+    model = get_win_model()
+    match_features = model.team_features(df_current, players_1, players_2)
+    
+    # Caches rebuilt from the match log must load before this match's folder is written,
+    # or the rebuild would include the match and record() would count it twice
+    form = get_player_form()
+    synergies = get_synergy()
+    ensure_map_stats()
+    
+    # ELO changes for all ten players at once, from their pre-match ELO
+    lineup = pd.concat([winning_result, losing_result], ignore_index=True)
+    table = table.copy()
+    lineup_elo = np.array([table.row(n)["ELO"] for n in lineup["Name"]])
+    lineup_stats = {col: pd.to_numeric(lineup[col]).astype(int) for col in ["K", "D", "A", "ADR", "MVP"]}
+    elo_deltas = dict(zip(lineup["Name"], elo_engine.elo_changes(
+        lineup_elo,
+        lineup_stats["K"], lineup_stats["D"], lineup_stats["A"],
+        lineup_stats["ADR"], lineup_stats["MVP"],
+        [True] * len(winning_result) + [False] * len(losing_result),
+        elo_gain, losing_elo_gain
+    ).tolist()))
+    
+    # Match number and folder for this result
+    season = seasons.get_current_season()
+    match_num = seasons.next_match_num(season)
+    match_path = seasons.match_dir(match_num, season)
+    
+    # Match metadata (winning team, scores, map)
     match_metadata = {
         "winning_team": win_team,
         "team1_score": team1_score,
         "team2_score": team2_score,
         "match_num": match_num,
-        "map": map_name
+        "map": map_name,
+        "season": season,
+        "t1_gain": int(t1_gain),
+        "t2_gain": int(t2_gain),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "elo_changes": {str(name): int(change) for name, change in elo_deltas.items()}
     }
-    import json
-    with open(f'{match_path}/metadata.json', 'w') as f:
-        json.dump(match_metadata, f)
+    
+    # Per-player deltas so /api/matches/<n>/revert can undo this match without a replay
+    lineup_won = [True] * len(winning_result) + [False] * len(losing_result)
+    match_delta = {
+        "match_num": match_num,
+        "season": season,
+        "map": map_name,
+        "total_rounds": total_rounds,
+        "created_at": match_metadata["created_at"],
+        "players": [
+            {
+                "name": str(name),
+                "won": won,
+                "K": int(k), "D": int(d), "A": int(a), "ADR": int(adr), "MVP": int(mvp),
+                "elo_change": int(elo_deltas[name]),
+                "prev_round_stats": [float(table.row(name)[col]) for col in player_table.ROUND_COLUMNS],
+            }
+            for name, won, k, d, a, adr, mvp in zip(
+                lineup["Name"], lineup_won, lineup_stats["K"], lineup_stats["D"],
+                lineup_stats["A"], lineup_stats["ADR"], lineup_stats["MVP"])
+        ],
+    }
+    
+    # Journal the whole match (one fsync) before any file or database write
+    journal_seq = journal_event("match", {
+        "team_1_result": data['team_1_result'],
+        "team_2_result": data['team_2_result'],
+        "metadata": match_metadata,
+        "delta": match_delta,
+    })
+    
+    # Save match history: team CSVs, metadata and deltas
+    write_match_folder(match_path, data['team_1_result'], data['team_2_result'], match_metadata, match_delta)
     
     # Store match in database
     db.create_match_record(
@@ -883,143 +1496,60 @@ def submit_match():
     
     # Update map statistics
     db.update_map_stats(map_name, total_rounds, match_num)
+    metrics.inc("db_rows_written_total", 2)  # match record + map stats row
     
-    # Store match path for each player
-    match_history_path = f'match_{match_num}'
+    # Per-player map aggregates for the ten lines, in one transaction
+    try:
+        rows_written = map_stats.record_match(map_name, zip(
+            lineup["Name"], [True] * len(winning_result) + [False] * len(losing_result),
+            lineup_stats["K"], lineup_stats["D"], lineup_stats["A"], lineup_stats["ADR"]
+        ), total_rounds, season)
+        metrics.inc("db_rows_written_total", rows_written)
+    except Exception as e:
+        print(f"Error updating player map stats: {e}")
+    
+    # Apply the match to the table copy in one vectorized update, then install it
+    table.apply_match(
+        lineup["Name"].tolist(),
+        lineup_stats["K"], lineup_stats["D"], lineup_stats["A"],
+        lineup_stats["ADR"], lineup_stats["MVP"],
+        [True] * len(winning_result) + [False] * len(losing_result),
+        [elo_deltas[name] for name in lineup["Name"]],
+        total_rounds, f'match_{match_num}'
+    )
+    with metrics.span("pandas"):
+        table.derive().sort_by_elo()
+    df_current = set_player_table(table)
+    
+    # Rolling form windows: O(1) per player, no history scan
+    form.record(
+        lineup["Name"].tolist(),
+        lineup_stats["K"], lineup_stats["D"], lineup_stats["A"], lineup_stats["ADR"],
+        [True] * len(winning_result) + [False] * len(losing_result),
+        total_rounds
+    )
+    save_player_form()
+    try:
+        synergies.record(winning_players, losing_players)
+    except Exception as e:
+        print(f"Error updating synergy matrices: {e}")
     
-    # Update winning team
-    for player in winning_players:
-        k = int(winning_result.loc[winning_result["Name"] == player]["K"])
-        d = int(winning_result.loc[winning_result["Name"] == player]["D"])
-        a = int(winning_result.loc[winning_result["Name"] == player]["A"])
-        adr = int(winning_result.loc[winning_result["Name"] == player]["ADR"])
-        mvp = int(winning_result.loc[winning_result["Name"] == player]["MVP"])
-        
-        # Calculate per-round stats
-        kpr = round(k / total_rounds, 3) if total_rounds > 0 else 0.0
-        dpr = round(d / total_rounds, 3) if total_rounds > 0 else 0.0
-        apr = round(a / total_rounds, 3) if total_rounds > 0 else 0.0
-        
-        # Update cumulative stats
-        df_current.loc[df_current["Name"] == player, 'Matches'] += 1
-        df_current.loc[df_current["Name"] == player, "Wins"] += 1
-        df_current.loc[df_current["Name"] == player, "TKills"] += k
-        df_current.loc[df_current["Name"] == player, "TDeaths"] += d
-        df_current.loc[df_current["Name"] == player, "TAssists"] += a
-        df_current.loc[df_current["Name"] == player, "TADR"] += adr
-        df_current.loc[df_current["Name"] == player, "MVP"] += mvp
-        
-        # Update per-round averages (weighted average)
-        current_matches = df_current.loc[df_current["Name"] == player, "Matches"].values[0]
-        if current_matches > 1:
-            # Weighted average: (old_avg * (matches-1) + new_value) / matches
-            old_kpr = df_current.loc[df_current["Name"] == player, "KPR"].values[0] if "KPR" in df_current.columns else 0.0
-            old_dpr = df_current.loc[df_current["Name"] == player, "DPR"].values[0] if "DPR" in df_current.columns else 0.0
-            old_apr = df_current.loc[df_current["Name"] == player, "APR"].values[0] if "APR" in df_current.columns else 0.0
-            
-            new_kpr = round((old_kpr * (current_matches - 1) + kpr) / current_matches, 3)
-            new_dpr = round((old_dpr * (current_matches - 1) + dpr) / current_matches, 3)
-            new_apr = round((old_apr * (current_matches - 1) + apr) / current_matches, 3)
-        else:
-            new_kpr = kpr
-            new_dpr = dpr
-            new_apr = apr
-        
-        df_current.loc[df_current["Name"] == player, "KPR"] = new_kpr
-        df_current.loc[df_current["Name"] == player, "DPR"] = new_dpr
-        df_current.loc[df_current["Name"] == player, "APR"] = new_apr
-        
-        # Update match history (append to existing)
-        current_history = str(df_current.loc[df_current["Name"] == player, "MatchHistory"].values[0]) if "MatchHistory" in df_current.columns else ""
-        if current_history:
-            new_history = current_history + "," + match_history_path
-        else:
-            new_history = match_history_path
-        df_current.loc[df_current["Name"] == player, "MatchHistory"] = new_history
-        
-        rating = get_rating(
-            k / (d + 0.001),
-            k,
-            a,
-            d,
-            adr
-        )
-        
-        elo_change = int(int(elo_gain) + min(15, int(rating * 5)) - 
-                        int((df_current.loc[df_current["Name"] == player, "ELO"] - average_elo) * 0.03) + 
-                        mvp * 10)
-        df_current.loc[df_current["Name"] == player, "ELO"] += elo_change
-    
-    # Update losing team
-    for player in losing_players:
-        k = int(losing_result.loc[losing_result["Name"] == player]["K"])
-        d = int(losing_result.loc[losing_result["Name"] == player]["D"])
-        a = int(losing_result.loc[losing_result["Name"] == player]["A"])
-        adr = int(losing_result.loc[losing_result["Name"] == player]["ADR"])
-        
-        # Calculate per-round stats
-        kpr = round(k / total_rounds, 3) if total_rounds > 0 else 0.0
-        dpr = round(d / total_rounds, 3) if total_rounds > 0 else 0.0
-        apr = round(a / total_rounds, 3) if total_rounds > 0 else 0.0
-        
-        # Update cumulative stats
-        df_current.loc[df_current["Name"] == player, "Matches"] += 1
-        df_current.loc[df_current["Name"] == player, "Losses"] += 1
-        df_current.loc[df_current["Name"] == player, "TKills"] += k
-        df_current.loc[df_current["Name"] == player, "TDeaths"] += d
-        df_current.loc[df_current["Name"] == player, "TAssists"] += a
-        df_current.loc[df_current["Name"] == player, "TADR"] += adr
-        
-        # Update per-round averages (weighted average)
-        current_matches = df_current.loc[df_current["Name"] == player, "Matches"].values[0]
-        if current_matches > 1:
-            # Weighted average: (old_avg * (matches-1) + new_value) / matches
-            old_kpr = df_current.loc[df_current["Name"] == player, "KPR"].values[0] if "KPR" in df_current.columns else 0.0
-            old_dpr = df_current.loc[df_current["Name"] == player, "DPR"].values[0] if "DPR" in df_current.columns else 0.0
-            old_apr = df_current.loc[df_current["Name"] == player, "APR"].values[0] if "APR" in df_current.columns else 0.0
-            
-            new_kpr = round((old_kpr * (current_matches - 1) + kpr) / current_matches, 3)
-            new_dpr = round((old_dpr * (current_matches - 1) + dpr) / current_matches, 3)
-            new_apr = round((old_apr * (current_matches - 1) + apr) / current_matches, 3)
-        else:
-            new_kpr = kpr
-            new_dpr = dpr
-            new_apr = apr
-        
-        df_current.loc[df_current["Name"] == player, "KPR"] = new_kpr
-        df_current.loc[df_current["Name"] == player, "DPR"] = new_dpr
-        df_current.loc[df_current["Name"] == player, "APR"] = new_apr
-        
-        # Update match history (append to existing)
-        current_history = str(df_current.loc[df_current["Name"] == player, "MatchHistory"].values[0]) if "MatchHistory" in df_current.columns else ""
-        if current_history:
-            new_history = current_history + "," + match_history_path
-        else:
-            new_history = match_history_path
-        df_current.loc[df_current["Name"] == player, "MatchHistory"] = new_history
-        
-        rating = get_rating(
-            k / (d + 0.001),
-            k,
-            a,
-            d,
-            adr
-        )
-        
-        # For losing team, use the opposite team's gain value for loss calculation
-        losing_elo_gain = t2_gain if win_team == "Team 1" else t1_gain
-        elo_change = int(losing_elo_gain) + max(0, (10 - int(rating * 10))) + int((df_current.loc[df_current["Name"] == player, "ELO"] - average_elo) * 0.03)
-        df_current.loc[df_current["Name"] == player, "ELO"] -= elo_change
+    write_players(df_current)
     
-    global_context["database"] = df_current
-    db.bulk_update_from_dataframe(df_current)
-    update_database_stats()
+    # Refit the win-probability model with this result
+    try:
+        model.update(match_features, win_team == "Team 1",
+                     {**{p: True for p in winning_players}, **{p: False for p in losing_players}})
+        save_win_model()
+    except Exception as e:
+        print(f"Error updating win-probability model: {e}")
     
     # Get updated top 3 with rank icons
     df_updated = global_context["database"]
 
     # Record daily ELO snapshots after match submission
     record_daily_elo_snapshots(df_updated)
+    maybe_snapshot_journal(journal_seq)
 
     top_3 = df_updated.head(3)
     top_3_list = []
@@ -1037,14 +1567,111 @@ def submit_match():
         "top_3": top_3_list
     })
 
+def _write_player_rows(conn, df_players):
+    """UPDATE the given players' stat columns on an open connection (no commit)"""
+    columns = elo_replay.TOTAL_COLUMNS + elo_replay.DERIVED_COLUMNS + ["ELO"] + elo_replay.ROUND_COLUMNS + ["MatchHistory"]
+    assignments = ", ".join(f'"{c}" = ?' for c in columns)
+    rows = [
+        tuple(r[c].item() if hasattr(r[c], "item") else r[c] for c in columns) + (r["Name"],)
+        for _, r in df_players.iterrows()
+    ]
+    conn.executemany(f'UPDATE players SET {assignments} WHERE Name = ?', rows)
+    return len(rows)
+
+@app.route('/api/matches/<int:match_num>/revert', methods=['POST'])
+@serialized
+def revert_match(match_num):
+    """Undo the latest match of the season from its delta record, without replaying the season"""
+    try:
+        season = seasons.get_current_season()
+        nums = seasons.list_match_nums(season)
+        if not nums or nums[-1] != match_num:
+            latest = f"match {nums[-1]}" if nums else "no match"
+            return jsonify({
+                "success": False,
+                "error": f"Only the latest match can be reverted ({latest}); use /api/admin/replay for older matches"
+            }), 409
+        match_path = seasons.match_dir(match_num, season)
+        delta_path = os.path.join(match_path, MATCH_DELTA_FILENAME)
+        if not os.path.exists(delta_path):
+            return jsonify({
+                "success": False,
+                "error": f"Match {match_num} has no delta record; use /api/admin/replay instead"
+            }), 400
+        with open(delta_path, 'r') as f:
+            delta = json.load(f)
+        lines = delta["players"]
+        names = [line["name"] for line in lines]
+        won = [bool(line["won"]) for line in lines]
+        
+        table = player_table.PlayerTable.from_dataframe(global_context["database"])
+        table.revert_match(
+            names,
+            [line["K"] for line in lines], [line["D"] for line in lines], [line["A"] for line in lines],
+            [line["ADR"] for line in lines], [line["MVP"] for line in lines], won,
+            [line["elo_change"] for line in lines],
+            [line["prev_round_stats"] for line in lines],
+            f'match_{match_num}'
+        )
+        with metrics.span("pandas"):
+            table.derive().sort_by_elo()
+            df_reverted = table.to_dataframe()
+        journal_seq = journal_event("revert", delta)
+        
+        # Players, map aggregates and match records in one transaction
+        with metrics.span("db_write"):
+            with db_connection.transaction(db.DB_PATH, schema=map_stats.SCHEMA) as conn:
+                rows_written = _write_player_rows(conn, df_reverted[df_reverted["Name"].isin(names)])
+                rows_written += map_stats.revert_match(conn, delta["map"], [
+                    (line["name"], line["won"], line["K"], line["D"], line["A"], line["ADR"]) for line in lines
+                ], delta["total_rounds"], season)
+                _delete_match_records(conn, match_num, delta["map"], delta["total_rounds"])
+        metrics.inc("db_rows_written_total", rows_written)
+        
+        # Move the folder aside: streaks, records and the match log stop seeing the match
+        os.replace(match_path, os.path.join(seasons.season_dir(season), f'reverted_match_{match_num}_{int(time.time())}'))
+        set_player_table(table, df_reverted)
+        
+        # The submit day's snapshot held the post-match ELO; rewrite it, then today's
+        reverted_elos = dict(zip(df_reverted["Name"].astype(str), df_reverted["ELO"].astype(int)))
+        try:
+            submit_day = str(delta.get("created_at") or "")[:10]
+            if submit_day:
+                db.upsert_daily_elo_snapshots({n: reverted_elos[n] for n in names if n in reverted_elos},
+                                              day_str=submit_day)
+        except Exception as e:
+            print(f"Error rewriting ELO snapshots: {e}")
+        elo_snapshot_writer.invalidate(names)
+        record_daily_elo_snapshots(df_reverted)
+        
+        # Caches keyed by the season's match count rebuild on next use
+        _win_model_state["loaded"] = False
+        _player_form_state["loaded"] = False
+        _synergy_state["loaded"] = False
+        maybe_snapshot_journal(journal_seq)
+        
+        return jsonify({
+            "success": True,
+            "match_num": match_num,
+            "season": season,
+            "players": [{"name": line["name"], "elo_change": -int(line["elo_change"])} for line in lines]
+        })
+    except Exception as e:
+        print(f"Error reverting match {match_num}: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/update-online-players', methods=['GET'])
+@serialized
 def update_online_players():
     """Update online players list and top 3 - called automatically every hour"""
     # Refresh from database first to get latest players
     df_updated = refresh_database_from_db()
     # Then update stats
     df_updated = update_database_stats()
-    online_df = get_random_players(df_updated)
+    presence_version, online_players = get_online_players(df_updated, rotate=True)
     top_3 = df_updated.head(3)
     
     # Add rank icons to top 3
@@ -1064,9 +1691,55 @@ def update_online_players():
     return jsonify({
         "success": True,
         "top_3": top_3_list,
-        "online_players": online_df["Name"].tolist()
+        "online_players": sorted(online_players),
+        "presence_version": presence_version
+    })
+
+def _presence_names(data):
+    """Known player names from a {"name": ...} or {"names": [...]} body"""
+    names = data.get('names') or ([data['name']] if data.get('name') else [])
+    known = set(global_context["database"]["Name"].astype(str))
+    return [str(n) for n in names if str(n) in known], [str(n) for n in names if str(n) not in known]
+
+@app.route('/api/presence', methods=['GET'])
+def get_presence():
+    """Current online players and the snapshot version"""
+    version, online = presence_registry.snapshot()
+    return jsonify({
+        "success": True,
+        "version": version,
+        "count": len(online),
+        "online_players": sorted(online),
+        "sampled": _presence_state["sampled"]
     })
 
+@app.route('/api/presence/join', methods=['POST'])
+@app.route('/api/presence/heartbeat', methods=['POST'])
+def presence_heartbeat():
+    """Mark players online, or keep them online for another TTL"""
+    data = request.get_json(silent=True) or {}
+    names, unknown = _presence_names(data)
+    if not names:
+        return jsonify({"success": False, "error": "No known player names given", "unknown": unknown}), 400
+    try:
+        ttl = float(data['ttl']) if data.get('ttl') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "ttl must be a number of seconds"}), 400
+    if not _presence_state["reported"]:
+        # First real report replaces the random stand-in sample for good
+        presence_registry.clear()
+        _presence_state.update(sampled=False, reported=True)
+    joined = presence_registry.join(names, ttl=ttl)
+    return jsonify({"success": True, "joined": joined, "unknown": unknown, "version": presence_registry.version})
+
+@app.route('/api/presence/leave', methods=['POST'])
+def presence_leave():
+    """Mark players offline"""
+    data = request.get_json(silent=True) or {}
+    names, unknown = _presence_names(data)
+    left = presence_registry.leave(names)
+    return jsonify({"success": True, "left": left, "unknown": unknown, "version": presence_registry.version})
+
 @app.route('/api/elo-history/<player_name>')
 def get_elo_history(player_name):
     """Get daily ELO history for a player."""
@@ -1082,6 +1755,8 @@ def get_map_stats():
     try:
         maps_df = db.get_all_maps()
         maps_list = []
+        ensure_map_stats()
+        best_players = map_stats.map_players()
         
         for _, row in maps_df.iterrows():
             map_name = row['map_name']
@@ -1093,7 +1768,8 @@ def get_map_stats():
                 "map_name": map_name,
                 "num_games": num_games,
                 "total_rounds": total_rounds,
-                "avg_rounds": avg_rounds
+                "avg_rounds": avg_rounds,
+                "best_players": best_players.get(map_name, [])
             })
         
         # Sort by number of games (most played first)
@@ -1111,6 +1787,37 @@ def get_map_stats():
             "maps": []
         })
 
+@app.route('/api/synergy/<player_name>')
+def get_player_synergy(player_name):
+    """Teammates and opponents of a player; ?with=<name> adds that pair's counts"""
+    matrix = get_synergy()
+    summary = matrix.player_summary(player_name, min_games=request.args.get('min_games', 1, type=int))
+    if summary is None:
+        return jsonify({"error": "Player not found"}), 404
+    other = request.args.get('with')
+    if other:
+        summary["pair"] = {"name": other, **matrix.pair(player_name, other)}
+    return jsonify(summary)
+
+def player_map_stats(player_name):
+    ensure_map_stats()
+    try:
+        return map_stats.player_maps(player_name)
+    except Exception as e:
+        print(f"Error reading player map stats: {e}")
+        return []
+
+@app.route('/api/players/search')
+def search_players():
+    """Prefix and typo-tolerant player name search: ?q=<text>&limit=<n>"""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', player_search.DEFAULT_LIMIT, type=int), 50))
+    results = get_player_search().search(query, limit=limit)
+    table = get_player_table()
+    for result in results:
+        result["elo"] = int(table["ELO"][table.index[result["name"]]])
+    return jsonify({"query": query, "results": results})
+
 @app.route('/api/player-stats/<player_name>')
 def get_player_stats(player_name):
     """Get detailed stats for a specific player"""
@@ -1121,7 +1828,8 @@ def get_player_stats(player_name):
     player_data = df_current[df_current["Name"] == player_name]
     
     if player_data.empty:
-        return jsonify({"error": "Player not found"}), 404
+        suggestions = [r["name"] for r in get_player_search().search(player_name, limit=5)]
+        return jsonify({"error": "Player not found", "suggestions": suggestions}), 404
     
     player = player_data.iloc[0]
     
@@ -1133,7 +1841,7 @@ def get_player_stats(player_name):
         match_ids = [m.strip() for m in match_history_str.split(",") if m.strip()]
         
         for match_id in match_ids:
-            match_path = f'./match_history/S4/{match_id}'
+            match_path = seasons.match_dir(match_id)
             if os.path.exists(match_path):
                 try:
                     # Try to read both team files
@@ -1163,7 +1871,7 @@ def get_player_stats(player_name):
                     
                     # Check team 1
                     if os.path.exists(t1_path):
-                        t1_df = pd.read_csv(t1_path)
+                        t1_df = read_match_csv(t1_path)
                         player_row = t1_df[t1_df["Name"] == player_name]
                         if not player_row.empty:
                             player_in_team1 = True
@@ -1179,7 +1887,7 @@ def get_player_stats(player_name):
                     
                     # Check team 2
                     if not player_in_team1 and os.path.exists(t2_path):
-                        t2_df = pd.read_csv(t2_path)
+                        t2_df = read_match_csv(t2_path)
                         player_row = t2_df[t2_df["Name"] == player_name]
                         if not player_row.empty:
                             player_in_team2 = True
@@ -1227,31 +1935,16 @@ def get_player_stats(player_name):
         "total_deaths": int(player["TDeaths"]),
         "total_assists": int(player["TAssists"]),
         "mvp_count": int(player["MVP"]),
+        "form": get_player_form().stats(player_name),
+        "maps": player_map_stats(player_name),
         "match_history": match_history_list
     }
     
     return jsonify(stats)
 
-def preprocess_image(image_bytes):
-    """Preprocess image for better OCR accuracy"""
-    # Convert bytes to numpy array
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Enhance contrast
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(gray)
-    
-    # Denoise
-    denoised = cv2.fastNlMeansDenoising(enhanced, None, 10, 7, 21)
-    
-    # Threshold to get better text contrast
-    _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    return thresh
+def preprocess_image(image_bytes, profile=None):
+    """Preprocess image for better OCR accuracy (see ocr_pipeline for the stage profiles)"""
+    return ocr_pipeline.preprocess(image_bytes, profile)
 
 def parse_csgo_stats(text_lines, all_player_names):
     """Parse OCR text to extract player statistics from CS:GO match stats"""
@@ -1383,46 +2076,117 @@ def parse_csgo_stats(text_lines, all_player_names):
     
     return unique_players
 
-def extract_stats_from_image(image_bytes):
+def extract_stats_from_image(image_bytes, profile=None):
     """Extract player stats from CSGO match screenshot using OCR"""
     if not init_ocr():
         return {"error": "OCR not available. Please install EasyOCR: pip install easyocr"}
     
     try:
         # Preprocess image
-        processed_img = preprocess_image(image_bytes)
+        processed_img = preprocess_image(image_bytes, profile)
         
         # Use EasyOCR to extract text
-        results = ocr_reader.readtext(processed_img)
-        
-        # Combine all detected text with confidence and position info
-        all_text = []
-        for (bbox, text, confidence) in results:
-            if confidence > 0.2:  # Lower threshold to catch more text
-                cleaned_text = text.strip()
-                if cleaned_text and len(cleaned_text) > 0:
-                    all_text.append(cleaned_text)
+        ocr_started = time.perf_counter()
+        with metrics.span("ocr"):
+            results = ocr_reader.readtext(processed_img)
+        metrics.inc("ocr_seconds_total", time.perf_counter() - ocr_started)
         
         # Get player names from database
         df_current = global_context["database"]
-        all_player_names = df_current["Name"].tolist()
-        
-        # Parse extracted text to find player stats
-        players_data = parse_csgo_stats(all_text, all_player_names)
-        print(all_text)
-        # Return more debugging info
-        return {
-            "success": len(players_data) > 0,
-            "players": players_data,
-            "raw_text": all_text[:30],  # Return first 30 lines for debugging
-            "total_text_lines": len(all_text),
-            "players_found": len(players_data),
-            "message": f"Found {len(players_data)} players" if players_data else "No players found. Check raw_text for OCR output."
-        }
+        return stats_from_ocr_results(results, df_current["Name"].tolist())
     except Exception as e:
         import traceback
         return {"error": f"OCR processing failed: {str(e)}\n{traceback.format_exc()}"}
 
+def stats_from_ocr_results(results, all_player_names):
+    """Parse raw EasyOCR (bbox, text, confidence) results into player stats"""
+    # Combine all detected text with confidence and position info
+    all_text = []
+    for (bbox, text, confidence) in results:
+        if confidence > 0.2:  # Lower threshold to catch more text
+            cleaned_text = text.strip()
+            if cleaned_text and len(cleaned_text) > 0:
+                all_text.append(cleaned_text)
+    
+    # Parse extracted text to find player stats
+    players_data = parse_csgo_stats(all_text, all_player_names)
+    print(all_text)
+    # Return more debugging info
+    return {
+        "success": len(players_data) > 0,
+        "players": players_data,
+        "raw_text": all_text[:30],  # Return first 30 lines for debugging
+        "total_text_lines": len(all_text),
+        "players_found": len(players_data),
+        "message": f"Found {len(players_data)} players" if players_data else "No players found. Check raw_text for OCR output."
+    }
+
+SCREENSHOT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+OCR_BATCH_SIZE = 8
+# Limits on one batch, checked against the zip directory before anything is decompressed
+MAX_BATCH_IMAGES = 200
+MAX_ZIP_ENTRIES = 1000
+MAX_SCREENSHOT_BYTES = 20 * 1024 * 1024
+MAX_BATCH_BYTES = 256 * 1024 * 1024
+
+def collect_screenshot_uploads(files):
+    """(filename, bytes) for every uploaded image, expanding zip archives.
+
+    Raises ValueError when the batch exceeds the image count or size limits
+    (zip entries are checked by their declared size, which bounds what
+    zipfile will inflate).
+    """
+    images = []
+    total_bytes = 0
+
+    def add(name, size, read):
+        nonlocal total_bytes
+        if len(images) >= MAX_BATCH_IMAGES:
+            raise ValueError(f"Too many images in one batch (limit {MAX_BATCH_IMAGES})")
+        if size > MAX_SCREENSHOT_BYTES:
+            raise ValueError(f"{name} is larger than {MAX_SCREENSHOT_BYTES // (1024 * 1024)} MB")
+        total_bytes += size
+        if total_bytes > MAX_BATCH_BYTES:
+            raise ValueError(f"Batch is larger than {MAX_BATCH_BYTES // (1024 * 1024)} MB uncompressed")
+        images.append((name, read()))
+
+    for upload in files:
+        data = upload.read()
+        name = upload.filename or f"upload_{len(images) + 1}"
+        if name.lower().endswith('.zip') or data[:4] == b'PK\x03\x04':
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                entries = archive.infolist()
+                if len(entries) > MAX_ZIP_ENTRIES:
+                    raise ValueError(f"{name} has {len(entries)} entries (limit {MAX_ZIP_ENTRIES})")
+                for info in sorted(entries, key=lambda entry: entry.filename):
+                    base = os.path.basename(info.filename)
+                    if info.is_dir() or base.startswith('.') or '__MACOSX' in info.filename:
+                        continue
+                    if base.lower().endswith(SCREENSHOT_EXTENSIONS):
+                        add(info.filename, info.file_size, lambda info=info: archive.read(info))
+        else:
+            add(name, len(data), lambda data=data: data)
+    return images
+
+def ocr_batch(processed_images):
+    """EasyOCR results for preprocessed images, batched per image size"""
+    results = [None] * len(processed_images)
+    by_shape = {}
+    for i, img in enumerate(processed_images):
+        by_shape.setdefault(img.shape, []).append(i)
+    ocr_started = time.perf_counter()
+    with metrics.span("ocr"):
+        for indices in by_shape.values():
+            batch = [processed_images[i] for i in indices]
+            if len(batch) > 1 and hasattr(ocr_reader, 'readtext_batched'):
+                batch_results = ocr_reader.readtext_batched(batch, batch_size=len(batch))
+            else:
+                batch_results = [ocr_reader.readtext(img) for img in batch]
+            for i, result in zip(indices, batch_results):
+                results[i] = result
+    metrics.inc("ocr_seconds_total", time.perf_counter() - ocr_started)
+    return results
+
 @app.route('/api/all-matches')
 def get_all_matches():
     """Get all matches from database"""
@@ -1435,15 +2199,15 @@ def get_all_matches():
             match_num = match.get("match_num")
             mvp_name = None
             try:
-                match_path = f'./match_history/S4/match_{match_num}'
+                match_path = seasons.match_dir(match_num)
                 t1_path = os.path.join(match_path, 't1.csv')
                 t2_path = os.path.join(match_path, 't2.csv')
 
                 players_df_list = []
                 if os.path.exists(t1_path):
-                    players_df_list.append(pd.read_csv(t1_path))
+                    players_df_list.append(read_match_csv(t1_path))
                 if os.path.exists(t2_path):
-                    players_df_list.append(pd.read_csv(t2_path))
+                    players_df_list.append(read_match_csv(t2_path))
 
                 if players_df_list:
                     combined_df = pd.concat(players_df_list, ignore_index=True)
@@ -1492,16 +2256,16 @@ def get_match_details(match_num):
         import pandas as pd
         import json
         
-        match_path = f'./match_history/S4/match_{match_num}'
+        match_path = seasons.match_dir(match_num)
         team1_stats = []
         team2_stats = []
         
         if os.path.exists(f'{match_path}/t1.csv'):
-            df1 = pd.read_csv(f'{match_path}/t1.csv')
+            df1 = read_match_csv(f'{match_path}/t1.csv')
             team1_stats = df1.to_dict('records')
         
         if os.path.exists(f'{match_path}/t2.csv'):
-            df2 = pd.read_csv(f'{match_path}/t2.csv')
+            df2 = read_match_csv(f'{match_path}/t2.csv')
             team2_stats = df2.to_dict('records')
         
         # Load metadata if available
@@ -1513,6 +2277,7 @@ def get_match_details(match_num):
         return jsonify({
             "success": True,
             "match": match,
+            "season": seasons.get_current_season(),
             "team1_stats": team1_stats,
             "team2_stats": team2_stats,
             "metadata": metadata
@@ -1524,6 +2289,250 @@ def get_match_details(match_num):
             "error": str(e)
         }), 500
 
+@app.route('/api/admin/replay', methods=['POST'])
+@serialized
+def replay_elo():
+    """Rebuild ELO and stats from the match log.
+
+    JSON body: {"params": {...ELO constants...}, "use_recorded_gains": bool,
+    "season": "S4", "write": bool}. Without "write" this is a dry run that
+    only reports how standings would change.
+    """
+    try:
+        options = request.get_json(silent=True) or {}
+        result = elo_replay.replay_season(
+            options.get("season"),
+            params=options.get("params") or None,
+            use_recorded_gains=bool(options.get("use_recorded_gains", False)),
+        )
+        if options.get("write"):
+            with journaled_rebuild({"action": "replay", "options": options}):
+                elo_replay.write_replay(result["table"], result["snapshots"])
+                elo_snapshot_writer.invalidate()
+                refresh_database_from_db()
+        return jsonify({"success": True, "written": bool(options.get("write")), **result["summary"]})
+    except Exception as e:
+        print(f"Error replaying matches: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/import-matches', methods=['POST'])
+@serialized
+def import_matches():
+    """Bulk-import finished matches from an uploaded JSONL/CSV file or a JSON body"""
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            fmt = request.form.get('format') or os.path.splitext(upload.filename or '')[1].lstrip('.').lower() or None
+            records = bulk_import.load_records(text=upload.read().decode('utf-8'), fmt=fmt)
+            dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        else:
+            data = request.get_json(silent=True) or {}
+            records = bulk_import.records_from_json(data)
+            dry_run = bool(data.get('dry_run', False))
+        
+        # Validate and compute first: a rejected batch leaves no journal entry
+        plan = bulk_import.plan_import(records, refresh_database_from_db())
+        if not dry_run and plan["matches"]:
+            with journaled_rebuild({"action": "import", "records": len(records)}):
+                bulk_import.write_import(plan)
+                elo_snapshot_writer.invalidate()
+                _win_model_state["loaded"] = False
+                _player_form_state["loaded"] = False
+                _synergy_state["loaded"] = False
+                _map_stats_state["checked"] = False
+                refresh_database_from_db()
+        return jsonify({"success": True, **bulk_import.import_summary(plan, dry_run)})
+    except bulk_import.ImportValidationError as e:
+        return jsonify({"success": False, "error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/export/<kind>')
+def export_data(kind):
+    """Stream players, matches or per-player lines as CSV/JSONL (?format=, ?season=, ?since=)"""
+    fmt = request.args.get('format', 'csv')
+    season = request.args.get('season') or None
+    since = request.args.get('since', type=int)
+    if season:
+        error = season_key_error(season)
+        if error:
+            return error
+    try:
+        chunks = export.stream_export(kind, fmt, season=season, since=since)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    filename = f"{kind}_{season or seasons.get_current_season()}{f'_since_{since}' if since else ''}.{fmt}"
+    return Response(stream_with_context(chunks), mimetype=export.FORMATS[fmt],
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.route('/api/admin/rating-formula', methods=['GET'])
+def get_rating_formulas():
+    """Registered rating formulas and the active one per role"""
+    return jsonify({
+        "success": True,
+        "active": {role: rating_formulas.active(role).key for role in rating_formulas.ROLES},
+        "formulas": [f.describe() for f in rating_formulas.formulas()]
+    })
+
+@app.route('/api/admin/rating-formula/register', methods=['POST'])
+@serialized
+def register_rating_formula():
+    """Add a formula to the registry and the custom formulas file.
+
+    JSON body: {"name": "season", "version": 2, "weights": {"kd": 0.3, ...},
+    "decimals": 2, "description": "..."}. Registering does not activate it;
+    switch to it with POST /api/admin/rating-formula.
+    """
+    try:
+        formula = rating_formulas.add_formula(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "formula": formula.describe()})
+
+@app.route('/api/admin/rating-formula', methods=['POST'])
+@serialized
+def set_rating_formula():
+    """Switch the formula of a role and backfill what depends on it.
+
+    JSON body: {"role": "season" | "match", "formula": "season@2",
+    "backfill": true}. Season formulas recompute the Rating column in one
+    pass; match formulas replay the season's ELO from the match log.
+    Form and win-model caches are rebuilt either way.
+    """
+    try:
+        options = request.get_json(silent=True) or {}
+        role = options.get("role", "season")
+        try:
+            rating_formulas.validate_role(role)
+            formula = rating_formulas.get(str(options.get("formula", "")))
+        except (KeyError, ValueError) as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        previous = rating_formulas.active(role)
+        result = {"role": role, "previous": previous.key, "formula": formula.key, "backfilled": 0}
+        
+        if not options.get("backfill", True) or previous.key == formula.key:
+            rating_formulas.set_active(role, formula.key)
+        else:
+            # Compute the backfill with the new formula before anything is persisted
+            if role == "season":
+                df_current = global_context["database"].copy()
+                with metrics.span("pandas"):
+                    result["backfilled"] = rating_formulas.backfill_table(df_current, formula)
+            else:
+                # Recorded gains keep the win-probability gains; only the performance terms change
+                replay = elo_replay.replay_season(use_recorded_gains=True, formula=formula)
+                result["backfilled"] = replay["summary"]["matches"]
+            with journaled_rebuild({"action": "rating_formula", "role": role, "formula": formula.key}):
+                rating_formulas.set_active(role, formula.key)
+                try:
+                    if role == "season":
+                        write_players(df_current)
+                        global_context["database"] = df_current
+                    else:
+                        elo_replay.write_replay(replay["table"], replay["snapshots"])
+                        elo_snapshot_writer.invalidate()
+                        refresh_database_from_db()
+                except Exception:
+                    rating_formulas.set_active(role, previous.key)
+                    raise
+        
+        # Form ratings and the win model's rating feature come from these formulas
+        for filename in (player_form.FORM_FILENAME, win_prob.MODEL_FILENAME):
+            path = os.path.join(seasons.season_dir(), filename)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        _player_form_state["loaded"] = False
+        _win_model_state["loaded"] = False
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        print(f"Error switching rating formula: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/win-model')
+def get_win_model_summary():
+    """Coefficients and training size of the win-probability model"""
+    return jsonify({"success": True, "features": win_prob.FEATURES, **get_win_model().summary()})
+
+@app.route('/metrics')
+def get_metrics():
+    """Per-route phase histograms and counters in the Prometheus text format"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/seasons')
+def get_seasons():
+    """List the live season and all archived seasons"""
+    return jsonify({
+        "success": True,
+        "current": seasons.get_current_season(),
+        "seasons": seasons.list_seasons()
+    })
+
+@app.route('/api/seasons/<season>/archive', methods=['POST'])
+@serialized
+def archive_season(season):
+    """Pack a season's match folders into its compact archive"""
+    error = season_key_error(season)
+    if error:
+        return error
+    if season == seasons.get_current_season():
+        return jsonify({
+            "success": False,
+            "error": f"{season} is the live season; archive it with /api/reset-database and a next_season"
+        }), 409
+    try:
+        options = request.get_json(silent=True) or {}
+        result = seasons.archive_season(season, prune=bool(options.get("prune", False)))
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        print(f"Error archiving season {season}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/seasons/<season>/matches')
+def get_season_matches(season):
+    """Match summaries of an archived season"""
+    error = season_key_error(season)
+    if error:
+        return error
+    matches = seasons.archived_matches(season)
+    if matches is None:
+        return jsonify({"success": False, "error": f"Season {season} is not archived", "matches": []}), 404
+    return jsonify({"success": True, "season": season, "matches": matches})
+
+@app.route('/api/seasons/<season>/match-details/<int:match_num>')
+def get_season_match_details(season, match_num):
+    """Full scoreboard of one archived match"""
+    error = season_key_error(season)
+    if error:
+        return error
+    match = seasons.archived_match(season, match_num)
+    if match is None:
+        return jsonify({"success": False, "error": "Match not found"}), 404
+    return jsonify({"success": True, "season": season, **match})
+
+@app.route('/api/seasons/<season>/player-stats/<player_name>')
+def get_season_player_stats(season, player_name):
+    """Per-season totals and match lines for a player from an archived season"""
+    error = season_key_error(season)
+    if error:
+        return error
+    stats = seasons.archived_player_stats(season, player_name)
+    if stats is None:
+        return jsonify({"error": f"Season {season} is not archived"}), 404
+    return jsonify(stats)
+
+@app.route('/api/seasons/<season>/standings')
+def get_season_standings(season):
+    """Final standings stored with an archived season"""
+    error = season_key_error(season)
+    if error:
+        return error
+    standings = seasons.archived_standings(season)
+    if standings is None:
+        return jsonify({"success": False, "error": f"No standings archived for {season}", "players": []}), 404
+    return jsonify({"success": True, "season": season, "players": standings})
+
 @app.route('/api/upload-screenshot', methods=['POST'])
 def upload_screenshot():
     """Handle screenshot upload and extract stats"""
@@ -1538,10 +2547,67 @@ def upload_screenshot():
     image_bytes = file.read()
     
     # Extract stats
-    result = extract_stats_from_image(image_bytes)
+    result = extract_stats_from_image(image_bytes, request.form.get('profile'))
     
     return jsonify(result)
 
+@app.route('/api/upload-screenshots', methods=['POST'])
+def upload_screenshots():
+    """Extract stats from many screenshots (files and/or zips), streaming one NDJSON line per image"""
+    try:
+        images = collect_screenshot_uploads(request.files.getlist('files') + request.files.getlist('file'))
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({"error": str(e)}), 400
+    if not images:
+        return jsonify({"error": "No images provided"}), 400
+    if not init_ocr():
+        return jsonify({"error": "OCR not available. Please install EasyOCR: pip install easyocr"}), 503
+    
+    all_player_names = global_context["database"]["Name"].tolist()
+    profile = request.form.get('profile') or None
+    try:
+        ocr_pipeline.resolve_profile(profile)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def generate():
+        started = time.perf_counter()
+        succeeded = 0
+        pending = []
+        # OpenCV releases the GIL, so decoding/preprocessing runs on all cores from a thread pool
+        with ThreadPoolExecutor(max_workers=min(len(images), os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(preprocess_image, data, profile): (i, name) for i, (name, data) in enumerate(images)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index, filename = futures[future]
+                try:
+                    pending.append((index, filename, future.result()))
+                except Exception as e:
+                    yield json.dumps({"index": index, "filename": filename, "error": f"Could not read image: {e}"}) + "\n"
+                
+                # OCR whatever is preprocessed once a batch is full or nothing else is coming
+                if pending and (len(pending) >= OCR_BATCH_SIZE or done == len(futures)):
+                    batch, pending = pending, []
+                    try:
+                        batch_results = ocr_batch([img for _, _, img in batch])
+                    except Exception as e:
+                        batch_results = [e] * len(batch)
+                    for (index, filename, _), results in zip(batch, batch_results):
+                        if isinstance(results, Exception):
+                            result = {"error": f"OCR processing failed: {results}"}
+                        else:
+                            result = stats_from_ocr_results(results, all_player_names)
+                        succeeded += bool(result.get("success"))
+                        yield json.dumps({"index": index, "filename": filename, **result}) + "\n"
+        
+        yield json.dumps({
+            "done": True,
+            "images": len(images),
+            "succeeded": succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,204 @@
+"""Win-probability model for create-match gains.
+
+Logistic regression of "team 1 wins" on three team-difference features, all
+measured before the match:
+    elo_diff     (sum ELO team 1 - sum ELO team 2) / ELO_SCALE
+    rating_diff  mean season Rating team 1 - team 2
+    form_diff    mean win rate over each player's last FORM_WINDOW matches
+
+The training set is built from the season's match log in one vectorized pass
+(pre-match ELO comes from elo_replay), fitted with a ridge-regularized Newton
+solver, and cached next to the season's match folders. After every submitted
+match the new row is appended and the fit is warm-started from the previous
+coefficients, which converges in a couple of Newton steps.
+"""
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+import rating_formulas
+
+FEATURES = ["elo_diff", "rating_diff", "form_diff"]
+ELO_SCALE = 100.0
+FORM_WINDOW = 5
+MIN_MATCHES = 30
+RIDGE = 1.0
+MODEL_FILENAME = 'win_model.npz'
+
+
+def season_rating(kills, deaths, assists, adr_total, matches):
+    """Season Rating from cumulative totals, 0 for players without matches"""
+    features = rating_formulas.totals_features(kills, deaths, assists, adr_total, matches)
+    rating = rating_formulas.active("season").evaluate(features, rounded=False)
+    return np.where(np.asarray(matches) > 0, rating, 0.0)
+
+
+def _exclusive_group_cumsum(values, order, offsets, group_of_sorted):
+    """Per-line sum of the same player's earlier lines (lines are in match order)"""
+    sorted_values = values[order].astype(np.float64)
+    cumulative = np.cumsum(sorted_values) - sorted_values
+    cumulative -= (np.concatenate(([0.0], np.cumsum(sorted_values)))[offsets[:-1]])[group_of_sorted]
+    out = np.empty_like(cumulative)
+    out[order] = cumulative
+    return out
+
+
+def build_training_set(log, team_elo):
+    """Feature matrix X (matches x FEATURES), outcomes y and each player's latest results.
+
+    log is a columnar match log (seasons.load_match_log) and team_elo the
+    pre-match ELO sums from elo_replay.replay_log.
+    """
+    n_matches = len(log["m_num"])
+    starts = log["m_line_start"].astype(np.int64)
+    match_pos = np.repeat(np.arange(n_matches), np.diff(starts))
+    player = log["l_player"].astype(np.int64)
+    team = log["l_team"].astype(np.int64)
+    won = (log["m_winner"][match_pos].astype(np.int64) == team).astype(np.float64)
+
+    n_players = len(log["names"])
+    order = np.argsort(player, kind="stable")
+    counts = np.bincount(player, minlength=n_players)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    group_sorted = player[order]
+
+    def prior(values):
+        return _exclusive_group_cumsum(np.asarray(values), order, offsets, group_sorted)
+
+    prior_matches = prior(np.ones(len(player)))
+    rating = season_rating(prior(log["l_k"]), prior(log["l_d"]), prior(log["l_a"]),
+                           prior(np.trunc(log["l_adr"])), prior_matches)
+
+    # Wins in the previous FORM_WINDOW matches: cumulative wins minus cumulative wins FORM_WINDOW lines back
+    prior_wins_sorted = prior(won)[order]
+    nth = np.arange(len(player)) - offsets[group_sorted]
+    lagged = np.zeros(len(player))
+    has_lag = nth >= FORM_WINDOW
+    lagged[has_lag] = prior_wins_sorted[np.flatnonzero(has_lag) - FORM_WINDOW]
+    window = np.minimum(nth, FORM_WINDOW)
+    form_sorted = np.where(window > 0, (prior_wins_sorted - lagged) / np.maximum(window, 1), 0.5)
+    form = np.empty(len(player))
+    form[order] = form_sorted
+
+    slot = match_pos * 2 + (team - 1)
+    slot_counts = np.maximum(np.bincount(slot, minlength=2 * n_matches), 1)
+    team_rating = (np.bincount(slot, weights=rating, minlength=2 * n_matches) / slot_counts).reshape(-1, 2)
+    team_form = (np.bincount(slot, weights=form, minlength=2 * n_matches) / slot_counts).reshape(-1, 2)
+
+    X = np.column_stack([
+        (team_elo[:, 0] - team_elo[:, 1]) / ELO_SCALE,
+        team_rating[:, 0] - team_rating[:, 1],
+        team_form[:, 0] - team_form[:, 1],
+    ])
+    y = (log["m_winner"] == 1).astype(np.float64)
+
+    recent = {}
+    for p in range(n_players):
+        lines = order[max(offsets[p], offsets[p + 1] - FORM_WINDOW):offsets[p + 1]]
+        recent[str(log["names"][p])] = deque((bool(w) for w in won[lines]), maxlen=FORM_WINDOW)
+    return X, y, recent
+
+
+def fit_logistic(X, y, coef=None, iterations=25, ridge=RIDGE, tol=1e-8):
+    """Ridge-regularized logistic regression (intercept first) by Newton's method"""
+    A = np.column_stack([np.ones(len(X)), X])
+    w = np.zeros(A.shape[1]) if coef is None else np.asarray(coef, dtype=np.float64).copy()
+    penalty = np.full(A.shape[1], ridge)
+    penalty[0] = 0.0
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(A @ w)))
+        gradient = A.T @ (p - y) + penalty * w
+        hessian = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty) + 1e-9 * np.eye(A.shape[1])
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < tol:
+            break
+    return w
+
+
+class WinProbabilityModel:
+    """Cached, incrementally refitted P(team 1 wins)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.coef = None
+        self.X = np.zeros((0, len(FEATURES)))
+        self.y = np.zeros(0)
+        self.recent = {}
+
+    @property
+    def ready(self):
+        return self.coef is not None and len(self.y) >= MIN_MATCHES
+
+    def fit_from_log(self, log, team_elo):
+        X, y, recent = build_training_set(log, team_elo)
+        with self._lock:
+            self.X, self.y, self.recent = X, y, recent
+            self.coef = fit_logistic(X, y) if len(y) else None
+
+    def form(self, name):
+        results = self.recent.get(str(name))
+        return sum(results) / len(results) if results else 0.5
+
+    def team_features(self, df_current, team_1_names, team_2_names):
+        """Feature row for a proposed lineup from the live player table"""
+        rows = df_current.set_index("Name")
+        elo = rows["ELO"]
+        rating = rows["Rating"]
+        return np.array([
+            (elo.reindex(team_1_names).fillna(0).sum() - elo.reindex(team_2_names).fillna(0).sum()) / ELO_SCALE,
+            rating.reindex(team_1_names).fillna(0).mean() - rating.reindex(team_2_names).fillna(0).mean(),
+            np.mean([self.form(n) for n in team_1_names]) - np.mean([self.form(n) for n in team_2_names]),
+        ])
+
+    def predict(self, features):
+        """P(team 1 wins); 0.5 until enough matches have been seen"""
+        if not self.ready:
+            return 0.5
+        z = self.coef[0] + float(np.dot(self.coef[1:], features))
+        return float(1.0 / (1.0 + np.exp(-z)))
+
+    def update(self, features, team_1_won, results):
+        """Add one finished match (features measured before it) and warm-start the refit"""
+        with self._lock:
+            self.X = np.vstack([self.X, np.asarray(features, dtype=np.float64)[None, :]])
+            self.y = np.append(self.y, 1.0 if team_1_won else 0.0)
+            for name, won in results.items():
+                self.recent.setdefault(str(name), deque(maxlen=FORM_WINDOW)).append(bool(won))
+            self.coef = fit_logistic(self.X, self.y, coef=self.coef, iterations=3)
+
+    def save(self, path):
+        names = sorted(self.recent)
+        bits = np.full((len(names), FORM_WINDOW), -1, dtype=np.int8)
+        for i, name in enumerate(names):
+            results = list(self.recent[name])
+            bits[i, FORM_WINDOW - len(results):] = results
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, coef=self.coef if self.coef is not None else np.zeros(0),
+                 X=self.X, y=self.y, form_names=np.array(names, dtype=str), form_bits=bits)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            coef = data["coef"]
+            self.coef = coef if len(coef) else None
+            self.X, self.y = data["X"], data["y"]
+            self.recent = {
+                str(name): deque((bool(b) for b in row if b >= 0), maxlen=FORM_WINDOW)
+                for name, row in zip(data["form_names"], data["form_bits"])
+            }
+        return len(self.y)
+
+    def summary(self):
+        coef = self.coef.tolist() if self.coef is not None else []
+        return {
+            "ready": self.ready,
+            "matches": int(len(self.y)),
+            "intercept": round(coef[0], 4) if coef else None,
+            "coefficients": {f: round(c, 4) for f, c in zip(FEATURES, coef[1:])},
+        }